@@ -11,7 +11,8 @@ from .routes.productos import productos_bp
 from .routes.clientes import clientes_bp
 from .routes.ordenes import ordenes_bp
 from .routes.reportes import reportes_bp
-from .extensions import db, jwt
+from .routes.inventario import inventario_bp
+from .extensions import db, jwt, migrate
 from flasgger import Swagger
 
 
@@ -20,10 +21,12 @@ def create_app(config_class=DevelopmentConfig):
     app.config.from_object(config_class)
 
     db.init_app(app)
+    migrate.init_app(app, db)
 
     # ✅ Importar todos los modelos aquí en orden
     from .models.usuario import Usuario
     from .models.estudiante import Estudiante
+    from .models.estudiante_resumen import EstudianteResumen
     from .models.materia import Materia
     from .models.calificacion import Calificacion
     from .models.categoria import Categoria
@@ -31,6 +34,11 @@ def create_app(config_class=DevelopmentConfig):
     from .models.cliente import Cliente
     from .models.orden import Orden
     from .models.detalle_orden import DetalleOrden
+    from .models.idempotencia import ClaveIdempotencia
+    from .models.inventario import InventarioSlot, ReservaInventario
+    from .models.orden_pendiente import OrdenPendiente
+    from .models.venta_diaria import VentaDiaria, VentaDiariaProducto
+    from .models.sketch import CheckpointSketch
 
     CORS(app)
     jwt.init_app(app)
@@ -77,5 +85,12 @@ def create_app(config_class=DevelopmentConfig):
     app.register_blueprint(clientes_bp)
     app.register_blueprint(ordenes_bp)
     app.register_blueprint(reportes_bp)
+    app.register_blueprint(inventario_bp)
+
+    # Comandos de consola: flask ordenes ..., flask reportes ..., flask escolar ...
+    from .commands import escolar_cli, ordenes_cli, reportes_cli
+    app.cli.add_command(ordenes_cli)
+    app.cli.add_command(reportes_cli)
+    app.cli.add_command(escolar_cli)
 
     return app
\ No newline at end of file
@@ -0,0 +1,98 @@
+# app/commands.py
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.extensions import db
+from app.services import busqueda, idempotencia, resumen_academico, rollups, sketch
+from app.services.cola_ordenes import TrabajadorOrdenes
+
+ordenes_cli = AppGroup('ordenes', help='Tareas de la cola de órdenes.')
+reportes_cli = AppGroup('reportes', help='Mantenimiento de los rollups de ventas.')
+escolar_cli = AppGroup('escolar', help='Mantenimiento de los datos del módulo escolar.')
+
+
+@ordenes_cli.command('trabajar')
+@click.option('--hilos', default=2, show_default=True, help='Hilos del pool de workers.')
+@click.option('--lote', default=None, type=int, help='Órdenes por lote (default: ORDENES_ASYNC_LOTE).')
+@click.option('--intervalo', default=0.5, show_default=True, help='Segundos de espera con la cola vacía.')
+def trabajar(hilos, lote, intervalo):
+    """Procesa la cola de órdenes asíncronas hasta Ctrl+C."""
+    trabajador = TrabajadorOrdenes(current_app._get_current_object(), hilos=hilos,
+                                   intervalo=intervalo, lote=lote)
+    trabajador.iniciar()
+    click.echo(f"Workers de órdenes iniciados ({hilos} hilos). Ctrl+C para detener.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        trabajador.detener()
+
+
+@ordenes_cli.command('purgar-claves')
+def purgar_claves():
+    """Borra las claves Idempotency-Key más viejas que IDEMPOTENCIA_TTL."""
+    borradas = idempotencia.purgar()
+    click.echo(f"Claves de idempotencia borradas: {borradas}.")
+
+
+_opcion_desde = click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']),
+                             help='Primer día del rango (incluido).')
+_opcion_hasta = click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']),
+                             help='Día final del rango (excluido).')
+
+
+def _fecha(valor):
+    return valor.date() if valor else None
+
+
+@reportes_cli.command('reconstruir')
+@_opcion_desde
+@_opcion_hasta
+def reconstruir_rollups(desde, hasta):
+    """
+    Recalcula los rollups diarios de ventas (todo o el rango [desde, hasta)).
+    Al confirmar cambia la versión global de la caché de reportes; los
+    workers con LRU propio la ven expirar según REPORTES_CACHE_TTL_CERRADO.
+    """
+    rollups.reconstruir(_fecha(desde), _fecha(hasta))
+    db.session.commit()
+    click.echo("Rollups de ventas reconstruidos.")
+
+
+@reportes_cli.command('verificar')
+@_opcion_desde
+@_opcion_hasta
+def verificar_rollups(desde, hasta):
+    """Compara los rollups contra las órdenes; termina con código 1 si no cuadran."""
+    diferencias = rollups.verificar(_fecha(desde), _fecha(hasta))
+    for d in diferencias:
+        click.echo(d)
+    if diferencias:
+        click.echo(f"{len(diferencias)} diferencias encontradas.")
+        raise SystemExit(1)
+    click.echo("Rollups consistentes con las órdenes.")
+
+
+@reportes_cli.command('reconstruir-sketch')
+def reconstruir_sketch():
+    """Recalcula los checkpoints del sketch de productos desde los rollups."""
+    periodos = sketch.reconstruir()
+    db.session.commit()
+    click.echo(f"Sketch reconstruido para {periodos} periodos.")
+
+
+@escolar_cli.command('reconstruir-resumen')
+def reconstruir_resumen():
+    """Recalcula el resumen académico de todos los estudiantes."""
+    resumen_academico.reconstruir()
+    db.session.commit()
+    click.echo("Resumen académico reconstruido.")
+
+
+@escolar_cli.command('reconstruir-busqueda')
+def reconstruir_busqueda():
+    """Reconstruye el índice de búsqueda de estudiantes (solo SQLite)."""
+    busqueda.reconstruir()
+    db.session.commit()
+    click.echo("Índice de búsqueda reconstruido.")
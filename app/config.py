@@ -21,6 +21,75 @@ class Config:
     
     # Configuración de JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_jwt_secret_key")
+
+    # Máximo de respuestas idempotentes que se guardan en memoria (LRU)
+    IDEMPOTENCIA_CACHE_MAX = 1024
+    # Segundos tras los que una reserva 'en_proceso' se considera abandonada
+    # (el proceso murió) y otra petición con la misma clave puede tomarla, y
+    # segundos que se conserva una clave antes de `flask ordenes purgar-claves`
+    IDEMPOTENCIA_TIMEOUT_EN_PROCESO = 120
+    IDEMPOTENCIA_TTL = 24 * 3600
+
+    # Cola de órdenes asíncronas: tamaño de lote, reintentos y segundos
+    # tras los cuales una orden 'procesando' se considera abandonada
+    ORDENES_ASYNC_LOTE = 100
+    ORDENES_ASYNC_MAX_INTENTOS = 3
+    ORDENES_ASYNC_TIMEOUT = 300
+
+    # Caché de reportes: segundos de vida para el mes en curso y para meses
+    # cerrados (este último solo con el LRU en memoria; con un backend
+    # compartido no expiran), máximo de entradas del LRU y, opcionalmente,
+    # una función app -> BackendCache para compartir la caché entre procesos
+    REPORTES_CACHE_TTL = 60
+    REPORTES_CACHE_TTL_CERRADO = 3600
+    REPORTES_CACHE_MAX = 512
+    REPORTES_CACHE_BACKEND = None
+
+    # Sketch de productos más vendidos (?modo=aproximado): contadores por
+    # mes (error <= unidades del mes / capacidad), meses en memoria y
+    # checkpoint a la base cada N órdenes confirmadas o cada N segundos con
+    # órdenes pendientes, además de uno al terminar el proceso
+    SKETCH_CAPACIDAD = 200
+    SKETCH_VENTANAS = 13
+    SKETCH_CHECKPOINT_CADA = 100
+    SKETCH_CHECKPOINT_SEGUNDOS = 30
+    SKETCH_CHECKPOINT_AL_SALIR = True
+
+    # Peticiones idénticas a un reporte esperan a la que ya se calcula.
+    # BLOQUEO = 'archivo' | 'postgres' coordina también entre procesos
+    REPORTES_COALESCER_TIMEOUT = 30
+    REPORTES_COALESCER_BLOQUEO = None
+    REPORTES_COALESCER_DIR = None
+
+    # Máximo de slots en que se puede fragmentar el stock de un producto
+    INVENTARIO_MAX_SLOTS = 64
+
+    # Máximo de periodos de /api/reportes/ventas/serie (más es un 400)
+    REPORTES_SERIE_MAX_PERIODOS = 1000
+
+    # Segundos que se reutiliza el COUNT(*) de ?total=aproximado en los
+    # listados paginados por cursor
+    ESTUDIANTES_CONTEO_TTL = 60
+
+    # Coincidencias que se califican por relevancia en /estudiantes/buscar;
+    # acota la latencia de términos muy comunes
+    ESTUDIANTES_BUSQUEDA_CANDIDATOS = 200
+
+    # Filas por lote en POST /estudiantes/bulk (una consulta de unicidad y
+    # un executemany por lote)
+    ESTUDIANTES_LOTE_TAMANO = 1000
+
+    # Listados de catálogo (productos, clientes, categorías, materias):
+    # máximo de ?per_page= y filas por lote que lee ?stream=1
+    LISTADOS_MAX_PER_PAGE = 100
+    LISTADOS_STREAM_LOTE = 1000
+
+    # Caché de categorías y materias (JSON ya serializado, con ETag). Se
+    # invalida al confirmar escrituras; el TTL acota lo que tarda otro
+    # proceso en verlas con el LRU en memoria. BACKEND como en reportes
+    CATALOGOS_CACHE_MAX = 256
+    CATALOGOS_CACHE_TTL = 300
+    CATALOGOS_CACHE_BACKEND = None
     
 class DevelopmentConfig(Config):
     """Configuración específica para el entorno de desarrollo"""
@@ -49,4 +118,6 @@ class TestingConfig(Config):
     # Desactivar CSRF para facilitar pruebas de formularios
     WTF_CSRF_ENABLED = False
     # JWT sin expiración en pruebas (evita problemas de tiempo)
-    JWT_ACCESS_TOKEN_EXPIRES = False
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = False
+    # La base en memoria ya no existe cuando termina el proceso
+    SKETCH_CHECKPOINT_AL_SALIR = False
\ No newline at end of file
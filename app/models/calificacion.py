@@ -5,7 +5,7 @@ class Calificacion(db.Model):
     __tablename__ = 'calificaciones'
     
     id = db.Column(db.Integer, primary_key=True)
-    estudiante_id = db.Column(db.Integer, db.ForeignKey('estudiantes.id'), nullable=False)
+    estudiante_id = db.Column(db.Integer, db.ForeignKey('estudiantes.id'), nullable=False, index=True)
     materia_id = db.Column(db.Integer, db.ForeignKey('materias.id'), nullable=False)
     calificacion = db.Column(db.Numeric(precision=5, scale=2), nullable=False)
     periodo = db.Column(db.String(20), nullable=False)
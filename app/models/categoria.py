@@ -10,12 +10,11 @@ class Categoria(db.Model):
     # Relación: una categoría tiene muchos productos
     productos = db.relationship('Producto', back_populates='categoria')
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'nombre': self.nombre,
-            'description': self.description
-        }
+    # Campos de to_dict() (los válidos en ?fields=)
+    CAMPOS = ('id', 'nombre', 'description')
+
+    def to_dict(self, campos=None):
+        return {campo: getattr(self, campo) for campo in (self.CAMPOS if campos is None else campos)}
 
     def __repr__(self):
         return f'<Categoria {self.nombre}>'
\ No newline at end of file
@@ -12,14 +12,11 @@ class Cliente(db.Model):
     # Relación: un cliente tiene muchas órdenes
     ordenes = db.relationship('Orden', back_populates='cliente')
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'nombre': self.nombre,
-            'email': self.email,
-            'telefono': self.telefono,
-            'direccion': self.direccion
-        }
+    # Campos de to_dict() (los válidos en ?fields=)
+    CAMPOS = ('id', 'nombre', 'email', 'telefono', 'direccion')
+
+    def to_dict(self, campos=None):
+        return {campo: getattr(self, campo) for campo in (self.CAMPOS if campos is None else campos)}
 
     def __repr__(self):
         return f'<Cliente {self.nombre}>'
\ No newline at end of file
@@ -4,8 +4,8 @@ class DetalleOrden(db.Model):
     __tablename__ = 'detalle_ordenes'
 
     id = db.Column(db.Integer, primary_key=True)
-    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes.id'))
-    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'))
+    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes.id'), index=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), index=True)
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
 
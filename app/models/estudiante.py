@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.models.estudiante_resumen import EstudianteResumen
 from datetime import datetime
 
 class Estudiante(db.Model):
@@ -8,6 +9,12 @@ class Estudiante(db.Model):
     """
     # Nombre de la tabla en la base de datos
     __tablename__ = 'estudiantes'
+    # Índices para filtrar y particionar por carrera/semestre (ranking, kardex por lote)
+    # y para la paginación por cursor dentro de una carrera (carrera, id)
+    __table_args__ = (
+        db.Index('ix_estudiantes_carrera_semestre', 'carrera', 'semestre'),
+        db.Index('ix_estudiantes_carrera_id', 'carrera', 'id'),
+    )
     
     # Columnas de la tabla
     id = db.Column(db.Integer, primary_key=True)  # ID del estudiante, clave primaria
@@ -22,24 +29,37 @@ class Estudiante(db.Model):
     
     # Relación: un estudiante tiene muchas calificaciones
     calificaciones = db.relationship('Calificacion', back_populates='estudiante')
+
+    # Resumen académico materializado (lo mantiene app/services/resumen_academico.py).
+    # Para incluirlo sin consultas extra, cargar con joinedload(Estudiante.resumen)
+    resumen = db.relationship('EstudianteResumen', uselist=False, viewonly=True)
     
-    def to_dict(self):
+    # Campos de to_dict() (los válidos en ?fields=). Los calculados tienen su
+    # formato en _FORMATOS y declaran en DEPENDENCIAS las columnas que leen
+    CAMPOS = ('id', 'matricula', 'nombre', 'apellido', 'nombre_completo', 'email',
+              'carrera', 'semestre', 'fecha_registro', 'activo')
+    DEPENDENCIAS = {'nombre_completo': ('nombre', 'apellido')}
+    _FORMATOS = {
+        'nombre_completo': lambda e: f"{e.nombre} {e.apellido}",
+        'fecha_registro': lambda e: e.fecha_registro.isoformat(),
+    }
+
+    def to_dict(self, incluir_resumen=False, campos=None):
         """
         Método para convertir el objeto Estudiante a un diccionario.
         Esto es útil para serializar el objeto a JSON.
+        Con incluir_resumen=True agrega el resumen académico (promedio,
+        materias aprobadas, créditos y último periodo).
+        Con `campos` solo incluye esos campos y no lee las demás columnas,
+        así funciona con una consulta que usó load_only.
         """
-        return {
-            'id': self.id,
-            'matricula': self.matricula,
-            'nombre': self.nombre,
-            'apellido': self.apellido,
-            'nombre_completo': f"{self.nombre} {self.apellido}",
-            'email': self.email,
-            'carrera': self.carrera,
-            'semestre': self.semestre,
-            'fecha_registro': self.fecha_registro.isoformat(),
-            'activo': self.activo
+        datos = {
+            campo: self._FORMATOS[campo](self) if campo in self._FORMATOS else getattr(self, campo)
+            for campo in (self.CAMPOS if campos is None else campos)
         }
+        if incluir_resumen:
+            datos['resumen'] = self.resumen.to_dict() if self.resumen else EstudianteResumen.vacio()
+        return datos
     
     def __repr__(self):
         """
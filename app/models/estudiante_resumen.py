@@ -0,0 +1,40 @@
+from app.extensions import db
+
+class EstudianteResumen(db.Model):
+    """
+    Resumen académico materializado de un estudiante. Se actualiza en la
+    misma transacción que inserta, modifica o borra sus calificaciones y se
+    puede recalcular con `flask escolar reconstruir-resumen`.
+    """
+    __tablename__ = 'estudiante_resumen'
+
+    estudiante_id = db.Column(db.Integer, db.ForeignKey('estudiantes.id'), primary_key=True)
+    suma_calificaciones = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_calificaciones = db.Column(db.Integer, nullable=False, default=0)
+    aprobadas = db.Column(db.Integer, nullable=False, default=0)
+    creditos_aprobados = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_periodo = db.Column(db.String(20))
+
+    @property
+    def promedio(self):
+        if not self.total_calificaciones:
+            return 0
+        return float(self.suma_calificaciones) / self.total_calificaciones
+
+    @staticmethod
+    def vacio():
+        """Resumen de un estudiante sin calificaciones."""
+        return {'promedio': 0, 'total_calificaciones': 0, 'materias_aprobadas': 0,
+                'creditos_aprobados': 0, 'ultimo_periodo': None}
+
+    def to_dict(self):
+        return {
+            'promedio': self.promedio,
+            'total_calificaciones': self.total_calificaciones,
+            'materias_aprobadas': self.aprobadas,
+            'creditos_aprobados': self.creditos_aprobados,
+            'ultimo_periodo': self.ultimo_periodo
+        }
+
+    def __repr__(self):
+        return f'<EstudianteResumen {self.estudiante_id} promedio={self.promedio:.2f}>'
@@ -0,0 +1,29 @@
+from app.extensions import db
+from datetime import datetime
+
+class ClaveIdempotencia(db.Model):
+    """
+    Respuesta guardada para un header Idempotency-Key.
+    Mientras la petición original se procesa el estado es 'en_proceso';
+    al terminar se guarda el código y el cuerpo para repetirlos. La clave es
+    única por usuario (identidad del JWT) y ruta; `fecha` es el momento de
+    la reserva y sirve para reclamar reservas abandonadas y purgar las viejas.
+    """
+    __tablename__ = 'claves_idempotencia'
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario = db.Column(db.String(80), nullable=False, server_default='')
+    clave = db.Column(db.String(255), nullable=False)
+    ruta = db.Column(db.String(200), nullable=False)
+    huella = db.Column(db.String(64), nullable=False)  # SHA-256 del cuerpo de la petición
+    estado = db.Column(db.String(20), nullable=False, default='en_proceso')
+    codigo_estado = db.Column(db.Integer)
+    respuesta = db.Column(db.Text)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('usuario', 'ruta', 'clave', name='uq_claves_idempotencia_usuario_ruta_clave'),
+    )
+
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.usuario} {self.ruta} {self.clave} - {self.estado}>'
@@ -0,0 +1,61 @@
+from app.extensions import db
+from datetime import datetime
+
+class InventarioSlot(db.Model):
+    """
+    Sub-contador de stock de un producto. Un producto "fragmentado" reparte
+    su stock en N slots para que las compras concurrentes actualicen filas
+    distintas en lugar de competir por la misma fila de productos.
+    """
+    __tablename__ = 'inventario_slots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    slot = db.Column(db.Integer, nullable=False)
+    stock = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('producto_id', 'slot', name='uq_inventario_slots_producto_slot'),
+    )
+
+    # Relaciones
+    producto = db.relationship('Producto', back_populates='slots')
+
+    def to_dict(self):
+        return {
+            'slot': self.slot,
+            'stock': self.stock
+        }
+
+    def __repr__(self):
+        return f'<InventarioSlot producto={self.producto_id} slot={self.slot} stock={self.stock}>'
+
+
+class ReservaInventario(db.Model):
+    """
+    Unidades apartadas (por ejemplo, en un carrito) con fecha de expiración.
+    Al expirar o liberarse, las unidades regresan al slot de donde salieron.
+    """
+    __tablename__ = 'reservas_inventario'
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    slot = db.Column(db.Integer)
+    cantidad = db.Column(db.Integer, nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='activa')  # activa, confirmada, liberada, expirada
+    expira = db.Column(db.DateTime, nullable=False)
+    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes.id'))
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'cantidad': self.cantidad,
+            'estado': self.estado,
+            'expira': self.expira.isoformat(),
+            'orden_id': self.orden_id
+        }
+
+    def __repr__(self):
+        return f'<ReservaInventario {self.id} producto={self.producto_id} - {self.estado}>'
@@ -12,14 +12,11 @@ class Materia(db.Model):
     #Relación: una materia tiene muchas calificaciones
     calificaciones = db.relationship('Calificacion', back_populates='materia')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'clave': self.clave,
-            'nombre': self.nombre,
-            'creditos': self.creditos,
-            'docente': self.docente
-        }
+    # Campos de to_dict() (los válidos en ?fields=)
+    CAMPOS = ('id', 'clave', 'nombre', 'creditos', 'docente')
+
+    def to_dict(self, campos=None):
+        return {campo: getattr(self, campo) for campo in (self.CAMPOS if campos is None else campos)}
     
     def __repr__(self):
         return f"<Materia {self.nombre} ({self.clave})>"
\ No newline at end of file
@@ -8,7 +8,7 @@ class Orden(db.Model):
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'))
     total = db.Column(db.Numeric(10, 2), nullable=False)
     estado = db.Column(db.String(20), default='pendiente')
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relaciones
     cliente = db.relationship('Cliente', back_populates='ordenes')
@@ -0,0 +1,34 @@
+from app.extensions import db
+from datetime import datetime
+import json
+
+class OrdenPendiente(db.Model):
+    """
+    Cola (outbox) de órdenes recibidas en modo asíncrono.
+    Estados: encolada → procesando → completada | fallida
+    """
+    __tablename__ = 'ordenes_pendientes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON original de la orden
+    estado = db.Column(db.String(20), nullable=False, default='encolada', index=True)
+    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes.id'))
+    errores = db.Column(db.Text)  # JSON con la lista de errores si falló
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    trabajador = db.Column(db.String(32))  # Token del worker que la reclamó
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'estado': self.estado,
+            'orden_id': self.orden_id,
+            'errores': json.loads(self.errores) if self.errores else [],
+            'intentos': self.intentos,
+            'fecha_creacion': self.fecha_creacion.isoformat(),
+            'fecha_actualizacion': self.fecha_actualizacion.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<OrdenPendiente {self.id} - {self.estado}>'
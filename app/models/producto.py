@@ -10,25 +10,40 @@ class Producto(db.Model):
     description = db.Column(db.Text)
     precio = db.Column(db.Numeric(10, 2), nullable=False)
     stock = db.Column(db.Integer, default=0)
-    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'))
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), index=True)
     activo = db.Column(db.Boolean, default=True)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relaciones
     categoria = db.relationship('Categoria', back_populates='productos')
     detalles = db.relationship('DetalleOrden', back_populates='producto')
+    # Perezosa: quien necesita los slots los pide con selectinload (ver
+    # cargar_productos, las rutas de inventario y campos.opciones_carga)
+    slots = db.relationship('InventarioSlot', back_populates='producto', lazy='select',
+                            order_by='InventarioSlot.slot', cascade='all, delete-orphan')
 
-    def to_dict(self):
+    @property
+    def stock_total(self):
+        """Stock conciliado: lo que queda en la fila más lo repartido en slots."""
+        return (self.stock or 0) + sum(s.stock for s in self.slots)
+
+    # Campos de to_dict(); los que no salen tal cual de una columna tienen su
+    # formato en _FORMATOS y declaran en DEPENDENCIAS los atributos que leen
+    CAMPOS = ('id', 'sku', 'nombre', 'description', 'precio', 'stock',
+              'slots_inventario', 'categoria_id', 'activo', 'fecha_creacion')
+    DEPENDENCIAS = {'stock': ('stock', 'slots'), 'slots_inventario': ('slots',)}
+    _FORMATOS = {
+        'precio': lambda p: float(p.precio),
+        'stock': lambda p: p.stock_total,
+        'slots_inventario': lambda p: len(p.slots),
+        'fecha_creacion': lambda p: p.fecha_creacion.isoformat(),
+    }
+
+    def to_dict(self, campos=None):
+        """Con `campos` solo serializa esos (y solo lee los atributos que necesitan)."""
         return {
-            'id': self.id,
-            'sku': self.sku,
-            'nombre': self.nombre,
-            'description': self.description,
-            'precio': float(self.precio),
-            'stock': self.stock,
-            'categoria_id': self.categoria_id,
-            'activo': self.activo,
-            'fecha_creacion': self.fecha_creacion.isoformat()
+            campo: self._FORMATOS[campo](self) if campo in self._FORMATOS else getattr(self, campo)
+            for campo in (self.CAMPOS if campos is None else campos)
         }
 
     def __repr__(self):
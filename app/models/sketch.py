@@ -0,0 +1,18 @@
+from app.extensions import db
+from datetime import datetime
+
+class CheckpointSketch(db.Model):
+    """
+    Última copia guardada del sketch de productos más vendidos de un periodo
+    ('AAAA-MM'). Un worker nuevo la carga al arrancar en lugar de recorrer
+    los detalles de orden.
+    """
+    __tablename__ = 'sketch_checkpoints'
+
+    periodo = db.Column(db.String(7), primary_key=True)
+    datos = db.Column(db.Text, nullable=False)  # JSON de SpaceSaving.a_dict()
+    total = db.Column(db.Integer, nullable=False, default=0)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CheckpointSketch {self.periodo} total={self.total}>'
@@ -0,0 +1,43 @@
+from app.extensions import db
+
+class VentaDiaria(db.Model):
+    """
+    Resumen de ventas por día (rollup). Se actualiza en la misma transacción
+    que crea las órdenes y se puede reconstruir con `flask reportes reconstruir`.
+    """
+    __tablename__ = 'ventas_diarias'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    total_ordenes = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'fecha': self.fecha.isoformat(),
+            'total_ordenes': self.total_ordenes,
+            'ingresos': float(self.ingresos)
+        }
+
+    def __repr__(self):
+        return f'<VentaDiaria {self.fecha} ordenes={self.total_ordenes}>'
+
+
+class VentaDiariaProducto(db.Model):
+    """Unidades e ingresos por producto y por día (rollup)."""
+    __tablename__ = 'ventas_diarias_productos'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), primary_key=True)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'fecha': self.fecha.isoformat(),
+            'producto_id': self.producto_id,
+            'unidades': self.unidades,
+            'revenue': float(self.revenue)
+        }
+
+    def __repr__(self):
+        return f'<VentaDiariaProducto {self.fecha} producto={self.producto_id}>'
@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app.extensions import db
 from app.models.usuario import Usuario
+from app.services.escritura import guardar
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+_YA_EXISTE = 'El nombre de usuario o correo electrónico ya existe'
+CONFLICTOS = {'username': _YA_EXISTE, 'email': _YA_EXISTE}
+
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -55,14 +58,12 @@ def register():
     if not username or not email or not password:
         return jsonify({'message': 'Faltan campos requeridos'}), 400
 
-    if Usuario.query.filter_by(username=username).first() or Usuario.query.filter_by(email=email).first():
-        return jsonify({'message': 'El nombre de usuario o correo electrónico ya existe'}), 400
-
     new_user = Usuario(username=username, email=email)
     new_user.set_password(password)
 
-    db.session.add(new_user)
-    db.session.commit()
+    conflicto = guardar(new_user, CONFLICTOS, codigo=400, clave='message')
+    if conflicto:
+        return conflicto
 
     return jsonify({'message': 'Usuario registrado exitosamente'}), 201
 
@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.extensions import db
 from app.models.calificacion import Calificacion
 from app.models.estudiante import Estudiante
-from sqlalchemy import func
+from app.models.materia import Materia
+from app.services.calificaciones import (
+    convertir_calificacion, insertar_calificaciones, leer_csv, validar_calificaciones
+)
+from app.services.estadisticas import estadisticas_por_materia
+from app.services.kardex import armar_kardex, consulta_kardex, filtro_por_ids
 
 cal_bp = Blueprint('calificaciones', __name__, url_prefix='/cal')
 
@@ -11,6 +18,9 @@ cal_bp = Blueprint('calificaciones', __name__, url_prefix='/cal')
 def obtener_kardex(estudiante_id):
     """
     Obtener el kardex completo de un estudiante
+    Se arma con una sola consulta: calificaciones, datos de cada materia y
+    los agregados (promedio, promedio ponderado por créditos y materias
+    aprobadas) calculados por la base de datos.
     ---
     tags:
       - Calificaciones
@@ -41,6 +51,15 @@ def obtener_kardex(estudiante_id):
                   materia_id:
                     type: integer
                     example: 1
+                  clave:
+                    type: string
+                    example: "MAT101"
+                  materia:
+                    type: string
+                    example: "Cálculo Diferencial"
+                  creditos:
+                    type: integer
+                    example: 5
                   calificacion:
                     type: number
                     example: 85.50
@@ -53,42 +72,110 @@ def obtener_kardex(estudiante_id):
             promedio:
               type: number
               example: 85.50
+            promedio_ponderado:
+              type: number
+              example: 84.75
+              description: Promedio ponderado por los créditos de cada materia
             materias_aprobadas:
               type: integer
               example: 3
       404:
         description: Estudiante no encontrado o sin calificaciones
     """
-    estudiante = Estudiante.query.get(estudiante_id)
-    if not estudiante:
-        return jsonify({'error': 'Estudiante no encontrado'}), 404
+    filas = db.session.execute(consulta_kardex(Estudiante.id == estudiante_id))
+    kardex = next(armar_kardex(filas), None)
 
-    calificaciones = Calificacion.query.filter_by(estudiante_id=estudiante_id).all()
+    if kardex is None:
+        return jsonify({'error': 'Estudiante no encontrado'}), 404
 
-    if not calificaciones:
+    if not kardex['kardex']:
         return jsonify({'error': 'No se encontraron calificaciones para este estudiante'}), 404
 
-    valores = [float(cal.calificacion) for cal in calificaciones]
-    promedio = sum(valores) / len(valores) if valores else 0
-    materias_aprobadas = sum(1 for cal in calificaciones if float(cal.calificacion) >= 60)
+    return jsonify(kardex)
 
-    kardex = []
-    for cal in calificaciones:
-        materia_info = {
-            'materia_id': cal.materia_id,
-            'calificacion': float(cal.calificacion),
-            'periodo': cal.periodo,
-            'fecha_evaluacion': cal.fecha_evaluacion.isoformat()
-        }
-        kardex.append(materia_info)
 
-    return jsonify({
-        'estudiante_id': estudiante_id,
-        'nombre_estudiante': estudiante.nombre,
-        'kardex': kardex,
-        'promedio': promedio,
-        'materias_aprobadas': materias_aprobadas
-    })
+KARDEX_LOTE_MAX_IDS = 50000
+KARDEX_LOTE_FILAS = 5000  # Filas que se leen a la vez (yield_per)
+
+
+def _kardex_ndjson(filtros, ids_pedidos=None):
+    """Genera un kardex JSON por línea con una sola consulta; las filas se leen con yield_per."""
+    filas = db.session.execute(
+        consulta_kardex(*filtros).execution_options(yield_per=KARDEX_LOTE_FILAS)
+    )
+    for kardex in armar_kardex(filas):
+        if ids_pedidos is not None:
+            ids_pedidos.discard(kardex['estudiante_id'])
+        yield json.dumps(kardex, ensure_ascii=False) + '\n'
+    for faltante in sorted(ids_pedidos or ()):
+        yield json.dumps({'estudiante_id': faltante, 'error': 'Estudiante no encontrado'},
+                         ensure_ascii=False) + '\n'
+
+
+@cal_bp.route('/kardex/batch', methods=['POST'])
+def obtener_kardex_lote():
+    """
+    Obtener el kardex de muchos estudiantes en una sola petición
+    La respuesta es NDJSON (un kardex por línea) y se envía mientras se lee,
+    así la memoria no crece con el tamaño del grupo. Siempre es una sola
+    consulta, con lista de ids o con filtro; los parámetros se validan antes
+    de empezar a transmitir.
+    ---
+    tags:
+      - Calificaciones
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            estudiante_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+            carrera:
+              type: string
+              example: "ITIC"
+              description: Alternativa a estudiante_ids (solo estudiantes activos)
+            semestre:
+              type: integer
+              example: 5
+    responses:
+      200:
+        description: Un objeto kardex por línea (application/x-ndjson); los ids inexistentes traen "error"
+      400:
+        description: Datos inválidos o faltantes
+    """
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({'error': 'No se proporcionaron datos.'}), 400
+
+    ids = data.get('estudiante_ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or \
+                not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'estudiante_ids debe ser una lista de enteros.'}), 400
+        if len(ids) > KARDEX_LOTE_MAX_IDS:
+            return jsonify({'error': f'Se permiten máximo {KARDEX_LOTE_MAX_IDS} estudiantes por petición.'}), 400
+        ids = sorted(set(ids))
+        generador = _kardex_ndjson([filtro_por_ids(ids)], set(ids))
+    elif 'carrera' in data:
+        semestre = data.get('semestre')
+        if not isinstance(data['carrera'], str):
+            return jsonify({'error': 'carrera debe ser texto.'}), 400
+        if semestre is not None and (isinstance(semestre, bool) or not isinstance(semestre, int)):
+            return jsonify({'error': 'semestre debe ser un entero.'}), 400
+        filtro = [Estudiante.carrera == data['carrera'], Estudiante.activo.is_(True)]
+        if semestre is not None:
+            filtro.append(Estudiante.semestre == semestre)
+        generador = _kardex_ndjson(filtro)
+    else:
+        return jsonify({'error': 'Se requiere estudiante_ids o carrera.'}), 400
+
+    return Response(stream_with_context(generador), mimetype='application/x-ndjson')
 
 
 @cal_bp.route('/', methods=['POST'])
@@ -132,7 +219,7 @@ def registrar_calificacion():
       400:
         description: Datos inválidos o faltantes
       404:
-        description: Estudiante no encontrado
+        description: Estudiante o materia no encontrados
     """
     data = request.get_json()
 
@@ -144,14 +231,21 @@ def registrar_calificacion():
         if field not in data:
             return jsonify({'error': f'El campo {field} es obligatorio.'}), 400
 
+    calificacion, error = convertir_calificacion(data['calificacion'])
+    if error:
+        return jsonify({'error': error}), 400
+
     estudiante = Estudiante.query.get(data['estudiante_id'])
     if not estudiante:
         return jsonify({'error': 'Estudiante no encontrado.'}), 404
 
+    if not db.session.get(Materia, data['materia_id']):
+        return jsonify({'error': 'Materia no encontrada.'}), 404
+
     nueva_calificacion = Calificacion(
         estudiante_id=data['estudiante_id'],
         materia_id=data['materia_id'],
-        calificacion=data['calificacion'],
+        calificacion=calificacion,
         periodo=data['periodo'],
         fecha_evaluacion=data.get('fecha_evaluacion')
     )
@@ -159,4 +253,213 @@ def registrar_calificacion():
     db.session.add(nueva_calificacion)
     db.session.commit()
 
-    return jsonify(nueva_calificacion.to_dict()), 201
\ No newline at end of file
+    return jsonify(nueva_calificacion.to_dict()), 201
+
+
+def _materia_con_estadisticas(materia, periodos):
+    return {
+        'materia_id': materia.id,
+        'clave': materia.clave,
+        'nombre': materia.nombre,
+        'periodos': [{k: v for k, v in p.items() if k != 'materia_id'} for p in periodos]
+    }
+
+
+@cal_bp.route('/materias/<int:materia_id>/estadisticas', methods=['GET'])
+def estadisticas_materia(materia_id):
+    """
+    Estadísticas de calificaciones de una materia por periodo
+    Promedio, mediana, desviación estándar, percentiles, tasa de aprobación
+    (calificación >= 60) e histograma en rangos de 10 puntos. Las
+    calificaciones se leen en una sola consulta columnar y se procesan con NumPy.
+    ---
+    tags:
+      - Calificaciones
+    parameters:
+      - in: path
+        name: materia_id
+        type: integer
+        required: true
+        example: 1
+      - in: query
+        name: periodo
+        type: string
+        example: "2024-1"
+        description: Opcional, limita el cálculo a un periodo
+    responses:
+      200:
+        description: Estadísticas por periodo (lista vacía si la materia no tiene calificaciones)
+        schema:
+          type: object
+          properties:
+            materia_id:
+              type: integer
+              example: 1
+            clave:
+              type: string
+              example: "MAT101"
+            nombre:
+              type: string
+              example: "Cálculo Diferencial"
+            periodos:
+              type: array
+              items:
+                type: object
+                properties:
+                  periodo:
+                    type: string
+                    example: "2024-1"
+                  total:
+                    type: integer
+                    example: 35
+                  promedio:
+                    type: number
+                    example: 78.4
+                  mediana:
+                    type: number
+                    example: 80.0
+                  desviacion_estandar:
+                    type: number
+                    example: 11.2
+                  percentiles:
+                    type: object
+                    example: {"p10": 62.0, "p25": 71.5, "p50": 80.0, "p75": 86.0, "p90": 93.0}
+                  tasa_aprobacion:
+                    type: number
+                    example: 0.9143
+                  histograma:
+                    type: array
+                    items:
+                      type: object
+                      example: {"desde": 80, "hasta": 90, "total": 12}
+      404:
+        description: Materia no encontrada
+    """
+    materia = db.session.get(Materia, materia_id)
+    if not materia:
+        return jsonify({'error': 'Materia no encontrada.'}), 404
+
+    filtros = [Calificacion.materia_id == materia_id]
+    if request.args.get('periodo'):
+        filtros.append(Calificacion.periodo == request.args['periodo'])
+    por_materia = estadisticas_por_materia(*filtros)
+
+    return jsonify(_materia_con_estadisticas(materia, por_materia.get(materia_id, [])))
+
+
+@cal_bp.route('/materias/estadisticas', methods=['GET'])
+def estadisticas_materias():
+    """
+    Estadísticas de calificaciones de todas las materias por periodo
+    Mismo cálculo que /cal/materias/{id}/estadisticas para todas las materias
+    con calificaciones, con una sola consulta de calificaciones y otra de materias.
+    ---
+    tags:
+      - Calificaciones
+    parameters:
+      - in: query
+        name: periodo
+        type: string
+        example: "2024-1"
+        description: Opcional, limita el cálculo a un periodo
+    responses:
+      200:
+        description: Lista de materias con sus estadísticas por periodo
+    """
+    filtros = []
+    if request.args.get('periodo'):
+        filtros.append(Calificacion.periodo == request.args['periodo'])
+    por_materia = estadisticas_por_materia(*filtros)
+
+    materias = Materia.query.filter(Materia.id.in_(por_materia)).order_by(Materia.id).all() if por_materia else []
+    return jsonify({
+        'materias': [_materia_con_estadisticas(m, por_materia[m.id]) for m in materias]
+    })
+
+
+MODOS_CARGA = ('mejor_esfuerzo', 'todo_o_nada')
+
+
+@cal_bp.route('/batch', methods=['POST'])
+def registrar_calificaciones_lote():
+    """
+    Registrar muchas calificaciones en una sola transacción
+    Acepta un arreglo JSON (o {"calificaciones": [...]}) o un CSV
+    (Content-Type text/csv) con encabezados
+    estudiante_id,materia_id,calificacion,periodo[,fecha_evaluacion].
+    Estudiantes y materias se validan con un IN (...) cada uno y se rechazan
+    las filas repetidas por (estudiante, materia, periodo), ya sea dentro del
+    archivo o contra lo registrado.
+    ---
+    tags:
+      - Calificaciones
+    parameters:
+      - in: query
+        name: modo
+        type: string
+        enum: [mejor_esfuerzo, todo_o_nada]
+        description: mejor_esfuerzo guarda las filas válidas; todo_o_nada no guarda nada si alguna falla
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              estudiante_id:
+                type: integer
+                example: 1
+              materia_id:
+                type: integer
+                example: 1
+              calificacion:
+                type: number
+                example: 85.50
+              periodo:
+                type: string
+                example: "2024-1"
+    responses:
+      201:
+        description: Filas insertadas y errores por fila ({"fila": n, "errores": [...]}, n desde 1)
+      400:
+        description: Cuerpo inválido, o alguna fila falló en modo todo_o_nada
+    """
+    inicio = time.perf_counter()
+    modo = request.args.get('modo', 'mejor_esfuerzo')
+    if modo not in MODOS_CARGA:
+        return jsonify({'error': f"Modo inválido. Opciones: {', '.join(MODOS_CARGA)}"}), 400
+
+    if request.mimetype == 'text/csv':
+        filas = leer_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        filas = data.get('calificaciones') if isinstance(data, dict) else data
+
+    if not isinstance(filas, list) or not filas:
+        return jsonify({'error': 'Se requiere una lista de calificaciones.'}), 400
+
+    validas, errores = validar_calificaciones(filas)
+
+    if errores and (modo == 'todo_o_nada' or not validas):
+        return jsonify({
+            'error': 'No se registró ninguna calificación.',
+            'modo': modo,
+            'insertadas': 0,
+            'fallidas': len(errores),
+            'errores': errores
+        }), 400
+
+    insertadas = insertar_calificaciones(validas)
+    db.session.commit()
+
+    duracion = time.perf_counter() - inicio
+    return jsonify({
+        'mensaje': 'Calificaciones registradas',
+        'modo': modo,
+        'insertadas': insertadas,
+        'fallidas': len(errores),
+        'duracion_ms': round(duracion * 1000, 2),
+        'filas_por_segundo': round(len(filas) / duracion, 2) if duracion else None,
+        'errores': errores
+    }), 201
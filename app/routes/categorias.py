@@ -1,18 +1,34 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.categoria import Categoria
+from app.services.cache_catalogos import cache_de_catalogo
+from app.services.campos import campos_solicitados, opciones_carga
+from app.services.escritura import guardar
+from app.services.listados import responder_listado
+
+CONFLICTOS = {'nombre': 'Ya existe una categoría con ese nombre'}
 
 categorias_bp = Blueprint('categorias', __name__, url_prefix='/categorias')
 
 @categorias_bp.route('/', methods=['GET'])
+@cache_de_catalogo('categorias')
 def get_categorias():
-    categorias = Categoria.query.all()
-    return jsonify([c.to_dict() for c in categorias]), 200
+    try:
+        campos = campos_solicitados(Categoria)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    categorias = Categoria.query.options(*opciones_carga(Categoria, campos)).order_by(Categoria.id)
+    return responder_listado(categorias, 'categorias', campos)
 
 @categorias_bp.route('/<int:id>', methods=['GET'])
+@cache_de_catalogo('categorias')
 def get_categoria(id):
-    categoria = Categoria.query.get_or_404(id)
-    return jsonify(categoria.to_dict()), 200
+    try:
+        campos = campos_solicitados(Categoria)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    categoria = Categoria.query.options(*opciones_carga(Categoria, campos)).get_or_404(id)
+    return jsonify(categoria.to_dict(campos)), 200
 
 @categorias_bp.route('/', methods=['POST'])
 def create_categoria():
@@ -24,16 +40,14 @@ def create_categoria():
     if 'nombre' not in data:
         return jsonify({'error': 'El campo nombre es requerido'}), 400
 
-    if Categoria.query.filter_by(nombre=data['nombre']).first():
-        return jsonify({'error': 'Ya existe una categoría con ese nombre'}), 409
-
     nueva_categoria = Categoria(
         nombre=data['nombre'],
         description=data.get('description')
     )
 
-    db.session.add(nueva_categoria)
-    db.session.commit()
+    conflicto = guardar(nueva_categoria, CONFLICTOS)
+    if conflicto:
+        return conflicto
 
     return jsonify(nueva_categoria.to_dict()), 201
 
@@ -46,15 +60,14 @@ def update_categoria(id):
         return jsonify({'error': 'No se proporcionaron datos'}), 400
 
     if 'nombre' in data:
-        existente = Categoria.query.filter_by(nombre=data['nombre']).first()
-        if existente and existente.id != id:
-            return jsonify({'error': 'Ya existe una categoría con ese nombre'}), 409
         categoria.nombre = data['nombre']
 
     if 'description' in data:
         categoria.description = data['description']
 
-    db.session.commit()
+    conflicto = guardar(conflictos=CONFLICTOS)
+    if conflicto:
+        return conflicto
     return jsonify(categoria.to_dict()), 200
 
 @categorias_bp.route('/<int:id>', methods=['DELETE'])
@@ -1,18 +1,31 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.cliente import Cliente
+from app.services.campos import campos_solicitados, opciones_carga
+from app.services.escritura import guardar
+from app.services.listados import responder_listado
+
+CONFLICTOS = {'email': 'Ya existe un cliente con ese email'}
 
 clientes_bp = Blueprint('clientes', __name__, url_prefix='/clientes')
 
 @clientes_bp.route('/', methods=['GET'])
 def get_clientes():
-    clientes = Cliente.query.all()
-    return jsonify([c.to_dict() for c in clientes]), 200
+    try:
+        campos = campos_solicitados(Cliente)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    clientes = Cliente.query.options(*opciones_carga(Cliente, campos)).order_by(Cliente.id)
+    return responder_listado(clientes, 'clientes', campos)
 
 @clientes_bp.route('/<int:id>', methods=['GET'])
 def get_cliente(id):
-    cliente = Cliente.query.get_or_404(id)
-    return jsonify(cliente.to_dict()), 200
+    try:
+        campos = campos_solicitados(Cliente)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    cliente = Cliente.query.options(*opciones_carga(Cliente, campos)).get_or_404(id)
+    return jsonify(cliente.to_dict(campos)), 200
 
 @clientes_bp.route('/', methods=['POST'])
 def create_cliente():
@@ -26,9 +39,6 @@ def create_cliente():
         if campo not in data:
             return jsonify({'error': f'El campo {campo} es requerido'}), 400
 
-    if Cliente.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'Ya existe un cliente con ese email'}), 409
-
     nuevo_cliente = Cliente(
         nombre=data['nombre'],
         email=data['email'],
@@ -36,8 +46,9 @@ def create_cliente():
         direccion=data.get('direccion')
     )
 
-    db.session.add(nuevo_cliente)
-    db.session.commit()
+    conflicto = guardar(nuevo_cliente, CONFLICTOS)
+    if conflicto:
+        return conflicto
 
     return jsonify(nuevo_cliente.to_dict()), 201
 
@@ -49,17 +60,13 @@ def update_cliente(id):
     if not data:
         return jsonify({'error': 'No se proporcionaron datos'}), 400
 
-    if 'email' in data:
-        existente = Cliente.query.filter_by(email=data['email']).first()
-        if existente and existente.id != id:
-            return jsonify({'error': 'Ya existe un cliente con ese email'}), 409
-        cliente.email = data['email']
-
-    for campo in ['nombre', 'telefono', 'direccion']:
+    for campo in ['nombre', 'email', 'telefono', 'direccion']:
         if campo in data:
             setattr(cliente, campo, data[campo])
 
-    db.session.commit()
+    conflicto = guardar(conflictos=CONFLICTOS)
+    if conflicto:
+        return conflicto
     return jsonify(cliente.to_dict()), 200
 
 @clientes_bp.route('/<int:id>', methods=['DELETE'])
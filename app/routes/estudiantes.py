@@ -1,9 +1,32 @@
-from flask import Blueprint, jsonify, request
+import base64
+import csv
+import io
+import json
+import time
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models.estudiante import Estudiante
+from app.services.busqueda import MIN_CARACTERES, buscar_estudiantes
+from app.services.campos import campos_solicitados, opciones_carga
+from app.services.conteos import MODOS_TOTAL, contar
+from app.services.escritura import guardar
+from app.services.estudiantes import MODOS_IMPORTACION, ImportacionEstudiantes, en_lotes
+from app.services.ranking import FUNCIONES_RANKING, consulta_ranking
 
 estudiantes_bp = Blueprint('estudiantes', __name__, url_prefix='/estudiantes')
 
+CONFLICTOS = {
+    'matricula': 'La matrícula ya existe.',
+    'email': 'El correo electrónico ya existe.'
+}
+
+
+def _incluir_resumen():
+    return request.args.get('resumen', '').lower() in ('1', 'true', 'si', 'sí')
+
+
 @estudiantes_bp.route('/', methods=['POST'])
 def crear_estudiante():
     """
@@ -59,11 +82,6 @@ def crear_estudiante():
         if field not in data:
             return jsonify({'error': f'El campo {field} es obligatorio.'}), 400
 
-    if Estudiante.query.filter_by(matricula=data['matricula']).first():
-        return jsonify({'error': 'La matrícula ya existe.'}), 400
-    if Estudiante.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'El correo electrónico ya existe.'}), 400
-
     nuevo_estudiante = Estudiante(
         matricula=data['matricula'],
         nombre=data['nombre'],
@@ -73,16 +91,127 @@ def crear_estudiante():
         semestre=data['semestre']
     )
 
-    db.session.add(nuevo_estudiante)
-    db.session.commit()
+    conflicto = guardar(nuevo_estudiante, CONFLICTOS, codigo=400)
+    if conflicto:
+        return conflicto
 
     return jsonify(nuevo_estudiante.to_dict()), 201
 
 
+ESTUDIANTES_CURSOR_MAX = 100
+
+
+def _codificar_cursor(*valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+def _decodificar_cursor(cursor):
+    valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(valores, list):
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+@estudiantes_bp.route('/bulk', methods=['POST'])
+def importar_estudiantes():
+    """
+    Importar muchos estudiantes en una sola petición
+    Acepta un arreglo JSON (o {"estudiantes": [...]}) o un CSV
+    (Content-Type text/csv) con encabezados
+    matricula,nombre,apellido,email,carrera,semestre. El CSV se lee mientras
+    llega. Las filas se procesan en lotes de ESTUDIANTES_LOTE_TAMANO: la
+    unicidad de matrícula y correo se revisa con un IN (...) por lote y las
+    válidas se escriben en un solo executemany. Las filas con error se
+    reportan y no detienen a las demás.
+    ---
+    tags:
+      - Estudiantes
+    parameters:
+      - in: query
+        name: modo
+        type: string
+        enum: [insertar, upsert]
+        default: insertar
+        description: upsert actualiza nombre, apellido, email, carrera y semestre si la matrícula ya existe
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              matricula:
+                type: string
+                example: "2023001"
+              nombre:
+                type: string
+                example: "Juan"
+              apellido:
+                type: string
+                example: "Pérez"
+              email:
+                type: string
+                example: "juan@gmail.com"
+              carrera:
+                type: string
+                example: "Ingeniería en Sistemas"
+              semestre:
+                type: integer
+                example: 1
+    responses:
+      201:
+        description: Totales y resultado por fila ({"fila": n, "estado": "insertado"|"actualizado"|"error", ...}, n desde 1)
+      400:
+        description: Cuerpo o modo inválido, o ninguna fila válida
+      409:
+        description: Conflicto de unicidad con una escritura concurrente; no se guardó nada
+    """
+    inicio = time.perf_counter()
+    modo = request.args.get('modo', 'insertar')
+    if modo not in MODOS_IMPORTACION:
+        return jsonify({'error': f"Modo inválido. Opciones: {', '.join(MODOS_IMPORTACION)}"}), 400
+
+    if request.mimetype == 'text/csv':
+        filas = csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline=''))
+    else:
+        data = request.get_json(silent=True)
+        filas = data.get('estudiantes') if isinstance(data, dict) else data
+        if not isinstance(filas, list):
+            return jsonify({'error': 'Se requiere una lista de estudiantes.'}), 400
+
+    importacion = ImportacionEstudiantes(modo)
+    try:
+        for lote in en_lotes(filas, current_app.config.get('ESTUDIANTES_LOTE_TAMANO', 1000)):
+            importacion.procesar(lote)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Conflicto de unicidad con otra escritura; no se guardó ningún estudiante.'}), 409
+
+    resumen = importacion.resumen()
+    if not importacion.insertados and not importacion.actualizados:
+        db.session.rollback()
+        return jsonify({'error': 'No se registró ningún estudiante.', **resumen}), 400
+
+    db.session.commit()
+    duracion = time.perf_counter() - inicio
+    total = len(resumen['resultados'])
+    return jsonify({
+        'mensaje': 'Estudiantes importados',
+        **resumen,
+        'duracion_ms': round(duracion * 1000, 2),
+        'filas_por_segundo': round(total / duracion, 2) if duracion else None
+    }), 201
+
+
 @estudiantes_bp.route('/', methods=['GET'])
 def obtener_estudiantes():
     """
     Obtener lista de estudiantes
+    Por defecto pagina con pagina/per_page (COUNT(*) + OFFSET). Con el
+    parámetro cursor (vacío para la primera página) usa paginación keyset
+    por id: cada página cuesta lo mismo sin importar qué tan lejos esté y
+    no se cuenta la tabla salvo que se pida ?total=.
     ---
     tags:
       - Estudiantes
@@ -103,21 +232,57 @@ def obtener_estudiantes():
         type: integer
         required: false
         default: 10
+        description: Estudiantes por página (máx. 100 en modo cursor)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Activa el modo cursor; vacío para la primera página, luego el "siguiente_cursor" recibido
+      - in: query
+        name: total
+        type: string
+        enum: [no, aproximado, exacto]
+        default: "no"
+        description: Solo en modo cursor; aproximado usa estadísticas del planificador o un conteo en caché
+      - in: query
+        name: resumen
+        type: boolean
+        required: false
+        default: false
+        description: Incluir el resumen académico de cada estudiante
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Campos a incluir separados por coma (solo esas columnas se leen)
+        example: "id,matricula,nombre_completo"
     responses:
       200:
         description: Lista de estudiantes obtenida exitosamente
+      400:
+        description: Cursor, parámetro total o campos inválidos
     """
     carrera = request.args.get('carrera')
     pagina = request.args.get('pagina', type=int, default=1)
     per_page = request.args.get('per_page', type=int, default=10)
+    incluir_resumen = _incluir_resumen()
+    try:
+        campos = campos_solicitados(Estudiante)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    estudiantes = Estudiante.query
+    estudiantes = Estudiante.query.options(*opciones_carga(Estudiante, campos))
+    if incluir_resumen:
+        estudiantes = estudiantes.options(joinedload(Estudiante.resumen))
     if carrera:
         estudiantes = estudiantes.filter_by(carrera=carrera)
 
+    if 'cursor' in request.args:
+        return _estudiantes_por_cursor(estudiantes, carrera, per_page, incluir_resumen, campos)
+
     estudiantes = estudiantes.paginate(page=pagina, per_page=per_page, error_out=False)
 
-    estudiantes_list = [estudiante.to_dict() for estudiante in estudiantes.items]
+    estudiantes_list = [estudiante.to_dict(incluir_resumen, campos) for estudiante in estudiantes.items]
     return jsonify({
         'estudiantes': estudiantes_list,
         'pagina': pagina,
@@ -126,6 +291,191 @@ def obtener_estudiantes():
     }), 200
 
 
+def _estudiantes_por_cursor(consulta, carrera, per_page, incluir_resumen, campos=None):
+    """
+    Página keyset: WHERE id > :ultimo ORDER BY id LIMIT per_page + 1.
+    Con carrera, la búsqueda recorre el índice (carrera, id). El cursor
+    guarda la carrera para rechazarlo si se usa con otro filtro.
+    """
+    limite = max(1, min(per_page, ESTUDIANTES_CURSOR_MAX))
+    modo_total = request.args.get('total', 'no')
+    if modo_total not in MODOS_TOTAL:
+        return jsonify({'error': f"total inválido. Opciones: {', '.join(MODOS_TOTAL)}"}), 400
+
+    if request.args['cursor']:
+        try:
+            carrera_cursor, ultimo_id = _decodificar_cursor(request.args['cursor'])
+            ultimo_id = int(ultimo_id)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Cursor inválido.'}), 400
+        if carrera_cursor != (carrera or None):
+            return jsonify({'error': 'El cursor no corresponde al filtro de carrera.'}), 400
+        consulta = consulta.filter(Estudiante.id > ultimo_id)
+
+    estudiantes = consulta.order_by(Estudiante.id).limit(limite + 1).all()
+    hay_mas = len(estudiantes) > limite
+    estudiantes = estudiantes[:limite]
+
+    respuesta = {
+        'estudiantes': [estudiante.to_dict(incluir_resumen, campos) for estudiante in estudiantes],
+        'siguiente_cursor': _codificar_cursor(carrera or None, estudiantes[-1].id) if hay_mas else None
+    }
+    if modo_total != 'no':
+        filtros = [Estudiante.carrera == carrera] if carrera else []
+        respuesta['total_estudiantes'], respuesta['total_aproximado'] = contar(Estudiante, *filtros, modo=modo_total)
+    return jsonify(respuesta), 200
+
+
+BUSQUEDA_MAX_LIMITE = 100
+
+
+@estudiantes_bp.route('/buscar', methods=['GET'])
+def buscar():
+    """
+    Buscar estudiantes por nombre, apellido, matrícula o correo
+    Coincidencia parcial (prefijo de cada palabra en SQLite, subcadena en
+    PostgreSQL) sin distinguir acentos ni mayúsculas: "ramirez" encuentra
+    "Ramírez". Usa un índice FTS5 (SQLite) o de trigramas (PostgreSQL) y
+    regresa los resultados del más al menos relevante.
+    ---
+    tags:
+      - Estudiantes
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        example: "carlos rami"
+      - in: query
+        name: limite
+        type: integer
+        required: false
+        default: 20
+        description: Máximo de resultados (máx. 100)
+    responses:
+      200:
+        description: Estudiantes encontrados, cada uno con su "puntuacion"
+      400:
+        description: Consulta vacía o demasiado corta
+    """
+    consulta = request.args.get('q', '').strip()
+    if len(consulta) < MIN_CARACTERES:
+        return jsonify({'error': f'La búsqueda debe tener al menos {MIN_CARACTERES} caracteres.'}), 400
+    limite = max(1, min(request.args.get('limite', 20, type=int), BUSQUEDA_MAX_LIMITE))
+
+    resultados = buscar_estudiantes(consulta, limite)
+    return jsonify({
+        'estudiantes': [
+            {**estudiante.to_dict(), 'puntuacion': round(float(puntuacion), 4)}
+            for estudiante, puntuacion in resultados
+        ]
+    }), 200
+
+
+RANKING_MAX_TOP = 1000
+RANKING_MAX_LIMITE = 500
+
+
+@estudiantes_bp.route('/ranking', methods=['GET'])
+def ranking_estudiantes():
+    """
+    Ranking de estudiantes por promedio dentro de cada carrera y semestre
+    Una sola consulta con RANK()/DENSE_RANK() sobre el resumen académico.
+    Solo estudiantes activos con al menos una calificación.
+    ---
+    tags:
+      - Estudiantes
+    parameters:
+      - in: query
+        name: carrera
+        type: string
+        required: false
+        example: "Ingeniería en Sistemas"
+      - in: query
+        name: semestre
+        type: integer
+        required: false
+        example: 5
+      - in: query
+        name: top
+        type: integer
+        required: false
+        default: 10
+        description: Posiciones por carrera y semestre (con empates pueden ser más estudiantes)
+      - in: query
+        name: tipo
+        type: string
+        enum: [rank, dense_rank]
+        default: rank
+      - in: query
+        name: limite
+        type: integer
+        required: false
+        default: 50
+        description: Filas por página (máx. 500)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: El "siguiente_cursor" de la página anterior
+    responses:
+      200:
+        description: Página del ranking ordenada por carrera, semestre y posición
+      400:
+        description: Parámetros o cursor inválidos
+    """
+    top = request.args.get('top', 10, type=int)
+    limite = request.args.get('limite', 50, type=int)
+    tipo = request.args.get('tipo', 'rank')
+    if tipo not in FUNCIONES_RANKING:
+        return jsonify({'error': f"Tipo inválido. Opciones: {', '.join(FUNCIONES_RANKING)}"}), 400
+    if not 1 <= top <= RANKING_MAX_TOP or not 1 <= limite <= RANKING_MAX_LIMITE:
+        return jsonify({'error': f'top debe estar entre 1 y {RANKING_MAX_TOP} y limite entre 1 y {RANKING_MAX_LIMITE}.'}), 400
+
+    filtros = []
+    if request.args.get('carrera'):
+        filtros.append(Estudiante.carrera == request.args['carrera'])
+    if request.args.get('semestre') is not None:
+        semestre = request.args.get('semestre', type=int)
+        if semestre is None:
+            return jsonify({'error': 'semestre debe ser un entero.'}), 400
+        filtros.append(Estudiante.semestre == semestre)
+
+    despues_de = None
+    if request.args.get('cursor'):
+        try:
+            carrera_c, semestre_c, posicion_c, id_c = _decodificar_cursor(request.args['cursor'])
+            despues_de = (str(carrera_c), int(semestre_c), int(posicion_c), int(id_c))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Cursor inválido.'}), 400
+
+    filas = db.session.execute(
+        consulta_ranking(*filtros, top=top, tipo=tipo, despues_de=despues_de, limite=limite)
+    ).all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    return jsonify({
+        'ranking': [
+            {
+                'posicion': f.posicion,
+                'estudiante_id': f.estudiante_id,
+                'matricula': f.matricula,
+                'nombre_completo': f"{f.nombre} {f.apellido}",
+                'carrera': f.carrera,
+                'semestre': f.semestre,
+                'promedio': round(f.promedio, 2),
+                'materias_aprobadas': f.aprobadas,
+                'creditos_aprobados': f.creditos_aprobados
+            }
+            for f in filas
+        ],
+        'siguiente_cursor': _codificar_cursor(
+            filas[-1].carrera, filas[-1].semestre, filas[-1].posicion, filas[-1].estudiante_id
+        ) if hay_mas else None
+    }), 200
+
+
 @estudiantes_bp.route('/<int:id>', methods=['GET'])
 def obtener_estudiante(id):
     """
@@ -140,14 +490,36 @@ def obtener_estudiante(id):
         required: true
         description: ID del estudiante
         example: 1
+      - in: query
+        name: resumen
+        type: boolean
+        required: false
+        default: false
+        description: Incluir el resumen académico (promedio, aprobadas, créditos)
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Campos a incluir separados por coma
+        example: "matricula,nombre_completo,email"
     responses:
       200:
         description: Estudiante encontrado
+      400:
+        description: Campo desconocido en fields
       404:
         description: Estudiante no encontrado
     """
-    estudiante = Estudiante.query.get_or_404(id, description='Estudiante no encontrado.')
-    return jsonify(estudiante.to_dict()), 200
+    incluir_resumen = _incluir_resumen()
+    try:
+        campos = campos_solicitados(Estudiante)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    consulta = Estudiante.query.options(*opciones_carga(Estudiante, campos))
+    if incluir_resumen:
+        consulta = consulta.options(joinedload(Estudiante.resumen))
+    estudiante = consulta.filter_by(id=id).first_or_404(description='Estudiante no encontrado.')
+    return jsonify(estudiante.to_dict(incluir_resumen, campos)), 200
 
 
 @estudiantes_bp.route('/<int:id>', methods=['PUT'])
@@ -188,6 +560,8 @@ def actualizar_estudiante(id):
     responses:
       200:
         description: Estudiante actualizado exitosamente
+      400:
+        description: La matrícula o el correo ya pertenecen a otro estudiante
       404:
         description: Estudiante no encontrado
     """
@@ -201,7 +575,9 @@ def actualizar_estudiante(id):
         if key in data:
             setattr(estudiante, key, data[key])
 
-    db.session.commit()
+    conflicto = guardar(conflictos=CONFLICTOS, codigo=400)
+    if conflicto:
+        return conflicto
     return jsonify(estudiante.to_dict()), 200
 
 
@@ -0,0 +1,103 @@
+# app/routes/inventario.py
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models.inventario import ReservaInventario
+from app.models.producto import Producto
+from app.services import inventario
+from app.services.inventario import StockInsuficienteError
+
+inventario_bp = Blueprint('inventario', __name__, url_prefix='/api/inventario')
+
+TTL_RESERVA_DEFAULT = 900  # 15 minutos
+
+
+def _entero_positivo(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool) and valor > 0
+
+
+@inventario_bp.route("/productos/<int:id>/slots", methods=["PUT"])
+@jwt_required()
+def fragmentar_producto(id):
+    """
+    Reparte el stock de un producto en N slots.
+    Body esperado: {"slots": 8}   (1 o menos consolida el stock de nuevo;
+    el máximo es INVENTARIO_MAX_SLOTS)
+    """
+    producto = Producto.query.options(selectinload(Producto.slots)).get_or_404(id)
+    datos = request.get_json()
+
+    if not datos or not isinstance(datos.get("slots"), int) or isinstance(datos["slots"], bool):
+        return jsonify({"error": "El campo slots (entero) es requerido"}), 400
+    maximo = current_app.config.get("INVENTARIO_MAX_SLOTS", 64)
+    if datos["slots"] > maximo:
+        return jsonify({"error": f"slots no puede ser mayor a {maximo}"}), 400
+
+    inventario.fragmentar(producto, datos["slots"])
+    db.session.commit()
+
+    return jsonify({
+        "producto_id": producto.id,
+        "stock": producto.stock_total,
+        "slots": [s.to_dict() for s in producto.slots]
+    }), 200
+
+
+@inventario_bp.route("/reservas", methods=["POST"])
+@jwt_required()
+def crear_reserva():
+    """
+    Aparta unidades de un producto fragmentado (por ejemplo, un carrito).
+    Body esperado: {"producto_id": 5, "cantidad": 2, "ttl_segundos": 900}
+    La reserva se usa en la orden con {"producto_id": 5, "cantidad": 2, "reserva_id": <id>}.
+    """
+    datos = request.get_json()
+
+    if not datos or "producto_id" not in datos or "cantidad" not in datos:
+        return jsonify({"error": "Los campos producto_id y cantidad son requeridos"}), 400
+    if isinstance(datos["producto_id"], bool) or not isinstance(datos["producto_id"], int):
+        return jsonify({"error": "producto_id debe ser un entero"}), 400
+    if not _entero_positivo(datos["cantidad"]):
+        return jsonify({"error": "La cantidad debe ser un entero mayor a cero"}), 400
+    if not _entero_positivo(datos.get("ttl_segundos", TTL_RESERVA_DEFAULT)):
+        return jsonify({"error": "ttl_segundos debe ser un entero mayor a cero"}), 400
+
+    producto = db.session.get(Producto, datos["producto_id"], options=[selectinload(Producto.slots)])
+    if not producto:
+        return jsonify({"error": "Producto no encontrado"}), 404
+    if not producto.slots:
+        return jsonify({"error": "El producto no está fragmentado en slots"}), 400
+
+    try:
+        reserva = inventario.reservar(
+            producto, datos["cantidad"], datos.get("ttl_segundos", TTL_RESERVA_DEFAULT)
+        )
+        db.session.commit()
+    except StockInsuficienteError:
+        db.session.rollback()
+        return jsonify({"error": f"Stock insuficiente para {producto.nombre}"}), 409
+
+    return jsonify(reserva.to_dict()), 201
+
+
+@inventario_bp.route("/reservas/<int:id>", methods=["DELETE"])
+@jwt_required()
+def liberar_reserva(id):
+    """Cancela una reserva activa y regresa sus unidades al inventario."""
+    reserva = ReservaInventario.query.get_or_404(id)
+
+    if not inventario.liberar(reserva):
+        return jsonify({"error": f"La reserva ya no está activa ({reserva.estado})"}), 409
+
+    db.session.commit()
+    return jsonify({"message": f"Reserva {id} liberada correctamente"}), 200
+
+
+@inventario_bp.route("/reservas/expiradas", methods=["POST"])
+@jwt_required()
+def liberar_reservas_expiradas():
+    """Regresa al inventario las unidades de todas las reservas vencidas."""
+    liberadas = inventario.liberar_expiradas()
+    db.session.commit()
+    return jsonify({"liberadas": liberadas}), 200
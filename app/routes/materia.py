@@ -1,25 +1,65 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.materia import Materia
+from app.services.cache_catalogos import cache_de_catalogo
+from app.services.campos import campos_solicitados, opciones_carga
+from app.services.escritura import guardar
+from app.services.listados import responder_listado
 
 materia_bp = Blueprint('materias', __name__, url_prefix='/materias')
 
+CONFLICTOS = {'clave': 'Ya existe una materia con esa clave'}
+
 @materia_bp.route('/', methods=['GET'])
+@cache_de_catalogo('materias')
 def get_materias():
     """
     Obtener todas las materias
     ---
     tags:
       - Materias
+    parameters:
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Campos a incluir separados por coma (solo esas columnas se leen)
+        example: "id,clave,nombre"
+      - in: query
+        name: pagina
+        type: integer
+        required: false
+        description: Activa la paginación ({materias, pagina, total_paginas, total_materias})
+      - in: query
+        name: per_page
+        type: integer
+        required: false
+        default: 20
+        description: Materias por página (máx. 100)
+      - in: query
+        name: stream
+        type: boolean
+        required: false
+        default: false
+        description: Transmite el arreglo completo mientras se lee, con memoria constante
     responses:
       200:
-        description: Lista de materias obtenida exitosamente
+        description: Lista de materias obtenida exitosamente (con ETag; X-Cache HIT/MISS)
+      304:
+        description: If-None-Match coincide con el ETag vigente
+      400:
+        description: Campo desconocido en fields
     """
-    materias = Materia.query.all()
-    return jsonify([m.to_dict() for m in materias]), 200
+    try:
+        campos = campos_solicitados(Materia)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    materias = Materia.query.options(*opciones_carga(Materia, campos)).order_by(Materia.id)
+    return responder_listado(materias, 'materias', campos)
 
 
 @materia_bp.route('/<int:id>', methods=['GET'])
+@cache_de_catalogo('materias')
 def get_materia(id):
     """
     Obtener una materia por ID
@@ -33,14 +73,28 @@ def get_materia(id):
         required: true
         description: ID de la materia
         example: 1
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Campos a incluir separados por coma
+        example: "clave,nombre"
     responses:
       200:
         description: Materia encontrada
+      304:
+        description: If-None-Match coincide con el ETag vigente
+      400:
+        description: Campo desconocido en fields
       404:
         description: Materia no encontrada
     """
-    materia = Materia.query.get_or_404(id)
-    return jsonify(materia.to_dict()), 200
+    try:
+        campos = campos_solicitados(Materia)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    materia = Materia.query.options(*opciones_carga(Materia, campos)).get_or_404(id)
+    return jsonify(materia.to_dict(campos)), 200
 
 
 @materia_bp.route('/', methods=['POST'])
@@ -89,9 +143,6 @@ def create_materia():
         if campo not in data:
             return jsonify({'error': f'El campo "{campo}" es requerido'}), 400
 
-    if Materia.query.filter_by(clave=data['clave']).first():
-        return jsonify({'error': 'Ya existe una materia con esa clave'}), 409
-
     nueva_materia = Materia(
         clave=data['clave'],
         nombre=data['nombre'],
@@ -99,8 +150,9 @@ def create_materia():
         docente=data['docente']
     )
 
-    db.session.add(nueva_materia)
-    db.session.commit()
+    conflicto = guardar(nueva_materia, CONFLICTOS)
+    if conflicto:
+        return conflicto
 
     return jsonify(nueva_materia.to_dict()), 201
 
@@ -149,11 +201,7 @@ def update_materia(id):
     data = request.get_json()
 
     if 'clave' in data:
-        existente = Materia.query.filter_by(clave=data['clave']).first()
-        if existente and existente.id != id:
-            return jsonify({'error': 'Ya existe una materia con esa clave'}), 409
         materia.clave = data['clave']
-
     if 'nombre' in data:
         materia.nombre = data['nombre']
     if 'creditos' in data:
@@ -161,7 +209,9 @@ def update_materia(id):
     if 'docente' in data:
         materia.docente = data['docente']
 
-    db.session.commit()
+    conflicto = guardar(conflictos=CONFLICTOS)
+    if conflicto:
+        return conflicto
 
     return jsonify(materia.to_dict()), 200
 
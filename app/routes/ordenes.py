@@ -1,16 +1,55 @@
 # app/routes/ordenes.py
-from flask import Blueprint, jsonify, request
+import base64
+import time
+from datetime import datetime
+from flask import Blueprint, jsonify, request, url_for
 from flask_jwt_extended import jwt_required
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload, selectinload
 from app.extensions import db
 from app.models.orden import Orden
 from app.models.detalle_orden import DetalleOrden
-from app.models.producto import Producto
 from app.models.cliente import Cliente
+from app.models.orden_pendiente import OrdenPendiente
+from app.services import cola_ordenes, rollups
+from app.services.idempotencia import idempotente
+from app.services.inventario import StockInsuficienteError
+from app.services.ordenes import (
+    MODOS_LOTE, cargar_productos, cargar_reservas, confirmar_reservas,
+    crear_ordenes, descontar_stock, lineas_rollup, validar_items, validar_orden
+)
 
 ordenes_bp = Blueprint('ordenes', __name__, url_prefix='/api/ordenes')
 
+
+def _modo_asincrono():
+    """La orden se encola si se pide ?asincrono=true o el header Prefer: respond-async."""
+    if request.args.get("asincrono", "").lower() in ("1", "true", "si"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def _encolar_orden(datos):
+    """Valida la forma de la orden, la guarda en la cola y responde 202."""
+    errores = cola_ordenes.validar_payload(datos)
+    if errores:
+        return jsonify({"error": "No se pudo encolar", "detalles": errores}), 400
+
+    pendiente = cola_ordenes.encolar(datos)
+    db.session.commit()
+
+    url_estado = url_for("ordenes.estado_pendiente", id=pendiente.id)
+    return jsonify({
+        "mensaje": "Orden encolada",
+        "pendiente_id": pendiente.id,
+        "estado": pendiente.estado,
+        "url_estado": url_estado
+    }), 202, {"Location": url_estado}
+
+
 @ordenes_bp.route("/", methods=["POST"])
 @jwt_required()
+@idempotente
 def procesar_orden():
     """
     Procesa una nueva orden de compra.
@@ -23,36 +62,38 @@ def procesar_orden():
             {"producto_id": 12, "cantidad": 1}
         ]
     }
+    Acepta el header opcional Idempotency-Key: un reintento con la misma
+    clave retorna la respuesta original sin crear otra orden.
+    Con ?asincrono=true (o Prefer: respond-async) la orden se encola y se
+    responde 202 con la URL para consultar su estado.
     """
     datos = request.get_json()
-    total = 0
-    detalles = []
-    errores = []
-
-    # Validar cada producto antes de crear la orden
-    for item in datos["productos"]:
-        producto = Producto.query.get(item["producto_id"])
-        if not producto:
-            errores.append(f"Producto ID {item['producto_id']} no existe")
-            continue
-        if producto.stock < item["cantidad"]:
-            errores.append(f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock}")
-            continue
-
-        subtotal = float(producto.precio) * item["cantidad"]
-        total += subtotal
-        detalles.append({
-            "producto": producto,
-            "cantidad": item["cantidad"],
-            "precio_unitario": float(producto.precio)
-        })
+
+    if _modo_asincrono():
+        return _encolar_orden(datos)
+
+    errores = validar_orden(datos)
+    if errores:
+        return jsonify({"error": "No se pudo procesar", "detalles": errores}), 400
+
+    # Cargar y bloquear todos los productos de una vez
+    ids = {item["producto_id"] for item in datos["productos"]}
+    productos = cargar_productos(ids)
+    reservas = cargar_reservas(datos["productos"])
+
+    detalles, cantidades, total, errores = validar_items(
+        datos["productos"], productos, reservas=reservas
+    )
 
     # Si hay errores, no procesar la orden
     if errores:
+        db.session.rollback()  # Liberar los bloqueos
         return jsonify({"error": "No se pudo procesar", "detalles": errores}), 400
 
     # Crear la orden (todo en una sola transacción)
     try:
+        descontar_stock(cantidades, productos)
+
         orden = Orden(cliente_id=datos["cliente_id"], total=total)
         db.session.add(orden)
         db.session.flush()  # Obtener el ID de la orden sin hacer commit
@@ -66,9 +107,8 @@ def procesar_orden():
             )
             db.session.add(detalle)
 
-            # Reducir stock del producto
-            d["producto"].stock -= d["cantidad"]
-
+        confirmar_reservas(detalles, orden.id)
+        rollups.registrar_ventas([(orden.fecha, total, lineas_rollup(detalles))])
         db.session.commit()  # Confirmar todos los cambios juntos
 
         return jsonify({
@@ -78,6 +118,190 @@ def procesar_orden():
             "productos_comprados": len(detalles)
         }), 201
 
+    except StockInsuficienteError:
+        db.session.rollback()
+        return jsonify({"error": "No se pudo procesar",
+                        "detalles": ["Stock insuficiente: otra orden tomó las unidades"]}), 409
+
     except Exception as e:
         db.session.rollback()  # Si algo falla, deshacer TODO
-        return jsonify({"error": "Error interno", "detalle": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Error interno", "detalle": str(e)}), 500
+
+
+@ordenes_bp.route("/batch", methods=["POST"])
+@jwt_required()
+@idempotente
+def procesar_lote():
+    """
+    Procesa un lote de órdenes en una sola transacción.
+    Requiere autenticación JWT.
+    Body esperado:
+    {
+        "modo": "todo_o_nada",       # o "mejor_esfuerzo"
+        "ordenes": [
+            {"cliente_id": 1, "productos": [{"producto_id": 5, "cantidad": 2}]},
+            {"cliente_id": 2, "productos": [{"producto_id": 12, "cantidad": 1}]}
+        ]
+    }
+    - todo_o_nada: si alguna orden falla no se guarda ninguna (400).
+    - mejor_esfuerzo: se guardan las válidas y se reportan las fallidas.
+    """
+    inicio = time.perf_counter()
+    datos = request.get_json()
+
+    if not datos or not isinstance(datos.get("ordenes"), list) or not datos["ordenes"]:
+        return jsonify({"error": "Se requiere una lista de ordenes"}), 400
+
+    modo = datos.get("modo", "todo_o_nada")
+    if modo not in MODOS_LOTE:
+        return jsonify({"error": f"Modo inválido. Opciones: {', '.join(MODOS_LOTE)}"}), 400
+
+    ordenes = datos["ordenes"]
+
+    try:
+        resultados, procesadas = crear_ordenes(ordenes, modo)
+        if not procesadas:
+            db.session.rollback()  # Liberar los bloqueos
+            return jsonify({
+                "error": "No se pudo procesar el lote",
+                "modo": modo,
+                "procesadas": 0,
+                "fallidas": len(ordenes),
+                "resultados": resultados
+            }), 400
+        db.session.commit()
+
+    except StockInsuficienteError:
+        db.session.rollback()
+        return jsonify({"error": "No se pudo procesar el lote",
+                        "detalles": ["Stock insuficiente: otra orden tomó las unidades"]}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Error interno", "detalle": str(e)}), 500
+
+    duracion = time.perf_counter() - inicio
+    return jsonify({
+        "mensaje": "Lote procesado",
+        "modo": modo,
+        "procesadas": procesadas,
+        "fallidas": len(ordenes) - procesadas,
+        "duracion_ms": round(duracion * 1000, 2),
+        "ordenes_por_segundo": round(procesadas / duracion, 2) if duracion else None,
+        "resultados": resultados
+    }), 201
+
+
+@ordenes_bp.route("/pendientes/<int:id>", methods=["GET"])
+@jwt_required()
+def estado_pendiente(id):
+    """Estado de una orden encolada: encolada, procesando, completada o fallida."""
+    pendiente = OrdenPendiente.query.get_or_404(id)
+    return jsonify(pendiente.to_dict()), 200
+
+
+@ordenes_bp.route("/pendientes", methods=["GET"])
+@jwt_required()
+def resumen_pendientes():
+    """Cantidad de órdenes de la cola por estado."""
+    conteos = db.session.query(
+        OrdenPendiente.estado, func.count(OrdenPendiente.id)
+    ).group_by(OrdenPendiente.estado).all()
+    resumen = {estado: 0 for estado in ("encolada", "procesando", "completada", "fallida")}
+    resumen.update({estado: total for estado, total in conteos})
+    return jsonify(resumen), 200
+
+
+# ─── Lectura de órdenes ──────────────────────────────────────────────
+
+def _consulta_ordenes():
+    """
+    Orden con cliente (JOIN) y detalles + producto (un SELECT ... IN adicional),
+    para que serializar N órdenes no dispare N consultas perezosas.
+    """
+    return Orden.query.options(
+        joinedload(Orden.cliente),
+        selectinload(Orden.detalles).joinedload(DetalleOrden.producto)
+    )
+
+
+def _serializar_orden(orden):
+    datos = orden.to_dict()
+    datos["cliente"] = {
+        "id": orden.cliente.id,
+        "nombre": orden.cliente.nombre,
+        "email": orden.cliente.email
+    } if orden.cliente else None
+    datos["detalles"] = [
+        {
+            "producto_id": d.producto_id,
+            "sku": d.producto.sku if d.producto else None,
+            "producto": d.producto.nombre if d.producto else None,
+            "cantidad": d.cantidad,
+            "precio_unitario": float(d.precio_unitario),
+            "subtotal": float(d.precio_unitario) * d.cantidad
+        }
+        for d in orden.detalles
+    ]
+    return datos
+
+
+def _codificar_cursor(orden):
+    valor = f"{orden.fecha.isoformat()}|{orden.id}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+
+def _decodificar_cursor(cursor):
+    fecha, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(fecha), int(id_)
+
+
+@ordenes_bp.route("/", methods=["GET"])
+@jwt_required()
+def listar_ordenes():
+    """
+    Lista órdenes de la más reciente a la más antigua con paginación keyset.
+    Parámetros opcionales: cliente_id, estado, desde, hasta (ISO 8601),
+    limite (máx. 100) y cursor (el "siguiente_cursor" de la página anterior).
+    El número de consultas SQL es el mismo sin importar el tamaño de página.
+    """
+    limite = max(1, min(request.args.get("limite", 20, type=int), 100))
+    consulta = _consulta_ordenes()
+
+    cliente_id = request.args.get("cliente_id", type=int)
+    if cliente_id:
+        consulta = consulta.filter(Orden.cliente_id == cliente_id)
+    estado = request.args.get("estado")
+    if estado:
+        consulta = consulta.filter(Orden.estado == estado)
+
+    try:
+        if request.args.get("desde"):
+            consulta = consulta.filter(Orden.fecha >= datetime.fromisoformat(request.args["desde"]))
+        if request.args.get("hasta"):
+            consulta = consulta.filter(Orden.fecha < datetime.fromisoformat(request.args["hasta"]))
+        if request.args.get("cursor"):
+            consulta = consulta.filter(
+                tuple_(Orden.fecha, Orden.id) < _decodificar_cursor(request.args["cursor"])
+            )
+    except ValueError:
+        return jsonify({"error": "Fecha o cursor inválido"}), 400
+
+    ordenes = consulta.order_by(Orden.fecha.desc(), Orden.id.desc()).limit(limite + 1).all()
+    hay_mas = len(ordenes) > limite
+    ordenes = ordenes[:limite]
+
+    return jsonify({
+        "ordenes": [_serializar_orden(o) for o in ordenes],
+        "siguiente_cursor": _codificar_cursor(ordenes[-1]) if hay_mas else None
+    }), 200
+
+
+@ordenes_bp.route("/<int:id>", methods=["GET"])
+@jwt_required()
+def obtener_orden(id):
+    """Obtiene una orden con su cliente y detalles."""
+    orden = _consulta_ordenes().filter(Orden.id == id).first()
+    if not orden:
+        return jsonify({"error": "Orden no encontrada"}), 404
+    return jsonify(_serializar_orden(orden)), 200
@@ -1,18 +1,32 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.producto import Producto
+from app.services import inventario
+from app.services.campos import campos_solicitados, opciones_carga
+from app.services.escritura import guardar
+from app.services.listados import responder_listado
+
+CONFLICTOS = {'sku': 'Ya existe un producto con ese SKU'}
 
 productos_bp = Blueprint('productos', __name__, url_prefix='/productos')
 
 @productos_bp.route('/', methods=['GET'])
 def get_productos():
-    productos = Producto.query.all()
-    return jsonify([p.to_dict() for p in productos]), 200
+    try:
+        campos = campos_solicitados(Producto)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    productos = Producto.query.options(*opciones_carga(Producto, campos)).order_by(Producto.id)
+    return responder_listado(productos, 'productos', campos)
 
 @productos_bp.route('/<int:id>', methods=['GET'])
 def get_producto(id):
-    producto = Producto.query.get_or_404(id)
-    return jsonify(producto.to_dict()), 200
+    try:
+        campos = campos_solicitados(Producto)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    producto = Producto.query.options(*opciones_carga(Producto, campos)).get_or_404(id)
+    return jsonify(producto.to_dict(campos)), 200
 
 @productos_bp.route('/', methods=['POST'])
 def create_producto():
@@ -26,9 +40,6 @@ def create_producto():
         if campo not in data:
             return jsonify({'error': f'El campo {campo} es requerido'}), 400
 
-    if Producto.query.filter_by(sku=data['sku']).first():
-        return jsonify({'error': 'Ya existe un producto con ese SKU'}), 409
-
     nuevo_producto = Producto(
         sku=data['sku'],
         nombre=data['nombre'],
@@ -39,8 +50,9 @@ def create_producto():
         activo=data.get('activo', True)
     )
 
-    db.session.add(nuevo_producto)
-    db.session.commit()
+    conflicto = guardar(nuevo_producto, CONFLICTOS)
+    if conflicto:
+        return conflicto
 
     return jsonify(nuevo_producto.to_dict()), 201
 
@@ -52,17 +64,22 @@ def update_producto(id):
     if not data:
         return jsonify({'error': 'No se proporcionaron datos'}), 400
 
-    if 'sku' in data:
-        existente = Producto.query.filter_by(sku=data['sku']).first()
-        if existente and existente.id != id:
-            return jsonify({'error': 'Ya existe un producto con ese SKU'}), 409
-        producto.sku = data['sku']
+    stock = data.get('stock')
+    if 'stock' in data and (not isinstance(stock, int) or isinstance(stock, bool) or stock < 0):
+        return jsonify({'error': 'El stock debe ser un entero mayor o igual a cero'}), 400
 
-    for campo in ['nombre', 'description', 'precio', 'stock', 'categoria_id', 'activo']:
-        if campo in data:
+    # En un producto fragmentado el stock vive en los slots: el nuevo total
+    # se reparte entre los mismos slots en lugar de escribirse en la fila
+    fragmentado = 'stock' in data and bool(producto.slots)
+    for campo in ['sku', 'nombre', 'description', 'precio', 'stock', 'categoria_id', 'activo']:
+        if campo in data and not (campo == 'stock' and fragmentado):
             setattr(producto, campo, data[campo])
+    if fragmentado:
+        inventario.fragmentar(producto, len(producto.slots), total=stock)
 
-    db.session.commit()
+    conflicto = guardar(conflictos=CONFLICTOS)
+    if conflicto:
+        return conflicto
     return jsonify(producto.to_dict()), 200
 
 @productos_bp.route('/<int:id>', methods=['DELETE'])
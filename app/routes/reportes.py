@@ -1,49 +1,108 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, extract
-from datetime import datetime
+from sqlalchemy import func
+from datetime import MAXYEAR, MINYEAR, date, datetime
 from app.extensions import db
-from app.models.orden import Orden
 from app.models.producto import Producto
-from app.models.detalle_orden import DetalleOrden
+from app.models.venta_diaria import VentaDiaria, VentaDiariaProducto
+from app.services.cache_reportes import cache_por_mes, obtener_cache
+from app.services.coalescencia import coalescer
+from app.services.series import GRANULARIDADES, contar_periodos, serie_ventas
+from app.services.sketch import obtener_sketch
+
+MODOS_TOP = ('exacto', 'aproximado')
 
 reportes_bp = Blueprint('reportes', __name__, url_prefix='/api/reportes')
 
+
+def _periodo_ventas():
+    """(anio, mes, args) del reporte de ventas con los mismos defaults de la vista."""
+    mes = request.args.get("mes", datetime.now().month, type=int)
+    anio = request.args.get("anio", datetime.now().year, type=int)
+    modo = request.args.get("modo", "exacto")
+    if not 1 <= mes <= 12 or not MINYEAR <= anio <= MAXYEAR or modo not in MODOS_TOP:
+        return None
+    return anio, mes, {"modo": modo}
+
+
+def _rango_mes(anio, mes):
+    """[inicio, fin) del mes; fin es None en diciembre de MAXYEAR, que no tiene mes siguiente."""
+    inicio = date(anio, mes, 1)
+    if mes < 12:
+        return inicio, date(anio, mes + 1, 1)
+    return inicio, date(anio + 1, 1, 1) if anio < MAXYEAR else None
+
+
 @reportes_bp.route("/ventas", methods=["GET"])
 @jwt_required()
+@coalescer
+@cache_por_mes(_periodo_ventas)
 def reporte_ventas():
-    """Genera un reporte de ventas del mes actual."""
+    """
+    Genera un reporte de ventas del mes actual.
+    Lee los rollups diarios (ventas_diarias y ventas_diarias_productos), así que
+    el costo depende del número de días del mes y no del número de órdenes.
+    La respuesta se guarda en la caché de reportes hasta que una orden del
+    mes se cree o modifique; los meses ya cerrados expiran tras
+    REPORTES_CACHE_TTL_CERRADO segundos (sin expiración con backend compartido).
+
+    Con ?modo=aproximado el top de productos sale del sketch Space-Saving en
+    memoria: sobre las ventas que el sketch ya vio (las de este proceso y los
+    checkpoints) las unidades reales están en [unidades - error_maximo, unidades];
+    las de otros procesos se suman en su siguiente checkpoint.
+    """
     mes = request.args.get("mes", datetime.now().month, type=int)
     anio = request.args.get("anio", datetime.now().year, type=int)
+    modo = request.args.get("modo", "exacto")
+    if not 1 <= mes <= 12:
+        return jsonify({"error": "El mes debe estar entre 1 y 12"}), 400
+    if not MINYEAR <= anio <= MAXYEAR:
+        return jsonify({"error": f"El año debe estar entre {MINYEAR} y {MAXYEAR}"}), 400
+    if modo not in MODOS_TOP:
+        return jsonify({"error": f"modo debe ser uno de: {', '.join(MODOS_TOP)}"}), 400
+
+    inicio, fin = _rango_mes(anio, mes)
 
-    # Consulta con agregaciones SQL
+    # Resumen del mes sumando los días
     resultado = db.session.query(
-        func.count(Orden.id).label("total_ordenes"),
-        func.sum(Orden.total).label("ingresos_totales"),
-        func.avg(Orden.total).label("ticket_promedio")
+        func.sum(VentaDiaria.total_ordenes).label("total_ordenes"),
+        func.sum(VentaDiaria.ingresos).label("ingresos_totales")
     ).filter(
-        extract("month", Orden.fecha) == mes,
-        extract("year", Orden.fecha) == anio
+        VentaDiaria.fecha >= inicio,
+        *([VentaDiaria.fecha < fin] if fin else [])
     ).first()
 
-    # Top 5 productos más vendidos
+    total_ordenes = resultado.total_ordenes or 0
+    ingresos = float(resultado.ingresos_totales or 0)
+
+    if modo == "aproximado":
+        return jsonify({
+            "periodo": f"{mes}/{anio}",
+            "modo": modo,
+            "resumen": _resumen(total_ordenes, ingresos),
+            "top_productos": _top_aproximado(anio, mes)
+        }), 200
+
+    # Top 5 productos más vendidos del mes
     top_productos = db.session.query(
         Producto.nombre,
-        func.sum(DetalleOrden.cantidad).label("unidades"),
-        func.sum(DetalleOrden.cantidad * DetalleOrden.precio_unitario).label("revenue")
-    ).join(DetalleOrden).group_by(
-        Producto.nombre
+        func.sum(VentaDiariaProducto.unidades).label("unidades"),
+        func.sum(VentaDiariaProducto.revenue).label("revenue")
+    ).join(
+        Producto, Producto.id == VentaDiariaProducto.producto_id
+    ).filter(
+        VentaDiariaProducto.fecha >= inicio,
+        *([VentaDiariaProducto.fecha < fin] if fin else [])
+    ).group_by(
+        Producto.id, Producto.nombre
     ).order_by(
-        func.sum(DetalleOrden.cantidad).desc()
+        func.sum(VentaDiariaProducto.unidades).desc()
     ).limit(5).all()
 
     return jsonify({
         "periodo": f"{mes}/{anio}",
-        "resumen": {
-            "total_ordenes": resultado.total_ordenes or 0,
-            "ingresos": float(resultado.ingresos_totales or 0),
-            "ticket_promedio": float(resultado.ticket_promedio or 0)
-        },
+        "modo": modo,
+        "resumen": _resumen(total_ordenes, ingresos),
         "top_productos": [
             {
                 "producto": p.nombre,
@@ -52,4 +111,69 @@ def reporte_ventas():
             }
             for p in top_productos
         ]
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+def _resumen(total_ordenes, ingresos):
+    return {
+        "total_ordenes": total_ordenes,
+        "ingresos": ingresos,
+        "ticket_promedio": ingresos / total_ordenes if total_ordenes else 0
+    }
+
+
+def _top_aproximado(anio, mes, n=5):
+    """Top del sketch del mes; los nombres salen de una sola consulta IN."""
+    mejores, _ = obtener_sketch().top(anio, mes, n)
+    nombres = dict(db.session.query(Producto.id, Producto.nombre)
+                   .filter(Producto.id.in_([pid for pid, _, _ in mejores])))
+    return [
+        {"producto": nombres.get(pid), "unidades": estimado, "error_maximo": error}
+        for pid, estimado, error in mejores
+    ]
+
+
+@reportes_bp.route("/ventas/serie", methods=["GET"])
+@jwt_required()
+@coalescer
+def serie_de_ventas():
+    """
+    Serie de ventas por día, semana o mes en el rango [desde, hasta).
+    Parámetros: ?desde=2025-01-01&hasta=2026-01-01&granularidad=mes&top=3
+    Cada punto trae el inicio del periodo (lunes para semanas); los periodos
+    sin ventas aparecen con ceros. Con `top` se agregan los N productos más
+    vendidos de cada periodo. Un rango de más de REPORTES_SERIE_MAX_PERIODOS
+    periodos responde 400.
+    """
+    granularidad = request.args.get("granularidad", "dia")
+    top = request.args.get("top", 0, type=int)
+    if granularidad not in GRANULARIDADES:
+        return jsonify({"error": f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}"}), 400
+    if top < 0:
+        return jsonify({"error": "top no puede ser negativo"}), 400
+
+    try:
+        desde = date.fromisoformat(request.args["desde"])
+        hasta = date.fromisoformat(request.args["hasta"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "desde y hasta son requeridos con formato AAAA-MM-DD"}), 400
+    if desde >= hasta:
+        return jsonify({"error": "desde debe ser anterior a hasta"}), 400
+    maximo = current_app.config.get("REPORTES_SERIE_MAX_PERIODOS", 1000)
+    if contar_periodos(desde, hasta, granularidad) > maximo:
+        return jsonify({"error": f"El rango no puede tener más de {maximo} periodos; "
+                                 f"usa una granularidad mayor"}), 400
+
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "granularidad": granularidad,
+        "serie": serie_ventas(desde, hasta, granularidad, top)
+    }), 200
+
+
+@reportes_bp.route("/cache", methods=["GET"])
+@jwt_required()
+def estadisticas_cache():
+    """Aciertos y fallos de la caché de reportes de este proceso."""
+    return jsonify(obtener_cache().estadisticas()), 200
@@ -0,0 +1,137 @@
+# app/services/busqueda.py
+import re
+import unicodedata
+from flask import current_app
+from sqlalchemy import DDL, bindparam, event, func, select, text
+from app.extensions import db
+from app.models.estudiante import Estudiante
+
+TABLA_FTS = 'estudiantes_busqueda'
+MIN_CARACTERES = 2
+
+# SQLite: tabla FTS5 de contenido externo (el texto vive en `estudiantes`;
+# el índice guarda solo los términos). unicode61 con remove_diacritics
+# normaliza acentos tanto al indexar como al buscar y los índices de
+# prefijo (de 2 a 10 letras) evitan combinar listas de términos en las
+# búsquedas parciales ("ram" -> "Ramírez").
+# Los triggers la mantienen al día con cualquier INSERT/UPDATE/DELETE,
+# incluidos los de Core que no pasan por el ORM.
+DDL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        nombre, apellido, matricula, email,
+        content='estudiantes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6 7 8 9 10')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON estudiantes BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido, matricula, email)
+        VALUES (new.id, new.nombre, new.apellido, new.matricula, new.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON estudiantes BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido, matricula, email)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.matricula, old.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au
+    AFTER UPDATE OF nombre, apellido, matricula, email ON estudiantes BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, apellido, matricula, email)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.matricula, old.email);
+        INSERT INTO {TABLA_FTS}(rowid, nombre, apellido, matricula, email)
+        VALUES (new.id, new.nombre, new.apellido, new.matricula, new.email);
+    END""",
+]
+
+# PostgreSQL: índice GIN de trigramas sobre el texto sin acentos. Es un
+# índice de expresión, así que se mantiene solo; unaccent() no es IMMUTABLE
+# y por eso se envuelve en una función que sí lo es.
+DDL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """CREATE OR REPLACE FUNCTION estudiantes_texto_busqueda(text, text, text, text)
+    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, concat_ws(' ', $1, $2, $3, $4))) $$""",
+    f"""CREATE INDEX IF NOT EXISTS ix_{TABLA_FTS}_trgm ON estudiantes
+    USING gin (estudiantes_texto_busqueda(nombre, apellido, matricula, email) gin_trgm_ops)""",
+]
+
+for sentencia in DDL_SQLITE:
+    event.listen(Estudiante.__table__, 'after_create', DDL(sentencia).execute_if(dialect='sqlite'))
+for sentencia in DDL_POSTGRES:
+    event.listen(Estudiante.__table__, 'after_create', DDL(sentencia).execute_if(dialect='postgresql'))
+event.listen(Estudiante.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {TABLA_FTS}').execute_if(dialect='sqlite'))
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Ramírez' -> 'ramirez'."""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def terminos(consulta):
+    """Palabras de la consulta con el mismo corte que el tokenizador (letras y dígitos)."""
+    return re.findall(r'[^\W_]+', normalizar(consulta))
+
+
+def _buscar_sqlite(palabras, limite, candidatos):
+    # Cada palabra como prefijo entre comillas ("ram"*); FTS5 las une con AND.
+    # bm25 es menor mientras más relevante; los pesos favorecen matrícula y
+    # apellido. Se califican solo los primeros `candidatos`: ordenar por bm25
+    # todas las coincidencias de un apellido común (cientos de miles de filas)
+    # costaría cientos de ms; con menos coincidencias el orden es exacto.
+    expresion = ' '.join(f'"{p}"*' for p in palabras)
+    return db.session.execute(
+        text(
+            f"SELECT id, puntuacion FROM ("
+            f"SELECT rowid AS id, -bm25({TABLA_FTS}, 2.0, 3.0, 5.0, 1.0) AS puntuacion "
+            f"FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH :expresion LIMIT :candidatos"
+            f") ORDER BY puntuacion DESC, id LIMIT :limite"
+        ),
+        {'expresion': expresion, 'candidatos': candidatos, 'limite': limite}
+    ).all()
+
+
+def _buscar_postgres(palabras, limite, candidatos):
+    # Cada palabra como subcadena (LIKE '%ram%' usa el índice de trigramas);
+    # el orden es por similitud de palabras con la consulta completa
+    texto_busqueda = func.estudiantes_texto_busqueda(
+        Estudiante.nombre, Estudiante.apellido, Estudiante.matricula, Estudiante.email
+    )
+    puntuacion = func.word_similarity(bindparam('consulta', ' '.join(palabras)), texto_busqueda)
+    coincidencias = (
+        select(Estudiante.id, puntuacion.label('puntuacion'))
+        .where(*[texto_busqueda.like(f'%{p}%') for p in palabras])
+        .limit(candidatos)
+        .subquery()
+    )
+    return db.session.execute(
+        select(coincidencias)
+        .order_by(coincidencias.c.puntuacion.desc(), coincidencias.c.id)
+        .limit(limite)
+    ).all()
+
+
+def buscar_estudiantes(consulta, limite=20):
+    """
+    Estudiantes cuyo nombre, apellido, matrícula o correo contienen todas las
+    palabras de `consulta`, sin distinguir acentos ni mayúsculas, del más al
+    menos relevante. La relevancia se calcula sobre a lo más
+    ESTUDIANTES_BUSQUEDA_CANDIDATOS coincidencias para acotar la latencia.
+    Retorna [(Estudiante, puntuacion)].
+    """
+    palabras = terminos(consulta)
+    if not palabras:
+        return []
+    candidatos = max(limite, current_app.config.get('ESTUDIANTES_BUSQUEDA_CANDIDATOS', 200))
+    if db.session.get_bind().dialect.name == 'postgresql':
+        ids = _buscar_postgres(palabras, limite, candidatos)
+    else:
+        ids = _buscar_sqlite(palabras, limite, candidatos)
+
+    puntuaciones = {fila.id: fila.puntuacion for fila in ids}
+    estudiantes = Estudiante.query.filter(Estudiante.id.in_(puntuaciones)).all() if puntuaciones else []
+    estudiantes.sort(key=lambda e: (-puntuaciones[e.id], e.id))
+    return [(e, puntuaciones[e.id]) for e in estudiantes]
+
+
+def reconstruir():
+    """Vuelve a llenar el índice de SQLite desde `estudiantes` (en PostgreSQL el índice se mantiene solo)."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        db.session.execute(text(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"))
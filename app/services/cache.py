@@ -0,0 +1,65 @@
+# app/services/cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class BackendCache:
+    """
+    Interfaz mínima de un backend de caché clave-valor.
+    LRUCache la implementa en memoria; un backend compartido entre procesos
+    (Redis, Memcached, ...) solo necesita implementar estos tres métodos.
+    """
+
+    def get(self, clave, default=None):
+        raise NotImplementedError
+
+    def set(self, clave, valor, ttl=None):
+        """Guarda `valor`; con `ttl` (segundos) la entrada expira sola."""
+        raise NotImplementedError
+
+    def delete(self, clave):
+        raise NotImplementedError
+
+
+class LRUCache(BackendCache):
+    """
+    Caché en memoria del proceso con política LRU (least recently used)
+    y expiración opcional por entrada.
+    Es segura entre hilos: todas las operaciones toman un candado interno.
+    """
+
+    def __init__(self, max_entradas=1024):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()  # clave -> (valor, expira | None)
+        self._candado = threading.Lock()
+
+    def get(self, clave, default=None):
+        with self._candado:
+            if clave not in self._datos:
+                return default
+            valor, expira = self._datos[clave]
+            if expira is not None and expira <= time.monotonic():
+                del self._datos[clave]
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        expira = time.monotonic() + ttl if ttl is not None else None
+        with self._candado:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._candado:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._candado:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
@@ -0,0 +1,150 @@
+# app/services/cache_catalogos.py
+import hashlib
+import uuid
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event
+from app.extensions import db
+from app.models.categoria import Categoria
+from app.models.materia import Materia
+from app.services.cache import LRUCache
+from app.services.listados import en_flujo
+
+PREFIJO = 'catalogos'
+
+# Modelo -> catálogo cuya versión cambia cuando se escribe una fila
+CATALOGOS = {Categoria: 'categorias', Materia: 'materias'}
+
+
+class CacheCatalogos:
+    """
+    Respuestas JSON ya serializadas (bytes) de catálogos que casi no cambian.
+
+    Cada catálogo tiene una versión; la clave de una entrada incluye la
+    versión vigente al empezar la lectura, y el ETag es un hash de esa clave.
+    Una escritura confirmada cambia la versión: las entradas y ETags viejos
+    dejan de coincidir sin borrar nada, y una lectura que consultó la base
+    antes del cambio guarda su resultado bajo la versión vieja, donde ya
+    nadie lo busca. Con el LRU en memoria cada proceso tiene sus versiones;
+    el TTL acota cuánto tarda un proceso en ver lo que escribió otro.
+    """
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+
+    def version(self, catalogo):
+        clave = f'{PREFIJO}:version:{catalogo}'
+        version = self.backend.get(clave)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(clave, version)
+        return version
+
+    def clave(self, catalogo, endpoint, vista_args, args):
+        partes = sorted({**vista_args, **args}.items())
+        normalizados = '&'.join(f'{k}={v}' for k, v in partes)
+        return f'{PREFIJO}:{catalogo}:{self.version(catalogo)}:{endpoint}:{normalizados}'
+
+    @staticmethod
+    def etag(clave):
+        return hashlib.sha256(clave.encode()).hexdigest()[:32]
+
+    def obtener(self, clave):
+        return self.backend.get(clave)
+
+    def guardar(self, clave, cuerpo):
+        self.backend.set(clave, cuerpo, ttl=self.ttl)
+
+    def invalidar(self, catalogos):
+        for catalogo in catalogos:
+            self.backend.set(f'{PREFIJO}:version:{catalogo}', uuid.uuid4().hex)
+
+
+def obtener_cache():
+    """
+    Caché de catálogos de la aplicación. CATALOGOS_CACHE_BACKEND puede ser una
+    función app -> BackendCache para compartirla entre procesos; por defecto
+    se usa un LRU en memoria.
+    """
+    if 'cache_catalogos' not in current_app.extensions:
+        config = current_app.config
+        fabrica = config.get('CATALOGOS_CACHE_BACKEND')
+        backend = fabrica(current_app) if fabrica else LRUCache(config.get('CATALOGOS_CACHE_MAX', 256))
+        current_app.extensions['cache_catalogos'] = CacheCatalogos(
+            backend, ttl=config.get('CATALOGOS_CACHE_TTL', 300)
+        )
+    return current_app.extensions['cache_catalogos']
+
+
+def cache_de_catalogo(catalogo):
+    """
+    Decorador read-through para las vistas GET de un catálogo.
+    - If-None-Match con el ETag vigente: 304 sin tocar la base.
+    - Acierto: los bytes guardados, sin tocar la base.
+    - Fallo: ejecuta la vista y, si responde 200, guarda el cuerpo.
+    ?stream=1 no pasa por la caché (guardarlo obligaría a armar todo el cuerpo).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if en_flujo():
+                return vista(*args, **kwargs)
+
+            cache = obtener_cache()
+            clave = cache.clave(catalogo, request.endpoint, kwargs, request.args.to_dict())
+            etag = cache.etag(clave)
+            if request.if_none_match.contains(etag):
+                respuesta = make_response('', 304)
+                respuesta.set_etag(etag)
+                return respuesta
+
+            guardado = cache.obtener(clave)
+            if guardado is not None:
+                respuesta = make_response(guardado, 200)
+                respuesta.mimetype = 'application/json'
+                respuesta.headers['X-Cache'] = 'HIT'
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+                cache.guardar(clave, respuesta.get_data())
+                respuesta.headers['X-Cache'] = 'MISS'
+            respuesta.set_etag(etag)
+            return respuesta
+        return envoltura
+    return decorador
+
+
+# ─── Invalidación por escrituras ─────────────────────────────────────
+
+def _catalogos_pendientes(session):
+    return session.info.setdefault('catalogos', set())
+
+
+def marcar_catalogos(*catalogos):
+    """
+    Marca catálogos a invalidar cuando la transacción actual haga commit.
+    Solo hace falta para INSERT/UPDATE/DELETE de Core, que no pasan por flush.
+    """
+    _catalogos_pendientes(db.session()).update(catalogos)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_catalogos_modificados(session, contexto):
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        catalogo = CATALOGOS.get(type(objeto))
+        if catalogo is not None:
+            _catalogos_pendientes(session).add(catalogo)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_al_confirmar(session):
+    catalogos = session.info.pop('catalogos', None)
+    if catalogos and has_app_context():
+        obtener_cache().invalidar(catalogos)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_al_revertir(session):
+    session.info.pop('catalogos', None)
@@ -0,0 +1,189 @@
+# app/services/cache_reportes.py
+import threading
+import uuid
+from datetime import date, datetime
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event, inspect
+from app.extensions import db
+from app.models.orden import Orden
+from app.services.cache import LRUCache
+
+PREFIJO = 'reportes'
+TODOS = '*'  # Marca de invalidación total (p. ej. al reconstruir rollups)
+
+
+class CacheReportes:
+    """
+    Caché de respuestas de reportes sobre un BackendCache intercambiable.
+
+    Cada entrada incluye en su clave la "versión" de su mes y una versión
+    global. Invalidar un mes es solo cambiar su versión: las entradas viejas
+    dejan de ser alcanzables y el LRU (o el TTL del backend) las desaloja.
+    Así funciona igual con un backend compartido que no sabe borrar por
+    prefijo. Si la versión de un mes se pierde (desalojo), se genera una
+    nueva, lo que equivale a invalidar: nunca se sirve una entrada vieja.
+
+    La invalidación solo cambia las versiones del backend del proceso que
+    confirmó la escritura. Con un LRU por proceso los demás workers no se
+    enteran, así que también los meses cerrados expiran (ttl_cerrado); solo
+    con un backend compartido tiene sentido guardarlos sin expiración.
+    """
+
+    def __init__(self, backend, ttl=60, ttl_cerrado=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.ttl_cerrado = ttl_cerrado
+        self.aciertos = 0
+        self.fallos = 0
+        self._candado = threading.Lock()
+
+    def _version(self, etiqueta):
+        clave = f'{PREFIJO}:version:{etiqueta}'
+        version = self.backend.get(clave)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(clave, version)
+        return version
+
+    def clave(self, endpoint, anio, mes, args):
+        normalizados = '&'.join(f'{k}={v}' for k, v in sorted(args.items()))
+        return (f'{PREFIJO}:{endpoint}:{anio}-{mes:02d}:{normalizados}'
+                f':{self._version(TODOS)}:{self._version(f"{anio}-{mes:02d}")}')
+
+    def ttl_para(self, anio, mes):
+        """
+        Un mes que ya terminó casi no cambia: usa ttl_cerrado (None = sin
+        expiración, solo con backend compartido). El mes en curso usa ttl.
+        """
+        hoy = datetime.utcnow().date()
+        return self.ttl_cerrado if date(anio, mes, 1) < date(hoy.year, hoy.month, 1) else self.ttl
+
+    def obtener(self, clave):
+        valor = self.backend.get(clave)
+        with self._candado:
+            if valor is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        self.backend.set(clave, valor, ttl=ttl)
+
+    def invalidar(self, meses):
+        """Invalida los meses [(anio, mes), ...]; TODOS en la lista invalida todo."""
+        for mes in meses:
+            etiqueta = TODOS if mes == TODOS else f'{mes[0]}-{mes[1]:02d}'
+            self.backend.set(f'{PREFIJO}:version:{etiqueta}', uuid.uuid4().hex)
+
+    def estadisticas(self):
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            datos = {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0
+            }
+        if hasattr(self.backend, '__len__'):
+            datos['entradas'] = len(self.backend)
+        return datos
+
+    def reiniciar_estadisticas(self):
+        with self._candado:
+            self.aciertos = 0
+            self.fallos = 0
+
+
+def obtener_cache():
+    """
+    Caché de reportes de la aplicación. REPORTES_CACHE_BACKEND puede ser una
+    función app -> BackendCache para usar un backend compartido entre procesos;
+    por defecto se usa un LRU en memoria. Con el LRU los meses cerrados
+    expiran tras REPORTES_CACHE_TTL_CERRADO segundos, porque las escrituras
+    de otros procesos (o de `flask reportes reconstruir`) no lo invalidan.
+    """
+    if 'cache_reportes' not in current_app.extensions:
+        config = current_app.config
+        fabrica = config.get('REPORTES_CACHE_BACKEND')
+        backend = fabrica(current_app) if fabrica else LRUCache(config.get('REPORTES_CACHE_MAX', 512))
+        current_app.extensions['cache_reportes'] = CacheReportes(
+            backend, ttl=config.get('REPORTES_CACHE_TTL', 60),
+            ttl_cerrado=None if fabrica else config.get('REPORTES_CACHE_TTL_CERRADO', 3600)
+        )
+    return current_app.extensions['cache_reportes']
+
+
+def cache_por_mes(periodo):
+    """
+    Decorador para vistas de reportes mensuales.
+    `periodo()` lee la petición y retorna (anio, mes, args_normalizados), o
+    None si los parámetros no son válidos (la vista responde sin caché).
+    Solo se guardan respuestas 200.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            normalizado = periodo()
+            if normalizado is None:
+                return vista(*args, **kwargs)
+
+            anio, mes, argumentos = normalizado
+            cache = obtener_cache()
+            clave = cache.clave(request.endpoint, anio, mes, argumentos)
+            guardado = cache.obtener(clave)
+            if guardado is not None:
+                respuesta = make_response(guardado, 200)
+                respuesta.mimetype = 'application/json'
+                respuesta.headers['X-Cache'] = 'HIT'
+                return respuesta
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code == 200:
+                cache.guardar(clave, respuesta.get_data(), ttl=cache.ttl_para(anio, mes))
+            respuesta.headers['X-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
+
+
+# ─── Invalidación por escrituras ─────────────────────────────────────
+
+def _meses_pendientes(session):
+    return session.info.setdefault('meses_reportes', set())
+
+
+def marcar_meses(fechas):
+    """
+    Marca meses a invalidar cuando la transacción actual haga commit.
+    Es necesario para escrituras con INSERT/UPDATE de Core (lotes, rollups),
+    que no pasan por los eventos de flush del ORM.
+    """
+    meses = _meses_pendientes(db.session())
+    for fecha in fechas:
+        meses.add(TODOS if fecha is TODOS else (fecha.year, fecha.month))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _registrar_ordenes_modificadas(session, contexto):
+    meses = None
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(objeto, Orden):
+            continue
+        meses = meses if meses is not None else _meses_pendientes(session)
+        historial = inspect(objeto).attrs.fecha.history
+        for fecha in (objeto.fecha, *historial.deleted):
+            if fecha is not None:
+                meses.add((fecha.year, fecha.month))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidar_al_confirmar(session):
+    meses = session.info.pop('meses_reportes', None)
+    if meses and has_app_context():
+        obtener_cache().invalidar(meses)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_al_revertir(session):
+    session.info.pop('meses_reportes', None)
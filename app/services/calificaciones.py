@@ -0,0 +1,130 @@
+# app/services/calificaciones.py
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select
+from app.extensions import db
+from app.models.calificacion import Calificacion
+from app.models.estudiante import Estudiante
+from app.models.materia import Materia
+from app.services import resumen_academico
+
+CAMPOS_REQUERIDOS = ('estudiante_id', 'materia_id', 'calificacion', 'periodo')
+TAMANO_BLOQUE = 500  # Valores por IN (...) para no rebasar el límite de parámetros
+
+
+def _en_bloques(valores):
+    valores = sorted(valores)
+    for i in range(0, len(valores), TAMANO_BLOQUE):
+        yield valores[i:i + TAMANO_BLOQUE]
+
+
+def leer_csv(texto):
+    """Filas de un CSV con encabezados estudiante_id,materia_id,calificacion,periodo[,fecha_evaluacion]."""
+    return list(csv.DictReader(io.StringIO(texto)))
+
+
+def convertir_calificacion(valor):
+    """Calificación como Decimal con 2 decimales. Retorna (calificacion, error)."""
+    try:
+        calificacion = Decimal(str(valor)).quantize(Decimal('0.01'))
+        if not 0 <= calificacion <= 100:
+            return None, 'calificacion debe estar entre 0 y 100.'
+        return calificacion, None
+    except InvalidOperation:
+        return None, 'calificacion debe ser un número.'
+
+
+def _normalizar(fila, hoy):
+    """Convierte una fila (JSON o CSV) a valores de columna. Retorna (valores, errores)."""
+    if not isinstance(fila, dict):
+        return None, ['Se esperaba un objeto']
+    faltantes = [c for c in CAMPOS_REQUERIDOS if fila.get(c) in (None, '')]
+    if faltantes:
+        return None, [f'El campo {c} es obligatorio.' for c in faltantes]
+
+    errores = []
+    valores = {'periodo': str(fila['periodo']).strip(), 'fecha_evaluacion': hoy}
+    for campo in ('estudiante_id', 'materia_id'):
+        try:
+            valores[campo] = int(fila[campo])
+        except (TypeError, ValueError):
+            errores.append(f'{campo} debe ser un entero.')
+    valores['calificacion'], error = convertir_calificacion(fila['calificacion'])
+    if error:
+        errores.append(error)
+    if fila.get('fecha_evaluacion'):
+        try:
+            valores['fecha_evaluacion'] = date.fromisoformat(str(fila['fecha_evaluacion']))
+        except ValueError:
+            errores.append('fecha_evaluacion debe tener formato AAAA-MM-DD.')
+    return valores, errores
+
+
+def validar_calificaciones(filas):
+    """
+    Valida todas las filas con un número fijo de consultas por conjunto:
+    - estudiantes y materias existentes con un IN (...) cada uno,
+    - (estudiante, materia, periodo) ya registrados con un IN sobre estudiantes
+      y periodos,
+    más los duplicados dentro del mismo archivo.
+    Retorna (validas, errores) con errores = [{"fila": n, "errores": [...]}]
+    y `fila` contada desde 1.
+    """
+    hoy = datetime.utcnow().date()
+    normalizadas = [_normalizar(f, hoy) for f in filas]
+    con_valores = [v for v, e in normalizadas if v is not None and not e]
+
+    estudiantes = {v['estudiante_id'] for v in con_valores}
+    materias = {v['materia_id'] for v in con_valores}
+    periodos = {v['periodo'] for v in con_valores}
+
+    estudiantes_existentes, materias_existentes, registradas = set(), set(), set()
+    for bloque in _en_bloques(estudiantes):
+        estudiantes_existentes.update(db.session.scalars(
+            select(Estudiante.id).where(Estudiante.id.in_(bloque))))
+    for bloque in _en_bloques(materias):
+        materias_existentes.update(db.session.scalars(
+            select(Materia.id).where(Materia.id.in_(bloque))))
+    if periodos:
+        for bloque in _en_bloques(estudiantes_existentes):
+            registradas.update(db.session.execute(
+                select(Calificacion.estudiante_id, Calificacion.materia_id, Calificacion.periodo)
+                .where(Calificacion.estudiante_id.in_(bloque), Calificacion.periodo.in_(periodos))
+            ).tuples())
+
+    validas, errores, vistas = [], [], {}
+    for numero, (valores, problemas) in enumerate(normalizadas, start=1):
+        problemas = list(problemas)
+        if valores is not None and not problemas:
+            llave = (valores['estudiante_id'], valores['materia_id'], valores['periodo'])
+            if valores['estudiante_id'] not in estudiantes_existentes:
+                problemas.append('Estudiante no encontrado.')
+            if valores['materia_id'] not in materias_existentes:
+                problemas.append('Materia no encontrada.')
+            if llave in registradas:
+                problemas.append('Ya existe una calificación para esta materia y periodo.')
+            elif llave in vistas:
+                problemas.append(f'Duplicada con la fila {vistas[llave]}.')
+            else:
+                vistas[llave] = numero
+        if problemas:
+            errores.append({'fila': numero, 'errores': problemas})
+        else:
+            validas.append(valores)
+    return validas, errores
+
+
+def insertar_calificaciones(validas):
+    """
+    INSERT de todas las filas en un solo executemany y actualización del
+    resumen académico (el INSERT de Core no pasa por los eventos del ORM).
+    No hace commit.
+    """
+    if validas:
+        db.session.execute(insert(Calificacion), validas)
+        resumen_academico.aplicar_cambios(db.session.connection(), [
+            (v['estudiante_id'], v['materia_id'], v['calificacion'], 1) for v in validas
+        ])
+    return len(validas)
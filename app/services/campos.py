@@ -0,0 +1,53 @@
+# app/services/campos.py
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import lazyload, load_only, selectinload
+
+PARAMETRO = 'fields'
+
+
+def campos_solicitados(modelo):
+    """
+    Campos pedidos en ?fields=a,b,c (en ese orden, sin repetidos) o None si
+    no viene el parámetro. Los válidos son los de modelo.CAMPOS, es decir,
+    las llaves de to_dict(). ValueError si viene vacío o con campos desconocidos.
+    """
+    valor = request.args.get(PARAMETRO)
+    if valor is None:
+        return None
+    campos = list(dict.fromkeys(c.strip() for c in valor.split(',') if c.strip()))
+    if not campos:
+        raise ValueError(f"{PARAMETRO} no puede estar vacío. Opciones: {', '.join(modelo.CAMPOS)}")
+    desconocidos = [c for c in campos if c not in modelo.CAMPOS]
+    if desconocidos:
+        raise ValueError(
+            f"Campos desconocidos: {', '.join(desconocidos)}. Opciones: {', '.join(modelo.CAMPOS)}"
+        )
+    return campos
+
+
+def opciones_carga(modelo, campos):
+    """
+    Opciones de consulta para cargar solo lo que necesitan `campos`
+    (None = todos los de modelo.CAMPOS): load_only con sus columnas (más la
+    llave primaria), selectinload para las relaciones perezosas que algún
+    campo lee, así serializar N filas no dispara N consultas, y lazyload para
+    las que el modelo carga de forma ansiosa y ningún campo usa.
+    Un campo calculado declara en modelo.DEPENDENCIAS los atributos que lee.
+    """
+    dependencias = getattr(modelo, 'DEPENDENCIAS', {})
+    atributos = {a for c in (modelo.CAMPOS if campos is None else campos) for a in dependencias.get(c, (c,))}
+    mapper = inspect(modelo)
+    opciones = []
+    if campos is not None:
+        opciones.append(load_only(*[
+            getattr(modelo, columna.key) for columna in mapper.column_attrs
+            if columna.key in atributos or any(c.primary_key for c in columna.columns)
+        ]))
+    for relacion in mapper.relationships:
+        ansiosa = relacion.lazy in ('selectin', 'joined', 'subquery')
+        if relacion.key in atributos and not ansiosa:
+            opciones.append(selectinload(getattr(modelo, relacion.key)))
+        elif relacion.key not in atributos and ansiosa:
+            opciones.append(lazyload(getattr(modelo, relacion.key)))
+    return opciones
@@ -0,0 +1,145 @@
+# app/services/coalescencia.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy import func, select
+from app.extensions import db
+
+_registro_lock = threading.Lock()
+
+
+class _Vuelo:
+    """Una ejecución en curso y lo que obtuvo (respuesta o excepción)."""
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.respuesta = None  # (cuerpo, codigo, headers)
+        self.error = None
+
+
+def _estado():
+    with _registro_lock:
+        return current_app.extensions.setdefault(
+            'coalescencia', {'vuelos': {}, 'candado': threading.Lock()}
+        )
+
+
+def _clave_peticion():
+    argumentos = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{request.endpoint}?{argumentos}'
+
+
+def _hash(clave):
+    return int.from_bytes(hashlib.sha1(clave.encode()).digest()[:8], 'big', signed=True)
+
+
+@contextmanager
+def _bloqueo_archivo(clave, timeout):
+    import fcntl
+    directorio = current_app.config.get('REPORTES_COALESCER_DIR') or tempfile.gettempdir()
+    ruta = os.path.join(directorio, f'coalescer-{_hash(clave) & 0xffffffff:08x}.lock')
+    with open(ruta, 'w') as archivo:
+        limite = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    yield False
+                    return
+                time.sleep(0.01)
+        try:
+            yield True
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _bloqueo_postgres(clave, timeout):
+    llave = _hash(clave)
+    with db.engine.connect() as conexion:
+        limite = time.monotonic() + timeout
+        obtenido = False
+        while not obtenido:
+            obtenido = conexion.execute(select(func.pg_try_advisory_lock(llave))).scalar()
+            conexion.commit()
+            if not obtenido:
+                if time.monotonic() >= limite:
+                    break
+                time.sleep(0.01)
+        try:
+            yield obtenido
+        finally:
+            if obtenido:
+                conexion.execute(select(func.pg_advisory_unlock(llave)))
+                conexion.commit()
+
+
+_BLOQUEOS = {'archivo': _bloqueo_archivo, 'postgres': _bloqueo_postgres}
+
+
+def coalescer(vista):
+    """
+    Decorador single-flight para vistas de reportes: peticiones idénticas
+    (mismo endpoint y mismos parámetros) que llegan mientras una ya se está
+    calculando esperan a esa y reciben una copia de su respuesta.
+
+    - Si la ejecución líder lanza una excepción, las que esperaban la
+      reciben también.
+    - Quien espera más de REPORTES_COALESCER_TIMEOUT segundos recibe 503
+      con Retry-After.
+    - Con REPORTES_COALESCER_BLOQUEO = 'archivo' | 'postgres' el líder toma
+      además un candado entre procesos (flock o pg_advisory_lock), así que
+      los demás workers calculan después y, con una caché compartida, la
+      encuentran llena. Si el candado no llega a tiempo, calcula sin él.
+    Debe ir después de @jwt_required y antes de la caché.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        config = current_app.config
+        timeout = config.get('REPORTES_COALESCER_TIMEOUT', 30)
+        estado = _estado()
+        clave = _clave_peticion()
+
+        with estado['candado']:
+            vuelo = estado['vuelos'].get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = estado['vuelos'][clave] = _Vuelo()
+
+        if not lider:
+            if not vuelo.listo.wait(timeout):
+                respuesta = jsonify({'error': 'El reporte sigue calculándose, intenta de nuevo'})
+                respuesta.status_code = 503
+                respuesta.headers['Retry-After'] = '1'
+                return respuesta
+            if vuelo.error is not None:
+                raise vuelo.error
+            cuerpo, codigo, headers = vuelo.respuesta
+            return make_response(cuerpo, codigo, headers)
+
+        try:
+            bloqueo = _BLOQUEOS.get(config.get('REPORTES_COALESCER_BLOQUEO'))
+            if bloqueo is None:
+                respuesta = make_response(vista(*args, **kwargs))
+            else:
+                with bloqueo(clave, timeout):
+                    respuesta = make_response(vista(*args, **kwargs))
+            vuelo.respuesta = (respuesta.get_data(), respuesta.status_code,
+                               list(respuesta.headers.items()))
+            return respuesta
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with estado['candado']:
+                estado['vuelos'].pop(clave, None)
+            vuelo.listo.set()
+
+    return envoltura
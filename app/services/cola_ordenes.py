@@ -0,0 +1,159 @@
+# app/services/cola_ordenes.py
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.orden_pendiente import OrdenPendiente
+from app.services.ordenes import crear_ordenes, validar_orden
+
+
+def validar_payload(datos):
+    """
+    Revisión rápida de la forma de la orden antes de encolarla.
+    La validación de stock la hace el worker al procesarla.
+    """
+    return validar_orden(datos)
+
+
+def encolar(datos):
+    """Guarda la orden en la cola. No hace commit."""
+    pendiente = OrdenPendiente(payload=json.dumps(datos))
+    db.session.add(pendiente)
+    db.session.flush()
+    return pendiente
+
+
+def _recuperar_atascadas(timeout_segundos):
+    """Regresa a la cola las órdenes de un worker que murió a medio proceso."""
+    limite = datetime.utcnow() - timedelta(seconds=timeout_segundos)
+    tabla = OrdenPendiente.__table__
+    db.session.execute(
+        tabla.update()
+        .where(tabla.c.estado == 'procesando', tabla.c.fecha_actualizacion < limite)
+        .values(estado='encolada', trabajador=None)
+    )
+
+
+def _reclamar(limite):
+    """
+    Marca hasta `limite` órdenes encoladas como 'procesando' para este worker.
+    En PostgreSQL FOR UPDATE SKIP LOCKED evita que dos workers tomen las
+    mismas filas; el UPDATE condicional con un token propio cubre SQLite.
+    """
+    ids = db.session.scalars(
+        select(OrdenPendiente.id)
+        .where(OrdenPendiente.estado == 'encolada')
+        .order_by(OrdenPendiente.id)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    tabla = OrdenPendiente.__table__
+    db.session.execute(
+        tabla.update()
+        .where(tabla.c.id.in_(ids), tabla.c.estado == 'encolada')
+        .values(estado='procesando', trabajador=token, intentos=tabla.c.intentos + 1,
+                fecha_actualizacion=datetime.utcnow())
+    )
+    db.session.commit()  # Hacer visible el estado 'procesando'
+
+    return OrdenPendiente.query.filter_by(trabajador=token, estado='procesando') \
+                               .order_by(OrdenPendiente.id).all()
+
+
+def procesar_pendientes(limite=None):
+    """
+    Procesa un lote de la cola en una sola transacción (modo mejor_esfuerzo):
+    las órdenes y el cambio de estado de la cola se confirman juntos.
+    Si el lote completo falla (por ejemplo, otra transacción se llevó el
+    stock) las órdenes regresan a la cola hasta agotar los intentos.
+    Retorna cuántas órdenes de la cola se tomaron.
+    """
+    config = current_app.config
+    limite = limite or config.get('ORDENES_ASYNC_LOTE', 100)
+    max_intentos = config.get('ORDENES_ASYNC_MAX_INTENTOS', 3)
+
+    _recuperar_atascadas(config.get('ORDENES_ASYNC_TIMEOUT', 300))
+    pendientes = _reclamar(limite)
+    if not pendientes:
+        db.session.commit()
+        return 0
+
+    try:
+        resultados, _ = crear_ordenes([json.loads(p.payload) for p in pendientes], "mejor_esfuerzo")
+        for pendiente, resultado in zip(pendientes, resultados):
+            if resultado["ok"]:
+                pendiente.estado = 'completada'
+                pendiente.orden_id = resultado["orden_id"]
+            else:
+                pendiente.estado = 'fallida'
+                pendiente.errores = json.dumps(resultado["errores"])
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        for pendiente in pendientes:
+            if pendiente.intentos >= max_intentos:
+                pendiente.estado = 'fallida'
+                pendiente.errores = json.dumps([f"Error al procesar: {e}"])
+            else:
+                pendiente.estado = 'encolada'
+            pendiente.trabajador = None
+        db.session.commit()
+
+    return len(pendientes)
+
+
+class TrabajadorOrdenes:
+    """
+    Pool de hilos que vacían la cola de órdenes. Cada hilo abre su propio
+    contexto de aplicación (y por lo tanto su propia sesión de base de datos).
+
+        trabajador = TrabajadorOrdenes(app, hilos=4)
+        trabajador.iniciar()
+        ...
+        trabajador.detener()
+    """
+
+    def __init__(self, app, hilos=2, intervalo=0.5, lote=None):
+        self.app = app
+        self.hilos = hilos
+        self.intervalo = intervalo
+        self.lote = lote
+        self._detener = threading.Event()
+        self._hilos = []
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            with self.app.app_context():
+                try:
+                    procesadas = procesar_pendientes(self.lote)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Error en el worker de órdenes")
+                    procesadas = 0
+                finally:
+                    db.session.remove()
+            if not procesadas:
+                self._detener.wait(self.intervalo)
+
+    def iniciar(self):
+        self._detener.clear()
+        self._hilos = [
+            threading.Thread(target=self._ciclo, name=f"ordenes-worker-{i}", daemon=True)
+            for i in range(self.hilos)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self, timeout=None):
+        self._detener.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
@@ -0,0 +1,47 @@
+# app/services/conteos.py
+from flask import current_app
+from sqlalchemy import func, select, text
+from app.extensions import db
+from app.services.cache import LRUCache
+
+MODOS_TOTAL = ('no', 'aproximado', 'exacto')
+
+
+def _cache_conteos():
+    if 'cache_conteos' not in current_app.extensions:
+        current_app.extensions['cache_conteos'] = LRUCache(256)
+    return current_app.extensions['cache_conteos']
+
+
+def _estimado_postgres(tabla):
+    """Filas estimadas por el planificador (pg_class.reltuples); None si no hay estadísticas."""
+    estimado = db.session.execute(
+        text('SELECT reltuples FROM pg_class WHERE oid = CAST(:tabla AS regclass)'), {'tabla': tabla}
+    ).scalar()
+    return int(estimado) if estimado is not None and estimado >= 0 else None
+
+
+def contar(modelo, *filtros, modo='exacto'):
+    """
+    Total de filas de `modelo` que cumplen `filtros`. Retorna (total, aproximado).
+    - exacto: COUNT(*) en cada llamada.
+    - aproximado: sin filtros en PostgreSQL usa la estimación del planificador
+      (no recorre la tabla); en los demás casos reutiliza un COUNT(*) guardado
+      ESTUDIANTES_CONTEO_TTL segundos por tabla y filtros.
+    """
+    consulta = select(func.count()).select_from(modelo).where(*filtros)
+    if modo == 'exacto':
+        return db.session.scalar(consulta), False
+
+    if not filtros and db.session.get_bind().dialect.name == 'postgresql':
+        estimado = _estimado_postgres(modelo.__tablename__)
+        if estimado is not None:
+            return estimado, True
+
+    cache = _cache_conteos()
+    clave = str(consulta.compile(compile_kwargs={'literal_binds': True}))
+    total = cache.get(clave)
+    if total is None:
+        total = db.session.scalar(consulta)
+        cache.set(clave, total, ttl=current_app.config.get('ESTUDIANTES_CONTEO_TTL', 60))
+    return total, True
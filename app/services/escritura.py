@@ -0,0 +1,45 @@
+# app/services/escritura.py
+import re
+from flask import jsonify
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+
+# Columna que violó la restricción única, según el texto del error del driver
+_COLUMNA_DUPLICADA = (
+    re.compile(r'UNIQUE constraint failed: \w+\.(\w+)'),  # SQLite
+    re.compile(r'Key \((\w+)(?:, \w+)*\)=\('),            # PostgreSQL
+)
+
+
+def columna_duplicada(error):
+    """Nombre de la columna de un IntegrityError por valor duplicado, o None."""
+    mensaje = str(getattr(error, 'orig', error))
+    for patron in _COLUMNA_DUPLICADA:
+        encontrada = patron.search(mensaje)
+        if encontrada:
+            return encontrada.group(1)
+    return None
+
+
+def guardar(objeto=None, conflictos=None, codigo=409, clave='error'):
+    """
+    Agrega `objeto` (si se pasa) y hace commit sin consultar antes si el valor
+    ya existe: las restricciones UNIQUE de la tabla son las que deciden, así
+    que un alta es un solo INSERT y no hay carrera entre la consulta y la
+    escritura.
+    `conflictos` mapea columna -> mensaje. Si el commit falla por una de esas
+    columnas hace rollback y retorna la respuesta de error
+    ({clave: mensaje, 'campo': columna}, codigo); si todo sale bien retorna
+    None. Cualquier otro IntegrityError se propaga después del rollback.
+    """
+    if objeto is not None:
+        db.session.add(objeto)
+    try:
+        db.session.commit()
+    except IntegrityError as error:
+        db.session.rollback()
+        campo = columna_duplicada(error)
+        if campo not in (conflictos or {}):
+            raise
+        return jsonify({clave: conflictos[campo], 'campo': campo}), codigo
+    return None
@@ -0,0 +1,148 @@
+# app/services/estudiantes.py
+from itertools import islice
+from sqlalchemy import select
+from app.extensions import db
+from app.models.estudiante import Estudiante
+
+CAMPOS_ESTUDIANTE = ('matricula', 'nombre', 'apellido', 'email', 'carrera', 'semestre')
+CAMPOS_ACTUALIZABLES = ('nombre', 'apellido', 'email', 'carrera', 'semestre')
+MODOS_IMPORTACION = ('insertar', 'upsert')
+
+
+def _insert_dialecto():
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        raise NotImplementedError(f"Importación masiva no soportada en {dialecto}")
+    return insert_dialecto(Estudiante.__table__)
+
+
+def en_lotes(filas, tamano):
+    """Agrupa un iterable de filas en listas de `tamano` sin materializarlo completo."""
+    filas = iter(filas)
+    while lote := list(islice(filas, tamano)):
+        yield lote
+
+
+def _normalizar(fila):
+    """Valores de columna de una fila (JSON o CSV). Retorna (valores, errores)."""
+    if not isinstance(fila, dict):
+        return None, ['Se esperaba un objeto']
+    faltantes = [c for c in CAMPOS_ESTUDIANTE if fila.get(c) in (None, '')]
+    if faltantes:
+        return None, [f'El campo {c} es obligatorio.' for c in faltantes]
+
+    errores = []
+    valores = {c: str(fila[c]).strip() for c in CAMPOS_ESTUDIANTE if c != 'semestre'}
+    for campo, valor in valores.items():
+        longitud = Estudiante.__table__.c[campo].type.length
+        if len(valor) > longitud:
+            errores.append(f'{campo} admite máximo {longitud} caracteres.')
+    if '@' not in valores['email']:
+        errores.append('email no es un correo válido.')
+    try:
+        valores['semestre'] = int(fila['semestre'])
+        if valores['semestre'] < 1:
+            errores.append('semestre debe ser mayor que 0.')
+    except (TypeError, ValueError):
+        errores.append('semestre debe ser un entero.')
+    return valores, errores
+
+
+class ImportacionEstudiantes:
+    """
+    Importa estudiantes por lotes. En cada lote:
+    - valida las filas y detecta repetidas contra lotes anteriores,
+    - busca matrículas y correos ya registrados con un IN (...) cada uno,
+    - escribe las válidas en un solo executemany con RETURNING.
+    modo 'insertar' usa ON CONFLICT DO NOTHING: una fila que choca con un
+    registro creado en paralelo se reporta como error en vez de abortar.
+    modo 'upsert' usa ON CONFLICT (matricula) DO UPDATE.
+    No hace commit.
+    """
+
+    def __init__(self, modo='insertar'):
+        self.modo = modo
+        self.resultados = []
+        self.insertados = self.actualizados = self.fallidos = 0
+        self._matriculas = {}  # matrícula -> fila donde apareció
+        self._correos = {}     # correo -> matrícula que lo usa en el archivo
+        self._numero = 0
+
+    def _error(self, numero, errores):
+        self.fallidos += 1
+        self.resultados.append({'fila': numero, 'estado': 'error', 'errores': errores})
+
+    def procesar(self, lote):
+        normalizadas = []
+        for fila in lote:
+            self._numero += 1
+            normalizadas.append((self._numero, *_normalizar(fila)))
+
+        con_valores = [v for _, v, e in normalizadas if v is not None and not e]
+        matriculas_registradas = dict(db.session.execute(
+            select(Estudiante.matricula, Estudiante.id)
+            .where(Estudiante.matricula.in_({v['matricula'] for v in con_valores}))
+        ).all()) if con_valores else {}
+        correos_registrados = dict(db.session.execute(
+            select(Estudiante.email, Estudiante.matricula)
+            .where(Estudiante.email.in_({v['email'] for v in con_valores}))
+        ).all()) if con_valores else {}
+
+        validas = []
+        for numero, valores, problemas in normalizadas:
+            problemas = list(problemas)
+            if valores is not None and not problemas:
+                matricula, correo = valores['matricula'], valores['email']
+                if matricula in self._matriculas:
+                    problemas.append(f'Matrícula duplicada con la fila {self._matriculas[matricula]}.')
+                elif self.modo == 'insertar' and matricula in matriculas_registradas:
+                    problemas.append('La matrícula ya existe.')
+                duenio = self._correos.get(correo, correos_registrados.get(correo))
+                if duenio is not None and (self.modo == 'insertar' or duenio != matricula):
+                    problemas.append('El correo electrónico ya existe.')
+            if problemas:
+                self._error(numero, problemas)
+                continue
+            self._matriculas[valores['matricula']] = numero
+            self._correos[valores['email']] = valores['matricula']
+            validas.append((numero, valores))
+
+        if validas:
+            self._escribir(validas, matriculas_registradas)
+
+    def _escribir(self, validas, matriculas_registradas):
+        stmt = _insert_dialecto()
+        if self.modo == 'upsert':
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['matricula'],
+                set_={c: stmt.excluded[c] for c in CAMPOS_ACTUALIZABLES}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+        escritas = dict(db.session.execute(
+            stmt.returning(Estudiante.matricula, Estudiante.id), [v for _, v in validas]
+        ).all())
+
+        for numero, valores in validas:
+            id_ = escritas.get(valores['matricula'])
+            if id_ is None:
+                self._error(numero, ['Conflicto con un registro existente (matrícula o correo).'])
+            elif valores['matricula'] in matriculas_registradas:
+                self.actualizados += 1
+                self.resultados.append({'fila': numero, 'estado': 'actualizado', 'id': id_})
+            else:
+                self.insertados += 1
+                self.resultados.append({'fila': numero, 'estado': 'insertado', 'id': id_})
+
+    def resumen(self):
+        return {
+            'modo': self.modo,
+            'insertados': self.insertados,
+            'actualizados': self.actualizados,
+            'fallidos': self.fallidos,
+            'resultados': sorted(self.resultados, key=lambda r: r['fila'])
+        }
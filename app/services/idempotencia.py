@@ -0,0 +1,184 @@
+# app/services/idempotencia.py
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.idempotencia import ClaveIdempotencia
+from app.services.cache import LRUCache
+
+HEADER = 'Idempotency-Key'
+
+
+# Un candado por clave en curso para que las peticiones concurrentes
+# con la misma clave esperen a la primera en lugar de repetir el trabajo
+_candados = {}
+_candados_lock = threading.Lock()
+
+
+def _cache():
+    """Caché frontal por aplicación: (usuario, ruta, clave) -> (huella, codigo_estado, cuerpo)."""
+    if 'idempotencia' not in current_app.extensions:
+        current_app.extensions['idempotencia'] = LRUCache(
+            max_entradas=current_app.config.get('IDEMPOTENCIA_CACHE_MAX', 1024)
+        )
+    return current_app.extensions['idempotencia']
+
+
+@contextmanager
+def _candado_por_clave(llave):
+    with _candados_lock:
+        entrada = _candados.setdefault(llave, [threading.Lock(), 0])
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _candados_lock:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                _candados.pop(llave, None)
+
+
+def _repetir(guardada, huella):
+    """Construye la respuesta guardada o un error si el cuerpo no coincide."""
+    huella_guardada, codigo, cuerpo = guardada
+    if huella_guardada != huella:
+        return jsonify({'error': f'El {HEADER} ya se usó con un cuerpo distinto'}), 422
+    respuesta = make_response(cuerpo, codigo)
+    respuesta.mimetype = 'application/json'
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _filtro(llave):
+    usuario, ruta, clave = llave
+    return ClaveIdempotencia.query.filter_by(usuario=usuario, ruta=ruta, clave=clave)
+
+
+def _reservar(llave, huella):
+    """
+    Inserta la clave como 'en_proceso'. Retorna (fecha_reserva, None) si se
+    reservó, o (None, fila) si otro proceso (u otra petición anterior) ya la
+    tenía. Una fila 'en_proceso' más vieja que IDEMPOTENCIA_TIMEOUT_EN_PROCESO
+    (su proceso murió) o cualquiera más vieja que IDEMPOTENCIA_TTL se toma con
+    un UPDATE condicional, así solo una de varias peticiones la reclama.
+    """
+    usuario, ruta, clave = llave
+    ahora = datetime.utcnow()
+    try:
+        db.session.add(ClaveIdempotencia(usuario=usuario, ruta=ruta, clave=clave,
+                                         huella=huella, fecha=ahora))
+        db.session.commit()
+        return ahora, None
+    except IntegrityError:
+        db.session.rollback()
+
+    config = current_app.config
+    abandonada = ahora - timedelta(seconds=config.get('IDEMPOTENCIA_TIMEOUT_EN_PROCESO', 120))
+    vencida = ahora - timedelta(seconds=config.get('IDEMPOTENCIA_TTL', 24 * 3600))
+    tomadas = _filtro(llave).filter(or_(
+        and_(ClaveIdempotencia.estado == 'en_proceso', ClaveIdempotencia.fecha < abandonada),
+        ClaveIdempotencia.fecha < vencida
+    )).update({'huella': huella, 'fecha': ahora, 'estado': 'en_proceso',
+               'codigo_estado': None, 'respuesta': None}, synchronize_session=False)
+    db.session.commit()
+    if tomadas:
+        return ahora, None
+    return None, _filtro(llave).first()
+
+
+def idempotente(vista):
+    """
+    Decorador para endpoints POST que acepta el header Idempotency-Key.
+    - Una clave repetida retorna la respuesta guardada sin volver a ejecutar
+      la vista (no toca productos ni detalles de orden).
+    - La clave es de cada usuario: va después de @jwt_required y se combina
+      con la identidad del token, así dos usuarios con la misma clave no
+      ven la respuesta del otro.
+    - Peticiones concurrentes con la misma clave en el mismo proceso se
+      esperan entre sí; entre procesos, la restricción única de la tabla
+      hace que la segunda reciba 409 mientras la primera sigue en curso.
+      Una reserva abandonada se reclama tras IDEMPOTENCIA_TIMEOUT_EN_PROCESO.
+    - Las respuestas 5xx y 409 (conflictos transitorios) no se guardan para
+      que el cliente pueda reintentar.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = request.headers.get(HEADER)
+        if not clave:
+            return vista(*args, **kwargs)
+
+        llave = (str(get_jwt_identity() or ''), request.path, clave)
+        huella = hashlib.sha256(request.get_data()).hexdigest()
+
+        guardada = _cache().get(llave)
+        if guardada:
+            return _repetir(guardada, huella)
+
+        with _candado_por_clave(llave):
+            guardada = _cache().get(llave)
+            if guardada:
+                return _repetir(guardada, huella)
+
+            reserva, existente = _reservar(llave, huella)
+            if existente is not None:
+                if existente.estado != 'completada':
+                    return jsonify({'error': 'Hay una petición en curso con esta clave'}), 409
+                guardada = (existente.huella, existente.codigo_estado, existente.respuesta)
+                _cache().set(llave, guardada, ttl=_ttl())
+                return _repetir(guardada, huella)
+
+            try:
+                respuesta = make_response(vista(*args, **kwargs))
+            except Exception:
+                db.session.rollback()
+                _liberar(llave, reserva)
+                raise
+
+            if respuesta.status_code >= 500 or respuesta.status_code == 409:
+                _liberar(llave, reserva)
+                return respuesta
+
+            # Solo si la reserva sigue siendo nuestra: si se venció y otra
+            # petición la reclamó, su resultado es el que queda guardado
+            cuerpo = respuesta.get_data(as_text=True)
+            _filtro(llave).filter_by(fecha=reserva).update({
+                'estado': 'completada', 'codigo_estado': respuesta.status_code, 'respuesta': cuerpo
+            }, synchronize_session=False)
+            db.session.commit()
+
+            _cache().set(llave, (huella, respuesta.status_code, cuerpo), ttl=_ttl())
+            return respuesta
+
+    return envoltura
+
+
+def _ttl():
+    return current_app.config.get('IDEMPOTENCIA_TTL', 24 * 3600)
+
+
+def _liberar(llave, reserva):
+    """Elimina la reserva para que un reintento vuelva a ejecutar la vista."""
+    _filtro(llave).filter_by(fecha=reserva).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def purgar(antes=None):
+    """
+    Borra las claves reservadas antes de `antes` (por defecto, hace
+    IDEMPOTENCIA_TTL segundos) y retorna cuántas borró. Después de eso la
+    misma clave vuelve a ejecutar la vista.
+    """
+    if antes is None:
+        antes = datetime.utcnow() - timedelta(seconds=_ttl())
+    borradas = ClaveIdempotencia.query.filter(ClaveIdempotencia.fecha < antes).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return borradas
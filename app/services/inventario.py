@@ -0,0 +1,158 @@
+# app/services/inventario.py
+import random
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.inventario import InventarioSlot, ReservaInventario
+from app.models.producto import Producto
+
+
+class StockInsuficienteError(Exception):
+    """Se lanza cuando un UPDATE condicional no pudo descontar el stock."""
+
+
+def fragmentar(producto, n_slots, total=None):
+    """
+    Reparte el stock conciliado del producto (o `total`, si se da) en
+    `n_slots` sub-contadores.
+    Con n_slots <= 1 el producto se consolida de nuevo en su fila.
+    Las reservas activas no se tocan: sus unidades ya salieron de los slots.
+    """
+    total = producto.stock_total if total is None else total
+    producto.slots.clear()
+    db.session.flush()
+
+    if n_slots <= 1:
+        producto.stock = total
+        return producto
+
+    base, resto = divmod(total, n_slots)
+    for i in range(n_slots):
+        producto.slots.append(InventarioSlot(slot=i, stock=base + (1 if i < resto else 0)))
+    producto.stock = 0
+    db.session.flush()
+    return producto
+
+
+def descontar(producto, cantidad):
+    """
+    Descuenta `cantidad` de los slots del producto empezando por uno al azar,
+    para que compras concurrentes se repartan entre filas distintas. Cada
+    descuento es un UPDATE ... WHERE stock >= :cantidad, así que un slot nunca
+    queda negativo aunque otra transacción lo haya tocado después de leerlo.
+    Retorna el número de slot del que salieron las primeras unidades.
+    """
+    slots = list(producto.slots)
+    inicio = random.randrange(len(slots))
+    slots = slots[inicio:] + slots[:inicio]
+
+    tabla = InventarioSlot.__table__
+    restante = cantidad
+    primero = None
+    for slot in slots:
+        tomar = min(slot.stock, restante)
+        if tomar <= 0:
+            continue
+        resultado = db.session.execute(
+            tabla.update()
+            .where(tabla.c.id == slot.id, tabla.c.stock >= tomar)
+            .values(stock=tabla.c.stock - tomar)
+        )
+        if resultado.rowcount:
+            restante -= tomar
+            primero = slot.slot if primero is None else primero
+        if restante == 0:
+            break
+
+    for slot in slots:
+        db.session.expire(slot, ['stock'])
+
+    if restante:
+        raise StockInsuficienteError()
+    return primero
+
+
+def _devolver(producto_id, slot, cantidad):
+    """Regresa unidades al slot de origen (o a la fila si ya no existe)."""
+    slots = InventarioSlot.__table__
+    resultado = db.session.execute(
+        slots.update()
+        .where(slots.c.producto_id == producto_id, slots.c.slot == slot)
+        .values(stock=slots.c.stock + cantidad)
+    )
+    if not resultado.rowcount:
+        productos = Producto.__table__
+        db.session.execute(
+            productos.update()
+            .where(productos.c.id == producto_id)
+            .values(stock=productos.c.stock + cantidad)
+        )
+
+
+def _cambiar_estado(reserva_id, nuevo_estado, orden_id=None):
+    """Pasa una reserva activa a otro estado. Retorna False si ya no estaba activa."""
+    tabla = ReservaInventario.__table__
+    valores = {'estado': nuevo_estado}
+    if orden_id is not None:
+        valores['orden_id'] = orden_id
+    resultado = db.session.execute(
+        tabla.update()
+        .where(tabla.c.id == reserva_id, tabla.c.estado == 'activa')
+        .values(**valores)
+    )
+    return resultado.rowcount == 1
+
+
+def reservar(producto, cantidad, ttl_segundos):
+    """Aparta unidades de un producto fragmentado por `ttl_segundos`."""
+    liberar_expiradas(producto_id=producto.id)
+    slot = descontar(producto, cantidad)
+    reserva = ReservaInventario(
+        producto_id=producto.id,
+        slot=slot,
+        cantidad=cantidad,
+        expira=datetime.utcnow() + timedelta(seconds=ttl_segundos)
+    )
+    db.session.add(reserva)
+    db.session.flush()
+    return reserva
+
+
+def liberar(reserva):
+    """Cancela una reserva activa y regresa sus unidades."""
+    if _cambiar_estado(reserva.id, 'liberada'):
+        _devolver(reserva.producto_id, reserva.slot, reserva.cantidad)
+        db.session.expire(reserva)
+        return True
+    return False
+
+
+def confirmar(reserva, orden_id):
+    """Marca una reserva como usada por una orden (las unidades ya se descontaron)."""
+    confirmada = _cambiar_estado(reserva.id, 'confirmada', orden_id=orden_id)
+    db.session.expire(reserva)
+    return confirmada
+
+
+def liberar_expiradas(producto_id=None, ahora=None):
+    """
+    Regresa al inventario las unidades de las reservas activas vencidas.
+    El cambio de estado es condicional, así que dos procesos que limpien a la
+    vez no devuelven las mismas unidades dos veces. Retorna cuántas liberó.
+    """
+    ahora = ahora or datetime.utcnow()
+    consulta = db.session.query(
+        ReservaInventario.id, ReservaInventario.producto_id,
+        ReservaInventario.slot, ReservaInventario.cantidad
+    ).filter(
+        ReservaInventario.estado == 'activa',
+        ReservaInventario.expira < ahora
+    )
+    if producto_id is not None:
+        consulta = consulta.filter(ReservaInventario.producto_id == producto_id)
+
+    liberadas = 0
+    for reserva_id, pid, slot, cantidad in consulta.all():
+        if _cambiar_estado(reserva_id, 'expirada'):
+            _devolver(pid, slot, cantidad)
+            liberadas += 1
+    return liberadas
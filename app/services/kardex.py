@@ -0,0 +1,95 @@
+# app/services/kardex.py
+from itertools import groupby
+from sqlalchemy import Integer, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.extensions import db
+from app.models.calificacion import Calificacion
+from app.models.estudiante import Estudiante
+from app.models.materia import Materia
+
+CALIFICACION_APROBATORIA = 60
+
+
+def consulta_kardex(*filtros):
+    """
+    Una fila por calificación con los datos de la materia, más los agregados
+    del estudiante calculados por la base con funciones de ventana
+    (promedio, promedio ponderado por créditos y materias aprobadas).
+    Parte de `estudiantes` con LEFT JOIN para distinguir "estudiante sin
+    calificaciones" (una fila con calificacion NULL) de "no existe" (sin filas).
+    Las filas salen ordenadas por estudiante, periodo y clave de materia.
+    """
+    por_estudiante = {'partition_by': Estudiante.id}
+    creditos = func.sum(Materia.creditos).over(**por_estudiante)
+    puntos = func.sum(Calificacion.calificacion * Materia.creditos).over(**por_estudiante)
+
+    return (
+        select(
+            Estudiante.id.label('estudiante_id'),
+            Estudiante.nombre.label('nombre_estudiante'),
+            Calificacion.materia_id,
+            Materia.clave,
+            Materia.nombre.label('materia'),
+            Materia.creditos,
+            Calificacion.calificacion,
+            Calificacion.periodo,
+            Calificacion.fecha_evaluacion,
+            func.avg(Calificacion.calificacion).over(**por_estudiante).label('promedio'),
+            (puntos / func.nullif(creditos, 0)).label('promedio_ponderado'),
+            func.count(Calificacion.id)
+                .filter(Calificacion.calificacion >= CALIFICACION_APROBATORIA)
+                .over(**por_estudiante).label('materias_aprobadas'),
+        )
+        .select_from(Estudiante)
+        .outerjoin(Calificacion, Calificacion.estudiante_id == Estudiante.id)
+        .outerjoin(Materia, Materia.id == Calificacion.materia_id)
+        .where(*filtros)
+        .order_by(Estudiante.id, Calificacion.periodo, Materia.clave, Calificacion.id)
+    )
+
+
+def _numero(valor):
+    return float(valor) if valor is not None else None
+
+
+def filtro_por_ids(ids):
+    """
+    Filtro de estudiantes por una lista de ids (ya validados como enteros)
+    que cabe en una sola consulta sin importar su tamaño: en PostgreSQL
+    `id = ANY(:ids)` con un solo parámetro de tipo arreglo; en SQLite los
+    enteros se escriben en el IN (literal_execute), así no se rebasa su
+    límite de parámetros.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return Estudiante.id == any_(bindparam('ids', ids, type_=ARRAY(Integer)))
+    return Estudiante.id.in_(bindparam('ids', ids, expanding=True, literal_execute=True))
+
+
+def armar_kardex(filas):
+    """
+    Agrupa las filas de `consulta_kardex` y produce un kardex por estudiante.
+    Funciona sobre un iterador, así que no necesita tener todas las filas
+    en memoria a la vez.
+    """
+    for estudiante_id, grupo in groupby(filas, key=lambda f: f.estudiante_id):
+        primera = next(grupo)
+        calificadas = [] if primera.calificacion is None else [primera, *grupo]
+        yield {
+            'estudiante_id': estudiante_id,
+            'nombre_estudiante': primera.nombre_estudiante,
+            'kardex': [
+                {
+                    'materia_id': f.materia_id,
+                    'clave': f.clave,
+                    'materia': f.materia,
+                    'creditos': f.creditos,
+                    'calificacion': float(f.calificacion),
+                    'periodo': f.periodo,
+                    'fecha_evaluacion': f.fecha_evaluacion.isoformat()
+                }
+                for f in calificadas
+            ],
+            'promedio': _numero(primera.promedio) or 0,
+            'promedio_ponderado': _numero(primera.promedio_ponderado) or 0,
+            'materias_aprobadas': primera.materias_aprobadas
+        }
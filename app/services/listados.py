@@ -0,0 +1,64 @@
+# app/services/listados.py
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+VALORES_VERDADEROS = ('1', 'true', 'si', 'sí')
+
+
+def en_flujo():
+    return request.args.get('stream', '').lower() in VALORES_VERDADEROS
+
+
+def paginado():
+    return 'pagina' in request.args or 'per_page' in request.args
+
+
+def _arreglo_json(consulta, campos, tamano_lote):
+    """
+    Genera el arreglo JSON por pedazos: yield_per lee `tamano_lote` filas a
+    la vez (cursor del servidor en PostgreSQL) y cada lote se serializa y se
+    suelta antes de pedir el siguiente, así la memoria no depende del total.
+    """
+    dumps = current_app.json.dumps
+    separador = ''
+    yield '['
+    lote = []
+    for objeto in consulta.yield_per(tamano_lote):
+        lote.append(dumps(objeto.to_dict(campos), separators=(',', ':')))
+        if len(lote) == tamano_lote:
+            yield separador + ','.join(lote)
+            separador, lote = ',', []
+    if lote:
+        yield separador + ','.join(lote)
+    yield ']'
+
+
+def responder_listado(consulta, nombre, campos=None):
+    """
+    Responde un listado de catálogo. `consulta` ya trae sus opciones de carga
+    y un orden estable. Modos:
+    - ?stream=1: el mismo arreglo que sin parámetros, pero transmitido
+      mientras se lee (LISTADOS_STREAM_LOTE filas por lote).
+    - ?pagina= y/o ?per_page=: {nombre: [...], pagina, total_paginas,
+      total_<nombre>}, como el listado de estudiantes; per_page se limita a
+      LISTADOS_MAX_PER_PAGE.
+    - sin parámetros: el arreglo completo en una sola respuesta.
+    """
+    if en_flujo():
+        generador = _arreglo_json(consulta, campos, current_app.config.get('LISTADOS_STREAM_LOTE', 1000))
+        return Response(stream_with_context(generador), mimetype='application/json')
+
+    if paginado():
+        pagina = request.args.get('pagina', type=int, default=1)
+        per_page = request.args.get('per_page', type=int, default=20)
+        resultado = consulta.paginate(
+            page=pagina, per_page=per_page, error_out=False,
+            max_per_page=current_app.config.get('LISTADOS_MAX_PER_PAGE', 100)
+        )
+        return jsonify({
+            nombre: [objeto.to_dict(campos) for objeto in resultado.items],
+            'pagina': resultado.page,
+            'total_paginas': resultado.pages,
+            f'total_{nombre}': resultado.total
+        }), 200
+
+    return jsonify([objeto.to_dict(campos) for objeto in consulta.all()]), 200
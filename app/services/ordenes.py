@@ -0,0 +1,273 @@
+# app/services/ordenes.py
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, insert
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models.orden import Orden
+from app.models.detalle_orden import DetalleOrden
+from app.models.producto import Producto
+from app.models.inventario import ReservaInventario
+from app.services import inventario, rollups
+from app.services.inventario import StockInsuficienteError
+
+MODOS_LOTE = ("todo_o_nada", "mejor_esfuerzo")
+
+
+def cargar_productos(ids):
+    """
+    Carga todos los productos solicitados con UNA sola consulta IN (...)
+    y bloquea las filas cuyo stock se va a descontar directamente.
+
+    En PostgreSQL se emite SELECT ... FOR UPDATE (ordenado por id para que
+    dos órdenes concurrentes tomen los bloqueos en el mismo orden y no haya
+    deadlocks). SQLite no soporta FOR UPDATE y la cláusula se omite; ahí la
+    serialización la garantiza el UPDATE condicional de descontar_stock,
+    porque SQLite solo admite un escritor a la vez.
+
+    Los productos fragmentados en slots (ver app.services.inventario) no se
+    bloquean: su stock vive en los slots y bloquear la fila del producto
+    volvería a serializar todas las compras de ese SKU.
+    """
+    if not ids:
+        return {}
+    productos = {p.id: p for p in Producto.query.options(selectinload(Producto.slots))
+                 .filter(Producto.id.in_(ids)).all()}
+
+    directos = [pid for pid, p in productos.items() if not p.slots]
+    if directos:
+        (Producto.query
+         .filter(Producto.id.in_(directos))
+         .order_by(Producto.id)
+         .with_for_update()
+         .populate_existing()
+         .options(selectinload(Producto.slots))
+         .all())
+    return productos
+
+
+def cargar_reservas(items):
+    """Carga con una sola consulta las reservas que traen las líneas de la orden."""
+    ids = {item["reserva_id"] for item in items if item.get("reserva_id")}
+    if not ids:
+        return {}
+    return {r.id: r for r in ReservaInventario.query.filter(ReservaInventario.id.in_(ids)).all()}
+
+
+def descontar_stock(cantidades, productos=None):
+    """
+    Descuenta el stock con un UPDATE condicional por producto:
+        UPDATE productos SET stock = stock - :qty
+        WHERE id = :pid AND stock >= :qty
+    enviado como un solo executemany. Si alguna fila no se actualizó, otra
+    transacción se llevó el stock y se lanza StockInsuficienteError.
+    Los productos fragmentados descuentan de sus slots.
+    """
+    productos = productos or {}
+    fragmentados = {pid: qty for pid, qty in cantidades.items()
+                    if pid in productos and productos[pid].slots}
+    for pid, qty in fragmentados.items():
+        inventario.descontar(productos[pid], qty)
+
+    cantidades = {pid: qty for pid, qty in cantidades.items() if pid not in fragmentados}
+    if not cantidades:
+        return
+
+    tabla = Producto.__table__
+    stmt = (
+        tabla.update()
+        .where(tabla.c.id == bindparam('pid'), tabla.c.stock >= bindparam('qty'))
+        .values(stock=tabla.c.stock - bindparam('qty'))
+    )
+    parametros = [{'pid': pid, 'qty': qty} for pid, qty in cantidades.items()]
+    conexion = db.session.connection()
+    resultado = conexion.execute(stmt, parametros)
+
+    # Con FOR UPDATE (PostgreSQL) las filas ya estaban bloqueadas y validadas;
+    # cuando el driver reporta el conteo real de executemany se verifica igual.
+    if conexion.dialect.supports_sane_multi_rowcount and resultado.rowcount != len(parametros):
+        raise StockInsuficienteError()
+
+
+def confirmar_reservas(detalles, orden_id):
+    """Marca como usadas las reservas de la orden; si alguna expiró entretanto, falla."""
+    for d in detalles:
+        if d.get("reserva") and not inventario.confirmar(d["reserva"], orden_id):
+            raise StockInsuficienteError()
+
+
+def error_de_linea(indice, item):
+    """
+    Revisa la forma de una línea: producto_id entero y cantidad entera
+    mayor a cero. Una cantidad negativa pasaría el UPDATE condicional
+    (stock >= -n) y sumaría stock. Retorna el mensaje de error o None.
+    """
+    if not isinstance(item, dict) or "producto_id" not in item:
+        return f"Línea {indice}: producto_id es requerido"
+    if isinstance(item["producto_id"], bool) or not isinstance(item["producto_id"], int):
+        return f"Línea {indice}: producto_id debe ser un entero"
+    cantidad = item.get("cantidad")
+    if isinstance(cantidad, bool) or not isinstance(cantidad, int) or cantidad <= 0:
+        return f"Línea {indice}: cantidad debe ser un entero mayor a cero"
+    return None
+
+
+def validar_orden(datos):
+    """
+    Revisión de la forma de una orden (sin tocar la base): objeto con
+    cliente_id y una lista no vacía de líneas válidas. Retorna los errores.
+    """
+    if not isinstance(datos, dict):
+        return ["Se esperaba un objeto JSON"]
+    errores = []
+    if "cliente_id" not in datos:
+        errores.append("El campo cliente_id es requerido")
+    productos = datos.get("productos")
+    if not isinstance(productos, list) or not productos:
+        errores.append("Se requiere una lista de productos")
+        return errores
+    for indice, item in enumerate(productos):
+        error = error_de_linea(indice, item)
+        if error:
+            errores.append(error)
+    return errores
+
+
+def validar_items(items, productos, disponible=None, reservas=None):
+    """
+    Valida las líneas de la orden contra el mapa de productos ya cargado.
+    `disponible` es el stock restante por producto; en lotes se comparte
+    entre órdenes para que cada una vea lo que dejaron las anteriores.
+    Las líneas con "reserva_id" usan unidades ya apartadas y no descuentan stock.
+    Las líneas mal formadas (ver error_de_linea) invalidan toda la orden.
+    Retorna (detalles, cantidades_por_producto, total, errores).
+    """
+    errores_forma = [e for e in (error_de_linea(i, item) for i, item in enumerate(items)) if e]
+    if errores_forma:
+        return [], {}, 0, errores_forma
+
+    if disponible is None:
+        disponible = {pid: p.stock_total for pid, p in productos.items()}
+    reservas = reservas or {}
+    ahora = datetime.utcnow()
+
+    total = 0
+    detalles = []
+    errores = []
+    cantidades = defaultdict(int)
+
+    for item in items:
+        if not item.get("reserva_id"):
+            cantidades[item["producto_id"]] += item["cantidad"]
+
+    for item in items:
+        producto = productos.get(item["producto_id"])
+        if not producto:
+            errores.append(f"Producto ID {item['producto_id']} no existe")
+            continue
+
+        reserva = None
+        if item.get("reserva_id"):
+            reserva = reservas.get(item["reserva_id"])
+            if (not reserva or reserva.estado != "activa" or reserva.expira <= ahora
+                    or reserva.producto_id != producto.id or reserva.cantidad != item["cantidad"]):
+                errores.append(f"Reserva {item['reserva_id']} inválida o expirada para {producto.nombre}")
+                continue
+        elif disponible[producto.id] < cantidades[producto.id]:
+            errores.append(f"Stock insuficiente para {producto.nombre}. Disponible: {disponible[producto.id]}")
+            continue
+
+        subtotal = float(producto.precio) * item["cantidad"]
+        total += subtotal
+        detalles.append({
+            "producto": producto,
+            "cantidad": item["cantidad"],
+            "precio_unitario": float(producto.precio),
+            "reserva": reserva
+        })
+
+    return detalles, cantidades, total, errores
+
+
+def lineas_rollup(detalles):
+    """Convierte los detalles validados al formato de rollups.registrar_ventas."""
+    return [(d["producto"].id, d["cantidad"], d["precio_unitario"]) for d in detalles]
+
+
+def crear_ordenes(ordenes, modo="todo_o_nada"):
+    """
+    Valida e inserta un lote de órdenes contra un solo mapa de productos.
+    No hace commit: el llamador confirma o revierte la transacción.
+
+    - todo_o_nada: si alguna orden es inválida no se inserta ninguna.
+    - mejor_esfuerzo: se insertan las válidas.
+    Retorna (resultados, procesadas); cada resultado lleva "indice", "ok" y
+    "orden_id"/"total" o "errores". Lanza StockInsuficienteError si otra
+    transacción se llevó el stock entre la validación y el descuento.
+    """
+    # Un solo mapa de productos (y un solo bloqueo) para todo el lote; las
+    # órdenes mal formadas no aportan líneas
+    errores_forma = [validar_orden(orden) for orden in ordenes]
+    items = [item for orden, errores in zip(ordenes, errores_forma) if not errores
+             for item in orden["productos"]]
+    productos = cargar_productos({item["producto_id"] for item in items})
+    disponible = {pid: p.stock_total for pid, p in productos.items()}
+    reservas = cargar_reservas(items)
+
+    resultados = []
+    validas = []
+    cantidades_lote = defaultdict(int)
+
+    for indice, orden in enumerate(ordenes):
+        if errores_forma[indice]:
+            resultados.append({"indice": indice, "ok": False, "errores": errores_forma[indice]})
+            continue
+
+        detalles, cantidades, total, errores = validar_items(
+            orden["productos"], productos, disponible, reservas
+        )
+        if errores:
+            resultados.append({"indice": indice, "ok": False, "errores": errores})
+            continue
+
+        # Reservar el stock en memoria para las órdenes siguientes del lote
+        for pid, cantidad in cantidades.items():
+            disponible[pid] -= cantidad
+            cantidades_lote[pid] += cantidad
+
+        resultado = {"indice": indice, "ok": True, "total": total}
+        resultados.append(resultado)
+        validas.append((resultado, orden["cliente_id"], total, detalles))
+
+    if not validas or (modo == "todo_o_nada" and len(validas) < len(ordenes)):
+        return resultados, 0
+
+    descontar_stock(cantidades_lote, productos)
+
+    # Inserción masiva de órdenes conservando el orden de los parámetros
+    fecha = datetime.utcnow()
+    ids_ordenes = db.session.scalars(
+        insert(Orden).returning(Orden.id, sort_by_parameter_order=True),
+        [{"cliente_id": cliente_id, "total": total, "fecha": fecha} for _, cliente_id, total, _ in validas]
+    ).all()
+
+    filas_detalle = []
+    for (resultado, _, _, detalles), orden_id in zip(validas, ids_ordenes):
+        resultado["orden_id"] = orden_id
+        for d in detalles:
+            filas_detalle.append({
+                "orden_id": orden_id,
+                "producto_id": d["producto"].id,
+                "cantidad": d["cantidad"],
+                "precio_unitario": d["precio_unitario"]
+            })
+    db.session.execute(insert(DetalleOrden), filas_detalle)
+
+    for resultado, _, _, detalles in validas:
+        confirmar_reservas(detalles, resultado["orden_id"])
+
+    rollups.registrar_ventas([
+        (fecha, total, lineas_rollup(detalles)) for _, _, total, detalles in validas
+    ])
+
+    return resultados, len(validas)
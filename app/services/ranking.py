@@ -0,0 +1,48 @@
+# app/services/ranking.py
+from sqlalchemy import Float, cast, func, select, tuple_
+from app.models.estudiante import Estudiante
+from app.models.estudiante_resumen import EstudianteResumen
+
+FUNCIONES_RANKING = {'rank': func.rank, 'dense_rank': func.dense_rank}
+
+
+def consulta_ranking(*filtros, top=10, tipo='rank', despues_de=None, limite=50):
+    """
+    Ranking de estudiantes activos por promedio dentro de cada
+    (carrera, semestre), en una sola consulta: RANK()/DENSE_RANK() sobre el
+    resumen académico ya agregado (estudiante_resumen), sin agrupar
+    calificaciones. Se quedan las posiciones <= top (con empates pueden ser
+    más de `top` estudiantes por grupo).
+
+    La paginación es por cursor: `despues_de` es la tupla
+    (carrera, semestre, posicion, estudiante_id) de la última fila de la
+    página anterior. Se piden limite + 1 filas para saber si hay más.
+    """
+    promedio = cast(EstudianteResumen.suma_calificaciones, Float) / EstudianteResumen.total_calificaciones
+    posicion = FUNCIONES_RANKING[tipo]().over(
+        partition_by=(Estudiante.carrera, Estudiante.semestre),
+        order_by=promedio.desc()
+    )
+    rankeados = (
+        select(
+            Estudiante.id.label('estudiante_id'),
+            Estudiante.matricula,
+            Estudiante.nombre,
+            Estudiante.apellido,
+            Estudiante.carrera,
+            Estudiante.semestre,
+            promedio.label('promedio'),
+            EstudianteResumen.aprobadas,
+            EstudianteResumen.creditos_aprobados,
+            posicion.label('posicion'),
+        )
+        .join(EstudianteResumen, EstudianteResumen.estudiante_id == Estudiante.id)
+        .where(Estudiante.activo.is_(True), EstudianteResumen.total_calificaciones > 0, *filtros)
+        .subquery()
+    )
+    orden = (rankeados.c.carrera, rankeados.c.semestre, rankeados.c.posicion, rankeados.c.estudiante_id)
+
+    consulta = select(rankeados).where(rankeados.c.posicion <= top)
+    if despues_de is not None:
+        consulta = consulta.where(tuple_(*orden) > tuple(despues_de))
+    return consulta.order_by(*orden).limit(limite + 1)
@@ -0,0 +1,142 @@
+# app/services/resumen_academico.py
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import case, delete, event, func, insert, inspect, select
+from app.extensions import db
+from app.models.calificacion import Calificacion
+from app.models.estudiante_resumen import EstudianteResumen
+from app.models.materia import Materia
+from app.services.kardex import CALIFICACION_APROBATORIA
+from app.services.rollups import _insert_con_suma
+
+TAMANO_BLOQUE = 500
+COLUMNAS_SUMA = ['suma_calificaciones', 'total_calificaciones', 'aprobadas', 'creditos_aprobados']
+
+
+def _en_bloques(valores):
+    valores = sorted(valores)
+    for i in range(0, len(valores), TAMANO_BLOQUE):
+        yield valores[i:i + TAMANO_BLOQUE]
+
+
+def aplicar_cambios(conexion, cambios):
+    """
+    Suma al resumen los cambios [(estudiante_id, materia_id, calificacion, signo)]
+    con signo +1 (alta) o -1 (baja). Los contadores se actualizan con un
+    INSERT ... ON CONFLICT DO UPDATE (col = col + excluded.col) y el último
+    periodo se recalcula para los estudiantes tocados. No hace commit.
+    """
+    if not cambios:
+        return
+
+    creditos = {}
+    for bloque in _en_bloques({materia_id for _, materia_id, _, _ in cambios}):
+        creditos.update((materia_id, valor) for materia_id, valor in conexion.execute(
+            select(Materia.id, Materia.creditos).where(Materia.id.in_(bloque))
+        ))
+
+    por_estudiante = defaultdict(lambda: [Decimal(0), 0, 0, 0])
+    for estudiante_id, materia_id, calificacion, signo in cambios:
+        calificacion = Decimal(str(calificacion))
+        delta = por_estudiante[estudiante_id]
+        delta[0] += signo * calificacion
+        delta[1] += signo
+        if calificacion >= CALIFICACION_APROBATORIA:
+            delta[2] += signo
+            delta[3] += signo * creditos.get(materia_id, 0)
+
+    conexion.execute(
+        _insert_con_suma(EstudianteResumen, ['estudiante_id'], COLUMNAS_SUMA),
+        [dict(zip(['estudiante_id', *COLUMNAS_SUMA], [estudiante_id, *delta]))
+         for estudiante_id, delta in sorted(por_estudiante.items())]
+    )
+
+    tabla = EstudianteResumen.__table__
+    ultimo = (select(func.max(Calificacion.periodo))
+              .where(Calificacion.estudiante_id == tabla.c.estudiante_id)
+              .scalar_subquery())
+    for bloque in _en_bloques(por_estudiante):
+        conexion.execute(
+            tabla.update().where(tabla.c.estudiante_id.in_(bloque)).values(ultimo_periodo=ultimo)
+        )
+
+
+def reconstruir():
+    """Recalcula todo el resumen desde calificaciones con un INSERT ... SELECT. No hace commit."""
+    aprobada = Calificacion.calificacion >= CALIFICACION_APROBATORIA
+    agregados = (
+        select(Calificacion.estudiante_id,
+               func.sum(Calificacion.calificacion),
+               func.count(Calificacion.id),
+               func.sum(case((aprobada, 1), else_=0)),
+               func.coalesce(func.sum(case((aprobada, Materia.creditos), else_=0)), 0),
+               func.max(Calificacion.periodo))
+        .outerjoin(Materia, Materia.id == Calificacion.materia_id)
+        .group_by(Calificacion.estudiante_id)
+    )
+    db.session.execute(delete(EstudianteResumen))
+    db.session.execute(
+        insert(EstudianteResumen).from_select(
+            ['estudiante_id', *COLUMNAS_SUMA, 'ultimo_periodo'], agregados
+        )
+    )
+
+
+def recalcular_creditos(conexion, materia_ids):
+    """
+    Recalcula creditos_aprobados de los estudiantes con alguna calificación
+    aprobatoria en `materia_ids`, para cuando cambian los créditos de una
+    materia. Lee el estado ya escrito, así que también cuadra con las
+    calificaciones del mismo flush. No hace commit.
+    """
+    tabla = EstudianteResumen.__table__
+    aprobada = Calificacion.calificacion >= CALIFICACION_APROBATORIA
+    creditos = (select(func.coalesce(func.sum(Materia.creditos), 0))
+                .select_from(Calificacion)
+                .join(Materia, Materia.id == Calificacion.materia_id)
+                .where(Calificacion.estudiante_id == tabla.c.estudiante_id, aprobada)
+                .scalar_subquery())
+    afectados = select(Calificacion.estudiante_id).where(Calificacion.materia_id.in_(materia_ids), aprobada)
+    conexion.execute(
+        tabla.update().where(tabla.c.estudiante_id.in_(afectados)).values(creditos_aprobados=creditos)
+    )
+
+
+# ─── Cambios hechos con el ORM ───────────────────────────────────────
+
+def _valores(objeto, anteriores):
+    """(estudiante_id, materia_id, calificacion, periodo) antes o después del cambio."""
+    estado = inspect(objeto)
+    valores = []
+    for campo in ('estudiante_id', 'materia_id', 'calificacion', 'periodo'):
+        historial = estado.attrs[campo].history
+        if anteriores and historial.deleted:
+            valores.append(historial.deleted[0])
+        else:
+            valores.append(getattr(objeto, campo))
+    return valores
+
+
+@event.listens_for(db.session, 'after_flush')
+def _actualizar_resumen(session, contexto):
+    cambios = []
+    materias = []
+    for objeto in session.new:
+        if isinstance(objeto, Calificacion):
+            cambios.append((*_valores(objeto, False)[:3], 1))
+    for objeto in session.deleted:
+        if isinstance(objeto, Calificacion):
+            cambios.append((*_valores(objeto, True)[:3], -1))
+    for objeto in session.dirty:
+        if isinstance(objeto, Calificacion) and session.is_modified(objeto):
+            antes, despues = _valores(objeto, True), _valores(objeto, False)
+            if antes != despues:
+                # Un cambio solo de periodo se compensa en los contadores
+                # pero recalcula el último periodo del estudiante
+                cambios += [(*antes[:3], -1), (*despues[:3], 1)]
+        elif isinstance(objeto, Materia) and inspect(objeto).attrs['creditos'].history.deleted:
+            materias.append(objeto.id)
+    if cambios:
+        aplicar_cambios(session.connection(), cambios)
+    if materias:
+        recalcular_creditos(session.connection(), materias)
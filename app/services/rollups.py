@@ -0,0 +1,178 @@
+# app/services/rollups.py
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select
+from app.extensions import db
+from app.models.orden import Orden
+from app.models.detalle_orden import DetalleOrden
+from app.models.venta_diaria import VentaDiaria, VentaDiariaProducto
+from app.services.cache_reportes import TODOS, marcar_meses
+from app.services.sketch import marcar_lineas
+
+
+def _insert_con_suma(modelo, llaves, columnas):
+    """
+    INSERT ... ON CONFLICT (llaves) DO UPDATE SET col = col + excluded.col
+    para PostgreSQL y SQLite (ambos soportan ON CONFLICT).
+    """
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        raise NotImplementedError(f"Rollups no soportados en {dialecto}")
+
+    tabla = modelo.__table__
+    stmt = insert_dialecto(tabla)
+    return stmt.on_conflict_do_update(
+        index_elements=llaves,
+        set_={c: tabla.c[c] + stmt.excluded[c] for c in columnas}
+    )
+
+
+def _como_fecha(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def registrar_ventas(ordenes):
+    """
+    Suma un grupo de órdenes recién insertadas a los rollups diarios.
+    `ordenes` es una lista de (fecha, total, detalles) con detalles como
+    [(producto_id, cantidad, precio_unitario), ...]. No hace commit: debe
+    llamarse dentro de la transacción que crea las órdenes.
+
+    Las filas se envían ordenadas por llave para que transacciones
+    concurrentes tomen los bloqueos de las filas del día en el mismo orden.
+    Al hacer commit, los meses tocados se invalidan en la caché de reportes
+    y las líneas se suman al sketch de productos más vendidos.
+    """
+    por_dia = defaultdict(lambda: [0, Decimal(0)])
+    por_producto = defaultdict(lambda: [0, Decimal(0)])
+
+    for fecha, total, detalles in ordenes:
+        dia = _como_fecha(fecha)
+        por_dia[dia][0] += 1
+        por_dia[dia][1] += Decimal(str(total))
+        for producto_id, cantidad, precio in detalles:
+            if producto_id is None:
+                continue
+            por_producto[(dia, producto_id)][0] += cantidad
+            por_producto[(dia, producto_id)][1] += Decimal(str(precio)) * cantidad
+
+    marcar_meses(por_dia)
+    marcar_lineas(por_producto, len(ordenes))
+    if por_dia:
+        db.session.execute(
+            _insert_con_suma(VentaDiaria, ['fecha'], ['total_ordenes', 'ingresos']),
+            [{'fecha': dia, 'total_ordenes': n, 'ingresos': ingresos}
+             for dia, (n, ingresos) in sorted(por_dia.items())]
+        )
+    if por_producto:
+        db.session.execute(
+            _insert_con_suma(VentaDiariaProducto, ['fecha', 'producto_id'], ['unidades', 'revenue']),
+            [{'fecha': dia, 'producto_id': pid, 'unidades': u, 'revenue': r}
+             for (dia, pid), (u, r) in sorted(por_producto.items())]
+        )
+
+
+def rango_fechas(desde=None, hasta=None):
+    """
+    Filtros de rango semiabierto [desde, hasta) sobre Orden.fecha.
+    Comparar la columna directamente (en lugar de extract/date) permite
+    usar el índice ix_ordenes_fecha.
+    """
+    filtros = []
+    if desde is not None:
+        filtros.append(Orden.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta is not None:
+        filtros.append(Orden.fecha < datetime.combine(hasta, datetime.min.time()))
+    return filtros
+
+
+def _agregados_crudos(desde=None, hasta=None):
+    """Consultas de agregación sobre las tablas de órdenes (fuente de verdad)."""
+    dia = func.date(Orden.fecha)
+    filtros = rango_fechas(desde, hasta)
+    resumen = (
+        select(dia.label('fecha'),
+               func.count(Orden.id).label('total_ordenes'),
+               func.coalesce(func.sum(Orden.total), 0).label('ingresos'))
+        .where(*filtros)
+        .group_by(dia)
+    )
+    productos = (
+        select(dia.label('fecha'),
+               DetalleOrden.producto_id,
+               func.sum(DetalleOrden.cantidad).label('unidades'),
+               func.sum(DetalleOrden.cantidad * DetalleOrden.precio_unitario).label('revenue'))
+        .join(Orden, DetalleOrden.orden_id == Orden.id)
+        .where(DetalleOrden.producto_id.isnot(None), *filtros)
+        .group_by(dia, DetalleOrden.producto_id)
+    )
+    return resumen, productos
+
+
+def _rango_rollup(modelo, desde=None, hasta=None):
+    filtros = []
+    if desde is not None:
+        filtros.append(modelo.fecha >= desde)
+    if hasta is not None:
+        filtros.append(modelo.fecha < hasta)
+    return filtros
+
+
+def reconstruir(desde=None, hasta=None):
+    """
+    Borra los rollups del rango [desde, hasta) (todos si no se indica) y los
+    recalcula con dos INSERT ... SELECT. Al hacer commit se invalida toda la
+    caché de reportes.
+    """
+    marcar_meses([TODOS])
+    resumen, productos = _agregados_crudos(desde, hasta)
+    db.session.execute(delete(VentaDiariaProducto).where(*_rango_rollup(VentaDiariaProducto, desde, hasta)))
+    db.session.execute(delete(VentaDiaria).where(*_rango_rollup(VentaDiaria, desde, hasta)))
+    db.session.execute(
+        insert(VentaDiaria).from_select(['fecha', 'total_ordenes', 'ingresos'], resumen)
+    )
+    db.session.execute(
+        insert(VentaDiariaProducto).from_select(['fecha', 'producto_id', 'unidades', 'revenue'], productos)
+    )
+
+
+def _dinero(valor):
+    return Decimal(str(valor)).quantize(Decimal('0.01'))
+
+
+def _normalizar_fecha(valor):
+    # SQLite regresa func.date() como texto; PostgreSQL como date
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def verificar(desde=None, hasta=None):
+    """
+    Compara los rollups del rango [desde, hasta) contra los datos crudos.
+    Retorna una lista de diferencias (vacía si todo cuadra).
+    """
+    resumen, productos = _agregados_crudos(desde, hasta)
+    diferencias = []
+
+    crudo = {_normalizar_fecha(f): (n, _dinero(i)) for f, n, i in db.session.execute(resumen)}
+    rollup = {v.fecha: (v.total_ordenes, _dinero(v.ingresos))
+              for v in VentaDiaria.query.filter(*_rango_rollup(VentaDiaria, desde, hasta))}
+    for dia in sorted(set(crudo) | set(rollup)):
+        if crudo.get(dia, (0, 0)) != rollup.get(dia, (0, 0)):
+            diferencias.append({'fecha': dia.isoformat(), 'tabla': 'ventas_diarias',
+                                'crudo': str(crudo.get(dia)), 'rollup': str(rollup.get(dia))})
+
+    crudo = {(_normalizar_fecha(f), p): (u, _dinero(r)) for f, p, u, r in db.session.execute(productos)}
+    rollup = {(v.fecha, v.producto_id): (v.unidades, _dinero(v.revenue))
+              for v in VentaDiariaProducto.query.filter(*_rango_rollup(VentaDiariaProducto, desde, hasta))}
+    for llave in sorted(set(crudo) | set(rollup)):
+        if crudo.get(llave, (0, 0)) != rollup.get(llave, (0, 0)):
+            diferencias.append({'fecha': llave[0].isoformat(), 'producto_id': llave[1],
+                                'tabla': 'ventas_diarias_productos',
+                                'crudo': str(crudo.get(llave)), 'rollup': str(rollup.get(llave))})
+
+    return diferencias
@@ -0,0 +1,126 @@
+# app/services/series.py
+from datetime import date, timedelta
+from sqlalchemy import Date, cast, func, select
+from app.extensions import db
+from app.models.producto import Producto
+from app.models.venta_diaria import VentaDiaria, VentaDiariaProducto
+from app.services.rollups import _dinero, _normalizar_fecha
+
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+
+def _expresion_periodo(columna, granularidad):
+    """Primer día del periodo (lunes para semanas) como expresión SQL."""
+    if granularidad == 'dia':
+        return columna
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        unidad = 'week' if granularidad == 'semana' else 'month'
+        return cast(func.date_trunc(unidad, columna), Date)
+    if granularidad == 'semana':
+        # 'weekday 0' avanza al domingo (o se queda si ya lo es); -6 días = lunes
+        return func.date(columna, 'weekday 0', '-6 days')
+    return func.date(columna, 'start of month')
+
+
+def inicio_periodo(fecha, granularidad):
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente(fecha, granularidad):
+    if granularidad == 'dia':
+        return fecha + timedelta(days=1)
+    if granularidad == 'semana':
+        return fecha + timedelta(days=7)
+    return date(fecha.year + 1, 1, 1) if fecha.month == 12 else date(fecha.year, fecha.month + 1, 1)
+
+
+def periodos(desde, hasta, granularidad):
+    """Inicios de todos los periodos que tocan el rango [desde, hasta)."""
+    actual = inicio_periodo(desde, granularidad)
+    while actual < hasta:
+        yield actual
+        try:
+            actual = _siguiente(actual, granularidad)
+        except (OverflowError, ValueError):
+            return  # el último periodo representable (año 9999)
+
+
+def contar_periodos(desde, hasta, granularidad):
+    """Cuántos periodos devuelve periodos(), sin recorrerlos."""
+    inicio = inicio_periodo(desde, granularidad)
+    if granularidad == 'mes':
+        return (hasta.year - inicio.year) * 12 + hasta.month - inicio.month + (hasta.day > 1)
+    dias = (hasta - inicio).days
+    return dias if granularidad == 'dia' else -(-dias // 7)
+
+
+def serie_ventas(desde, hasta, granularidad='dia', top=0):
+    """
+    Ventas del rango [desde, hasta) agrupadas por periodo.
+    Lee los rollups diarios con un solo GROUP BY (más una consulta con
+    ROW_NUMBER() si se piden los `top` productos de cada periodo), así que
+    el costo depende de los días del rango y no del número de órdenes.
+    Los periodos sin ventas se rellenan con ceros.
+    """
+    periodo = _expresion_periodo(VentaDiaria.fecha, granularidad).label('periodo')
+    filas = db.session.execute(
+        select(periodo,
+               func.sum(VentaDiaria.total_ordenes).label('total_ordenes'),
+               func.sum(VentaDiaria.ingresos).label('ingresos'))
+        .where(VentaDiaria.fecha >= desde, VentaDiaria.fecha < hasta)
+        .group_by(periodo)
+    )
+    agregados = {_normalizar_fecha(p): (n, i) for p, n, i in filas}
+
+    mejores = _top_por_periodo(desde, hasta, granularidad, top) if top else {}
+
+    serie = []
+    for inicio in periodos(desde, hasta, granularidad):
+        total_ordenes, ingresos = agregados.get(inicio, (0, 0))
+        punto = {
+            "periodo": inicio.isoformat(),
+            "total_ordenes": total_ordenes,
+            "ingresos": float(_dinero(ingresos))
+        }
+        if top:
+            punto["top_productos"] = mejores.get(inicio, [])
+        serie.append(punto)
+    return serie
+
+
+def _top_por_periodo(desde, hasta, granularidad, top):
+    """Los `top` productos por unidades de cada periodo en una sola consulta."""
+    periodo = _expresion_periodo(VentaDiariaProducto.fecha, granularidad)
+    unidades = func.sum(VentaDiariaProducto.unidades)
+    por_producto = (
+        select(periodo.label('periodo'),
+               VentaDiariaProducto.producto_id,
+               unidades.label('unidades'),
+               func.sum(VentaDiariaProducto.revenue).label('revenue'),
+               func.row_number().over(
+                   partition_by=periodo,
+                   order_by=(unidades.desc(), VentaDiariaProducto.producto_id)
+               ).label('posicion'))
+        .where(VentaDiariaProducto.fecha >= desde, VentaDiariaProducto.fecha < hasta)
+        .group_by(periodo, VentaDiariaProducto.producto_id)
+        .subquery()
+    )
+    filas = db.session.execute(
+        select(por_producto.c.periodo, Producto.nombre,
+               por_producto.c.unidades, por_producto.c.revenue)
+        .join(Producto, Producto.id == por_producto.c.producto_id)
+        .where(por_producto.c.posicion <= top)
+        .order_by(por_producto.c.periodo, por_producto.c.posicion)
+    )
+
+    mejores = {}
+    for p, nombre, u, r in filas:
+        mejores.setdefault(_normalizar_fecha(p), []).append(
+            {"producto": nombre, "unidades": u, "revenue": float(_dinero(r))}
+        )
+    return mejores
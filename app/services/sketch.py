@@ -0,0 +1,302 @@
+# app/services/sketch.py
+import atexit
+import json
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.sketch import CheckpointSketch
+from app.models.venta_diaria import VentaDiariaProducto
+
+
+class SpaceSaving:
+    """
+    Sketch Space-Saving (Metwally et al., 2005) con `capacidad` contadores.
+    Para cada producto reportado:
+        real <= estimado   y   estimado - error <= real
+    con error <= total / capacidad. Todo producto con más de
+    total / capacidad unidades está garantizado en el sketch.
+    """
+
+    def __init__(self, capacidad=200):
+        self.capacidad = capacidad
+        self.total = 0
+        self.contadores = {}  # item -> [estimado, error]
+
+    def agregar(self, item, peso=1):
+        self.total += peso
+        if item in self.contadores:
+            self.contadores[item][0] += peso
+        elif len(self.contadores) < self.capacidad:
+            self.contadores[item] = [peso, 0]
+        else:
+            # Reemplaza al menor: hereda su conteo como cota de error
+            menor = min(self.contadores, key=lambda k: self.contadores[k][0])
+            conteo, _ = self.contadores.pop(menor)
+            self.contadores[item] = [conteo + peso, conteo]
+
+    def _minimo(self):
+        """Cota para un item ausente: 0 si el sketch no se ha llenado."""
+        if len(self.contadores) < self.capacidad:
+            return 0
+        return min(c[0] for c in self.contadores.values())
+
+    def combinar(self, otro):
+        """Suma otro sketch a este (el resultado conserva la cota total / capacidad)."""
+        mio, suyo = self._minimo(), otro._minimo()
+        combinados = {}
+        for item in set(self.contadores) | set(otro.contadores):
+            a = self.contadores.get(item, [mio, mio])
+            b = otro.contadores.get(item, [suyo, suyo])
+            combinados[item] = [a[0] + b[0], a[1] + b[1]]
+        mejores = sorted(combinados.items(), key=lambda kv: kv[1][0], reverse=True)
+        self.contadores = dict(mejores[:self.capacidad])
+        self.total += otro.total
+        return self
+
+    def top(self, n):
+        """[(item, estimado, error), ...] de mayor a menor estimado."""
+        mejores = sorted(self.contadores.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [(item, c[0], c[1]) for item, c in mejores[:n]]
+
+    def a_dict(self):
+        return {
+            'capacidad': self.capacidad,
+            'total': self.total,
+            'contadores': [[item, c[0], c[1]] for item, c in self.contadores.items()]
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        sketch = cls(datos['capacidad'])
+        sketch.total = datos['total']
+        sketch.contadores = {item: [e, err] for item, e, err in datos['contadores']}
+        return sketch
+
+
+def periodo_de(fecha):
+    return f'{fecha.year}-{fecha.month:02d}'
+
+
+class SketchVentas:
+    """
+    Sketches de productos más vendidos por mes para un proceso.
+
+    `ventanas` es la vista que se consulta (checkpoint + lo confirmado aquí);
+    `deltas` acumula lo confirmado desde el último checkpoint. Al guardar,
+    el delta se combina con la fila de la base bajo FOR UPDATE, así que los
+    checkpoints de varios procesos se suman en lugar de pisarse. Las ventas
+    de otros procesos se ven aquí después de su siguiente checkpoint.
+
+    Hay checkpoint cada `checkpoint_cada` órdenes o, si hay pendientes, cada
+    `checkpoint_segundos`, y uno más al terminar el proceso de forma ordenada.
+    Si el proceso muere sin terminar, su delta se pierde hasta
+    `flask reportes reconstruir-sketch`.
+    """
+
+    def __init__(self, capacidad=200, ventanas_max=13, checkpoint_cada=100, checkpoint_segundos=30):
+        self.capacidad = capacidad
+        self.ventanas_max = ventanas_max
+        self.checkpoint_cada = checkpoint_cada
+        self.checkpoint_segundos = checkpoint_segundos
+        self.ventanas = {}
+        self._deltas = {}
+        self._ordenes_sin_guardar = 0
+        self._ultimo_checkpoint = time.monotonic()
+        self._candado = threading.Lock()
+
+    def _nuevo(self):
+        return SpaceSaving(self.capacidad)
+
+    def _podar(self):
+        for periodo in sorted(self.ventanas)[:-self.ventanas_max]:
+            if periodo not in self._deltas:
+                del self.ventanas[periodo]
+
+    def registrar(self, lineas, ordenes=1):
+        """
+        Suma líneas [(fecha, producto_id, unidades), ...] ya confirmadas.
+        Retorna True si ya toca checkpoint.
+        """
+        with self._candado:
+            for fecha, producto_id, unidades in lineas:
+                periodo = periodo_de(fecha)
+                self.ventanas.setdefault(periodo, self._nuevo()).agregar(producto_id, unidades)
+                self._deltas.setdefault(periodo, self._nuevo()).agregar(producto_id, unidades)
+            self._ordenes_sin_guardar += ordenes
+            self._podar()
+            return (self._ordenes_sin_guardar >= self.checkpoint_cada
+                    or time.monotonic() - self._ultimo_checkpoint >= self.checkpoint_segundos)
+
+    def top(self, anio, mes, n):
+        periodo = f'{anio}-{mes:02d}'
+        with self._candado:
+            sketch = self.ventanas.get(periodo)
+        if sketch is None:
+            fila = db.session.get(CheckpointSketch, periodo)
+            sketch = SpaceSaving.desde_dict(json.loads(fila.datos)) if fila else self._nuevo()
+        return sketch.top(n), sketch.total
+
+    def _restaurar(self, deltas):
+        """Regresa deltas que no se pudieron guardar, sumados a lo confirmado mientras tanto."""
+        with self._candado:
+            for periodo, delta in deltas.items():
+                self._deltas[periodo] = delta.combinar(self._deltas.get(periodo, self._nuevo()))
+
+    def cargar(self):
+        """Carga los checkpoints de los últimos `ventanas_max` periodos."""
+        with db.engine.connect() as conexion:
+            filas = conexion.execute(
+                select(CheckpointSketch.periodo, CheckpointSketch.datos)
+                .order_by(CheckpointSketch.periodo.desc())
+                .limit(self.ventanas_max)
+            ).all()
+        with self._candado:
+            for periodo, datos in filas:
+                self.ventanas[periodo] = SpaceSaving.desde_dict(json.loads(datos))
+
+    def checkpoint(self):
+        """
+        Combina lo confirmado desde el último checkpoint con la fila de cada
+        periodo. Usa su propia conexión porque se llama después del commit
+        de la sesión. Si falla, los deltas se conservan para el siguiente:
+        con IntegrityError (otro proceso creó el periodo a la vez) retorna 0;
+        cualquier otro error se vuelve a lanzar.
+        """
+        with self._candado:
+            deltas, self._deltas = self._deltas, {}
+            self._ordenes_sin_guardar = 0
+            self._ultimo_checkpoint = time.monotonic()
+        if not deltas:
+            return 0
+
+        tabla = CheckpointSketch.__table__
+        guardados = {}
+        try:
+            with db.engine.begin() as conexion:
+                for periodo, delta in sorted(deltas.items()):
+                    fila = conexion.execute(
+                        select(tabla.c.datos).where(tabla.c.periodo == periodo).with_for_update()
+                    ).first()
+                    sketch = SpaceSaving.desde_dict(json.loads(fila.datos)) if fila else self._nuevo()
+                    sketch.combinar(delta)
+                    valores = {'datos': json.dumps(sketch.a_dict()), 'total': sketch.total,
+                               'fecha_actualizacion': datetime.utcnow()}
+                    if fila:
+                        conexion.execute(tabla.update().where(tabla.c.periodo == periodo).values(**valores))
+                    else:
+                        conexion.execute(tabla.insert().values(periodo=periodo, **valores))
+                    guardados[periodo] = sketch
+        except Exception as error:
+            self._restaurar(deltas)
+            if isinstance(error, IntegrityError):
+                # Otro proceso creó el periodo al mismo tiempo: se reintenta después
+                return 0
+            raise
+
+        with self._candado:
+            for periodo, sketch in guardados.items():
+                # La vista pasa a ser el checkpoint (con lo de otros procesos)
+                # más lo que se haya confirmado aquí mientras se guardaba
+                if periodo in self._deltas:
+                    sketch = SpaceSaving.desde_dict(sketch.a_dict()).combinar(self._deltas[periodo])
+                self.ventanas[periodo] = sketch
+            self._podar()
+        return len(guardados)
+
+
+def obtener_sketch():
+    """Sketch de la aplicación; se crea y carga desde los checkpoints al primer uso."""
+    if 'sketch_ventas' not in current_app.extensions:
+        config = current_app.config
+        sketch = SketchVentas(
+            capacidad=config.get('SKETCH_CAPACIDAD', 200),
+            ventanas_max=config.get('SKETCH_VENTANAS', 13),
+            checkpoint_cada=config.get('SKETCH_CHECKPOINT_CADA', 100),
+            checkpoint_segundos=config.get('SKETCH_CHECKPOINT_SEGUNDOS', 30)
+        )
+        sketch.cargar()
+        current_app.extensions['sketch_ventas'] = sketch
+        if config.get('SKETCH_CHECKPOINT_AL_SALIR', True) and 'sketch_al_salir' not in current_app.extensions:
+            atexit.register(checkpoint_al_salir, current_app._get_current_object())
+            current_app.extensions['sketch_al_salir'] = True
+    return current_app.extensions['sketch_ventas']
+
+
+def checkpoint_al_salir(app):
+    """
+    Guarda el delta pendiente del sketch vigente al terminar el proceso.
+    Se busca al momento de salir porque `reconstruir` reemplaza el sketch y el
+    delta del anterior ya está contado en los checkpoints reconstruidos.
+    """
+    sketch = app.extensions.get('sketch_ventas')
+    if sketch is None:
+        return
+    with app.app_context():
+        try:
+            sketch.checkpoint()
+        except Exception:
+            app.logger.exception("No se pudo guardar el checkpoint del sketch al salir")
+
+
+def reconstruir():
+    """
+    Reescribe los checkpoints de todos los periodos a partir de los rollups
+    diarios por producto y reinicia el sketch en memoria. No hace commit.
+    """
+    periodo = func.substr(func.cast(VentaDiariaProducto.fecha, db.String), 1, 7)
+    filas = db.session.execute(
+        select(periodo, VentaDiariaProducto.producto_id, func.sum(VentaDiariaProducto.unidades))
+        .group_by(periodo, VentaDiariaProducto.producto_id)
+    )
+    capacidad = current_app.config.get('SKETCH_CAPACIDAD', 200)
+    sketches = {}
+    for p, producto_id, unidades in filas:
+        sketches.setdefault(p, SpaceSaving(capacidad)).agregar(producto_id, unidades)
+
+    db.session.query(CheckpointSketch).delete()
+    db.session.add_all([
+        CheckpointSketch(periodo=p, datos=json.dumps(s.a_dict()), total=s.total)
+        for p, s in sketches.items()
+    ])
+    current_app.extensions.pop('sketch_ventas', None)
+    return len(sketches)
+
+
+# ─── Alimentación desde las transacciones que crean órdenes ──────────
+
+def marcar_lineas(por_producto, ordenes):
+    """
+    Guarda en la sesión las líneas {(dia, producto_id): [unidades, ...]} para
+    sumarlas al sketch cuando la transacción haga commit.
+    """
+    pendientes = db.session().info.setdefault('lineas_sketch', [[], 0])
+    pendientes[0].extend((dia, pid, valores[0]) for (dia, pid), valores in por_producto.items())
+    pendientes[1] += ordenes
+
+
+@event.listens_for(db.session, 'after_commit')
+def _sumar_al_confirmar(session):
+    """
+    La orden ya está confirmada: un error del sketch (cargarlo o guardar el
+    checkpoint) solo se registra en el log y nunca llega a la vista, que
+    intentaría revertir una transacción ya confirmada y respondería 500.
+    El sketch es aproximado y `flask reportes reconstruir-sketch` lo repara.
+    """
+    pendientes = session.info.pop('lineas_sketch', None)
+    if not pendientes or not has_app_context():
+        return
+    try:
+        sketch = obtener_sketch()
+        if sketch.registrar(*pendientes):
+            sketch.checkpoint()
+    except Exception:
+        current_app.logger.exception("No se pudo actualizar el sketch de ventas")
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_al_revertir(session):
+    session.info.pop('lineas_sketch', None)
@@ -0,0 +1,85 @@
+# benchmarks/bench_busqueda_estudiantes.py
+"""
+Mide GET /estudiantes/buscar con N estudiantes (por defecto 1 000 000)
+en SQLite (índice FTS5 mantenido por triggers) y, como referencia, el
+filtro ingenuo con LIKE '%...%' sobre nombre y apellido.
+
+Uso:
+    python -m benchmarks.bench_busqueda_estudiantes [estudiantes] [repeticiones]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import or_
+from app import create_app, db
+from app.config import Config
+from app.models.estudiante import Estudiante
+
+LOTE = 50000
+NOMBRES = ["María", "José", "Juan", "Ana", "Luis", "Sofía", "Carlos", "Lucía", "Jesús", "Andrés",
+           "Fernanda", "Raúl", "Mónica", "Héctor", "Inés", "Tomás", "Valeria", "Óscar", "Iván", "Julián"]
+APELLIDOS = ["Ramírez", "López", "Hernández", "Martínez", "González", "Pérez", "Sánchez", "Gómez",
+             "Díaz", "Núñez", "Jiménez", "Rodríguez", "Vázquez", "Álvarez", "Muñoz", "Ortíz",
+             "Chávez", "Ibáñez", "Benítez", "Peña"]
+CONSULTAS = ["ramirez", "maria lopez", "jes nun", "A0500000", "fernanda.ibanez", "zzz"]
+
+
+def crear_config(ruta):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{ruta}"
+        SQLALCHEMY_ECHO = False
+    return BenchConfig
+
+
+def preparar(app, n):
+    aleatorio = random.Random(3)
+    with app.app_context():
+        db.create_all()
+        for inicio in range(0, n, LOTE):
+            filas = []
+            for i in range(inicio, min(n, inicio + LOTE)):
+                nombre, apellido = aleatorio.choice(NOMBRES), aleatorio.choice(APELLIDOS)
+                filas.append({"matricula": f"A{i:07d}", "nombre": nombre,
+                              "apellido": f"{apellido} {aleatorio.choice(APELLIDOS)}",
+                              "email": f"{nombre.lower()}.{apellido.lower()}{i}@escuela.mx",
+                              "carrera": "ITIC", "semestre": 1})
+            db.session.execute(Estudiante.__table__.insert(), filas)
+        db.session.commit()
+
+
+def medir(funcion, repeticiones):
+    funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(crear_config(os.path.join(directorio, "bench.db")))
+        inicio = time.perf_counter()
+        preparar(app, n)
+        print(f"Carga de {n} estudiantes (con triggers FTS5): {time.perf_counter() - inicio:.1f} s")
+        client = app.test_client()
+
+        print(f"{'consulta':20}{'resultados':>12}{'/buscar (ms)':>16}{'LIKE (ms)':>12}")
+        for consulta in CONSULTAS:
+            resp = client.get("/estudiantes/buscar", query_string={"q": consulta})
+            resultados = len(resp.get_json()["estudiantes"])
+            indice = medir(lambda: client.get("/estudiantes/buscar", query_string={"q": consulta}),
+                           repeticiones)
+            with app.app_context():
+                patron = f"%{consulta.split()[0]}%"
+                ingenuo = medir(lambda: Estudiante.query.filter(or_(
+                    Estudiante.nombre.ilike(patron), Estudiante.apellido.ilike(patron)
+                )).limit(20).all(), 3)
+            print(f"{consulta:20}{resultados:12}{indice:16.2f}{ingenuo:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_cache_catalogos.py
+"""
+Mide GET /materias/ con N materias (por defecto 2 000): sin caché (la
+versión se invalida antes de cada petición), desde la caché y con
+If-None-Match (304). Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_cache_catalogos [materias] [peticiones]
+"""
+import sys
+import time
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.materia import Materia
+from app.services.cache_catalogos import obtener_cache
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def medir(client, peticiones, antes=None, **kwargs):
+    inicio = time.perf_counter()
+    for _ in range(peticiones):
+        if antes:
+            antes()
+        resp = client.get("/materias/", **kwargs)
+    return (time.perf_counter() - inicio) / peticiones, resp
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    peticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Materia.__table__.insert(), [
+            {"clave": f"M{i:05d}", "nombre": f"Materia {i}", "creditos": 4, "docente": f"Docente {i % 40}"}
+            for i in range(n)
+        ])
+        db.session.commit()
+    client = app.test_client()
+
+    def invalidar():
+        with app.app_context():
+            obtener_cache().invalidar(['materias'])
+
+    frio, resp = medir(client, peticiones, antes=invalidar)
+    print(f"Sin caché:        {frio * 1000:8.3f} ms/petición  ({len(resp.get_data()) / 1e3:.1f} KB)")
+    caliente, resp = medir(client, peticiones)
+    print(f"Desde la caché:   {caliente * 1000:8.3f} ms/petición  (X-Cache={resp.headers['X-Cache']})")
+    condicional, resp = medir(client, peticiones, headers={"If-None-Match": resp.headers["ETag"]})
+    print(f"If-None-Match:    {condicional * 1000:8.3f} ms/petición  (status {resp.status_code})")
+
+
+if __name__ == "__main__":
+    main()
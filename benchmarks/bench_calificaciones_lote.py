@@ -0,0 +1,73 @@
+# benchmarks/bench_calificaciones_lote.py
+"""
+Mide POST /cal/batch con un CSV de N calificaciones (por defecto 100 000)
+y, como referencia, POST /cal/ una por una sobre una muestra pequeña.
+Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_calificaciones_lote [filas]
+"""
+import sys
+import time
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.estudiante import Estudiante
+from app.models.materia import Materia
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def preparar(app, n_estudiantes=2000, n_materias=50):
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Estudiante.__table__.insert(), [
+            {"matricula": f"B{i}", "nombre": "Bench", "apellido": "Bench",
+             "email": f"b{i}@bench.mx", "carrera": "ITIC", "semestre": 1}
+            for i in range(n_estudiantes)
+        ])
+        db.session.execute(Materia.__table__.insert(), [
+            {"clave": f"M{i}", "nombre": f"Materia {i}", "creditos": 4, "docente": "Bench"}
+            for i in range(n_materias)
+        ])
+        db.session.commit()
+    return n_estudiantes, n_materias
+
+
+def generar_csv(n, n_estudiantes, n_materias):
+    lineas = ["estudiante_id,materia_id,calificacion,periodo"]
+    for i in range(n):
+        estudiante = i % n_estudiantes + 1
+        materia = (i // n_estudiantes) % n_materias + 1
+        periodo = f"{2000 + i // (n_estudiantes * n_materias)}-1"
+        lineas.append(f"{estudiante},{materia},{60 + i % 41},{periodo}")
+    return "\n".join(lineas)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = create_app(BenchConfig)
+    n_estudiantes, n_materias = preparar(app)
+    client = app.test_client()
+
+    muestra = 200
+    inicio = time.perf_counter()
+    for i in range(muestra):
+        client.post("/cal/", json={"estudiante_id": i + 1, "materia_id": 1,
+                                   "calificacion": 80, "periodo": "1999-1"})
+    por_peticion = muestra / (time.perf_counter() - inicio)
+
+    csv = generar_csv(n, n_estudiantes, n_materias)
+    inicio = time.perf_counter()
+    resp = client.post("/cal/batch", data=csv, content_type="text/csv")
+    duracion = time.perf_counter() - inicio
+    datos = resp.get_json()
+
+    print(f"Una por una (muestra de {muestra}): {por_peticion:10.1f} filas/s")
+    print(f"POST /cal/batch con {n} filas:    {n / duracion:10.1f} filas/s  "
+          f"({duracion:.2f} s, insertadas={datos['insertadas']}, fallidas={datos['fallidas']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_estadisticas_materias.py
+"""
+Mide GET /cal/materias/estadisticas (consulta columnar + NumPy) con N
+calificaciones (por defecto 1 000 000) contra el cálculo "a mano": cargar
+los objetos Calificacion con el ORM y agrupar/calcular con el módulo
+statistics de Python. Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_estadisticas_materias [calificaciones] [materias]
+"""
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.calificacion import Calificacion
+from app.models.estudiante import Estudiante
+from app.models.materia import Materia
+from app.services.estadisticas import calcular_estadisticas, consulta_estadisticas
+
+LOTE = 50000
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def preparar(app, n, n_materias, n_estudiantes=5000, n_periodos=8):
+    aleatorio = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Estudiante.__table__.insert(), [
+            {"matricula": f"B{i}", "nombre": "Bench", "apellido": "Bench",
+             "email": f"b{i}@bench.mx", "carrera": "ITIC", "semestre": 1}
+            for i in range(n_estudiantes)
+        ])
+        db.session.execute(Materia.__table__.insert(), [
+            {"clave": f"M{i}", "nombre": f"Materia {i}", "creditos": 4, "docente": "Bench"}
+            for i in range(n_materias)
+        ])
+        # Insert de Core directo: no interesa el resumen académico aquí
+        for inicio in range(0, n, LOTE):
+            db.session.execute(Calificacion.__table__.insert(), [
+                {"estudiante_id": i % n_estudiantes + 1, "materia_id": i % n_materias + 1,
+                 "calificacion": round(min(100, max(0, aleatorio.gauss(75, 12))), 2),
+                 "periodo": f"{2020 + (i // 7) % n_periodos // 2}-{(i // 7) % 2 + 1}"}
+                for i in range(inicio, min(n, inicio + LOTE))
+            ])
+        db.session.commit()
+
+
+def con_orm():
+    grupos = defaultdict(list)
+    for c in Calificacion.query.all():
+        grupos[(c.materia_id, c.periodo)].append(float(c.calificacion))
+    return {
+        llave: (statistics.mean(v), statistics.median(v), statistics.pstdev(v),
+                statistics.quantiles(v, n=10, method='inclusive'),
+                sum(1 for x in v if x >= 60) / len(v))
+        for llave, v in grupos.items()
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_materias = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = create_app(BenchConfig)
+    inicio = time.perf_counter()
+    preparar(app, n, n_materias)
+    print(f"Carga de {n} calificaciones: {time.perf_counter() - inicio:.2f} s")
+
+    client = app.test_client()
+    inicio = time.perf_counter()
+    resp = client.get("/cal/materias/estadisticas")
+    endpoint = time.perf_counter() - inicio
+    grupos = sum(len(m["periodos"]) for m in resp.get_json()["materias"])
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        filas = db.session.connection().execute(consulta_estadisticas()).all()
+        consulta = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        calcular_estadisticas(filas)
+        calculo = time.perf_counter() - inicio
+        db.session.expunge_all()
+
+        inicio = time.perf_counter()
+        con_orm()
+        orm = time.perf_counter() - inicio
+
+    print(f"Grupos (materia, periodo): {grupos}")
+    print(f"GET /cal/materias/estadisticas:    {endpoint:8.2f} s")
+    print(f"  consulta columnar:               {consulta:8.2f} s")
+    print(f"  cálculo con NumPy:               {calculo:8.2f} s")
+    print(f"ORM + statistics (referencia):     {orm:8.2f} s  ({orm / endpoint:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_estudiantes_lote.py
+"""
+Mide POST /estudiantes/bulk con un CSV de N estudiantes (por defecto
+10 000): primero como inserción y después el mismo archivo en modo upsert.
+Como referencia, POST /estudiantes/ uno por uno sobre una muestra pequeña.
+Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_estudiantes_lote [filas]
+"""
+import sys
+import time
+from app import create_app, db
+from app.config import TestingConfig
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def generar_csv(n, semestre=1):
+    lineas = ["matricula,nombre,apellido,email,carrera,semestre"]
+    for i in range(n):
+        lineas.append(f"L{i:07d},Alumno{i},Apellido{i},l{i}@bench.mx,ITIC,{semestre}")
+    return "\n".join(lineas)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+
+    muestra = 200
+    inicio = time.perf_counter()
+    for i in range(muestra):
+        client.post("/estudiantes/", json={"matricula": f"U{i}", "nombre": "Uno", "apellido": "Uno",
+                                           "email": f"u{i}@bench.mx", "carrera": "ITIC", "semestre": 1})
+    por_peticion = muestra / (time.perf_counter() - inicio)
+    print(f"Uno por uno (muestra de {muestra}):       {por_peticion:10.1f} filas/s")
+
+    for modo, csv in (("insertar", generar_csv(n)), ("upsert", generar_csv(n, semestre=2))):
+        inicio = time.perf_counter()
+        resp = client.post(f"/estudiantes/bulk?modo={modo}", data=csv.encode(), content_type="text/csv")
+        duracion = time.perf_counter() - inicio
+        datos = resp.get_json()
+        print(f"POST /estudiantes/bulk ({modo:8}) {n} filas: {n / duracion:10.1f} filas/s  "
+              f"({duracion:.2f} s, insertados={datos['insertados']}, "
+              f"actualizados={datos['actualizados']}, fallidos={datos['fallidos']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_inventario_slots.py
+"""
+Benchmark de contención: varios hilos compran el MISMO producto a la vez
+y se mide el throughput de checkout con 1, 2, 4, 8 y 16 slots.
+
+Con PostgreSQL (DATABASE_URL) cada slot es una fila distinta, así que el
+throughput debe crecer con el número de slots hasta saturar los hilos.
+SQLite solo admite un escritor a la vez: ahí los números salen planos y
+solo sirven para validar que el script funciona.
+
+Uso:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_inventario_slots [hilos] [ordenes_por_hilo]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.config import Config
+from app.models.cliente import Cliente
+from app.models.producto import Producto
+from app.services import inventario
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_ECHO = False
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    SQLALCHEMY_ENGINE_OPTIONS = {"pool_size": 32} if os.getenv("DATABASE_URL") else \
+        {"connect_args": {"timeout": 30}}
+
+
+def preparar(app, n_slots, stock):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        cliente = Cliente(nombre="Bench", email="bench@bench.mx")
+        producto = Producto(sku="HOT", nombre="Producto Hot", precio=10, stock=stock)
+        db.session.add_all([cliente, producto])
+        db.session.flush()
+        inventario.fragmentar(producto, n_slots)
+        db.session.commit()
+        token = create_access_token(identity="1")
+        return cliente.id, producto.id, {"Authorization": f"Bearer {token}"}
+
+
+def medir(app, n_slots, hilos, por_hilo):
+    cliente_id, producto_id, headers = preparar(app, n_slots, stock=hilos * por_hilo)
+    orden = {"cliente_id": cliente_id, "productos": [{"producto_id": producto_id, "cantidad": 1}]}
+    fallidas = []
+
+    def comprar():
+        client = app.test_client()
+        for _ in range(por_hilo):
+            if client.post("/api/ordenes/", json=orden, headers=headers).status_code != 201:
+                fallidas.append(1)
+
+    trabajadores = [threading.Thread(target=comprar) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    duracion = time.perf_counter() - inicio
+    return (hilos * por_hilo - len(fallidas)) / duracion, len(fallidas)
+
+
+def main():
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    por_hilo = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    app = create_app(BenchConfig)
+    print(f"Base de datos: {app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}  "
+          f"hilos={hilos}  ordenes_por_hilo={por_hilo}")
+    for n_slots in (1, 2, 4, 8, 16):
+        throughput, fallidas = medir(app, n_slots, hilos, por_hilo)
+        print(f"  slots={n_slots:3d}  {throughput:10.1f} órdenes/s  fallidas={fallidas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_listado_productos.py
+"""
+Compara GET /productos/ en sus tres modos con N productos (por defecto
+200 000): arreglo completo, ?stream=1 y una página de ?per_page=100.
+Reporta tiempo, bytes y memoria pico de Python (tracemalloc, en una
+segunda pasada) al consumir la respuesta. Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_listado_productos [filas]
+"""
+import sys
+import time
+import tracemalloc
+from sqlalchemy import insert
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.producto import Producto
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def consumir(client, url):
+    resp = client.get(url, buffered=False)
+    recibidos = sum(len(pedazo) for pedazo in resp.response)
+    resp.close()
+    return recibidos
+
+
+def medir(client, url):
+    # El tiempo se toma sin tracemalloc (que lo multiplica) y la memoria aparte
+    inicio = time.perf_counter()
+    recibidos = consumir(client, url)
+    duracion = time.perf_counter() - inicio
+    tracemalloc.start()
+    consumir(client, url)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duracion, recibidos, pico
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        for desde in range(0, n, 10000):
+            db.session.execute(insert(Producto), [
+                {"sku": f"B{i:08d}", "nombre": f"Producto {i}", "description": "d" * 200,
+                 "precio": 10, "stock": i % 50}
+                for i in range(desde, min(desde + 10000, n))
+            ])
+        db.session.commit()
+    client = app.test_client()
+
+    for etiqueta, url in (
+        ("arreglo completo", "/productos/"),
+        ("?stream=1", "/productos/?stream=1"),
+        ("?stream=1&fields=id,nombre,precio", "/productos/?stream=1&fields=id,nombre,precio"),
+        ("?pagina=1000&per_page=100", "/productos/?pagina=1000&per_page=100"),
+    ):
+        duracion, recibidos, pico = medir(client, url)
+        print(f"{etiqueta:36} {duracion * 1000:9.1f} ms  {recibidos / 1e6:8.2f} MB enviados  "
+              f"pico {pico / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_ordenes_lote.py
+"""
+Compara el throughput (órdenes/segundo) de POST /api/ordenes/ una por una
+contra POST /api/ordenes/batch, usando SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_ordenes_lote [numero_de_ordenes]
+"""
+import sys
+import time
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.cliente import Cliente
+from app.models.producto import Producto
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def preparar(app, n_productos=50):
+    with app.app_context():
+        db.create_all()
+        cliente = Cliente(nombre="Bench", email="bench@bench.mx")
+        db.session.add(cliente)
+        db.session.add_all([
+            Producto(sku=f"B{i}", nombre=f"Bench {i}", precio=10, stock=10**9)
+            for i in range(n_productos)
+        ])
+        db.session.commit()
+        token = create_access_token(identity="1")
+        return cliente.id, {"Authorization": f"Bearer {token}"}
+
+
+def generar_ordenes(cliente_id, n, n_productos=50):
+    return [
+        {"cliente_id": cliente_id,
+         "productos": [{"producto_id": (i + j) % n_productos + 1, "cantidad": 1} for j in range(3)]}
+        for i in range(n)
+    ]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = create_app(BenchConfig)
+    cliente_id, headers = preparar(app)
+    ordenes = generar_ordenes(cliente_id, n)
+    client = app.test_client()
+
+    inicio = time.perf_counter()
+    for orden in ordenes:
+        client.post("/api/ordenes/", json=orden, headers=headers)
+    individual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resp = client.post("/api/ordenes/batch", json={"modo": "todo_o_nada", "ordenes": ordenes},
+                       headers=headers)
+    lote = time.perf_counter() - inicio
+    assert resp.status_code == 201, resp.get_json()
+
+    print(f"Órdenes: {n}")
+    print(f"  Una por una : {n / individual:10.1f} órdenes/s ({individual:.2f} s)")
+    print(f"  Lote        : {n / lote:10.1f} órdenes/s ({lote:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_paginacion_estudiantes.py
+"""
+Compara GET /estudiantes/ con paginate (COUNT(*) + OFFSET) contra el modo
+cursor en la página 1 y en una página profunda (por defecto la 10 000 con
+10 por página), con y sin filtro de carrera. Usa SQLite en memoria.
+
+Uso:
+    python -m benchmarks.bench_paginacion_estudiantes [estudiantes] [pagina] [repeticiones]
+"""
+import sys
+import time
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.estudiante import Estudiante
+from app.routes.estudiantes import _codificar_cursor
+
+LOTE = 50000
+POR_PAGINA = 10
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def preparar(app, n):
+    with app.app_context():
+        db.create_all()
+        for inicio in range(0, n, LOTE):
+            db.session.execute(Estudiante.__table__.insert(), [
+                {"id": i + 1, "matricula": f"B{i}", "nombre": "Bench", "apellido": "Bench",
+                 "email": f"b{i}@bench.mx", "carrera": f"Carrera {i % 2}", "semestre": 1}
+                for i in range(inicio, min(n, inicio + LOTE))
+            ])
+        db.session.commit()
+
+
+def medir(client, repeticiones, **params):
+    client.get("/estudiantes/", query_string=params)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        client.get("/estudiantes/", query_string=params)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    pagina = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    app = create_app(BenchConfig)
+    preparar(app, n)
+    client = app.test_client()
+
+    # Con dos carreras alternadas, la página profunda de "Carrera 0" empieza
+    # después del id 2 * (pagina - 1) * POR_PAGINA
+    ultimo = (pagina - 1) * POR_PAGINA
+    casos = [
+        ("sin filtro", {}, _codificar_cursor(None, ultimo)),
+        ("carrera", {"carrera": "Carrera 0"}, _codificar_cursor("Carrera 0", 2 * ultimo)),
+    ]
+    print(f"{n} estudiantes, {POR_PAGINA} por página, promedio de {repeticiones} peticiones (ms):")
+    print(f"{'':12}{'offset p1':>12}{f'offset p{pagina}':>16}{'cursor p1':>12}{f'cursor p{pagina}':>16}")
+    for nombre, filtro, cursor in casos:
+        tiempos = [
+            medir(client, repeticiones, per_page=POR_PAGINA, pagina=1, **filtro),
+            medir(client, repeticiones, per_page=POR_PAGINA, pagina=pagina, **filtro),
+            medir(client, repeticiones, per_page=POR_PAGINA, cursor="", **filtro),
+            medir(client, repeticiones, per_page=POR_PAGINA, cursor=cursor, **filtro),
+        ]
+        print(f"{nombre:12}{tiempos[0]:12.2f}{tiempos[1]:16.2f}{tiempos[2]:12.2f}{tiempos[3]:16.2f}")
+
+
+if __name__ == "__main__":
+    main()
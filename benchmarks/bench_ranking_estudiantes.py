@@ -0,0 +1,75 @@
+# benchmarks/bench_ranking_estudiantes.py
+"""
+Mide GET /estudiantes/ranking con N estudiantes (por defecto 100 000)
+repartidos en 10 carreras x 10 semestres. El resumen académico se llena
+directo en estudiante_resumen (es lo que lee el ranking). Usa SQLite en
+memoria con los índices del modelo.
+
+Uso:
+    python -m benchmarks.bench_ranking_estudiantes [estudiantes] [repeticiones]
+"""
+import random
+import sys
+import time
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.estudiante import Estudiante
+from app.models.estudiante_resumen import EstudianteResumen
+
+LOTE = 50000
+
+
+class BenchConfig(TestingConfig):
+    SQLALCHEMY_ECHO = False
+
+
+def preparar(app, n):
+    aleatorio = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        for inicio in range(0, n, LOTE):
+            ids = range(inicio, min(n, inicio + LOTE))
+            db.session.execute(Estudiante.__table__.insert(), [
+                {"id": i + 1, "matricula": f"B{i}", "nombre": "Bench", "apellido": "Bench",
+                 "email": f"b{i}@bench.mx", "carrera": f"Carrera {i % 10}",
+                 "semestre": i // 10 % 10 + 1, "activo": True}
+                for i in ids
+            ])
+            db.session.execute(EstudianteResumen.__table__.insert(), [
+                {"estudiante_id": i + 1, "suma_calificaciones": round(aleatorio.uniform(300, 500), 2),
+                 "total_calificaciones": 5, "aprobadas": 5, "creditos_aprobados": 20,
+                 "ultimo_periodo": "2024-1"}
+                for i in ids
+            ])
+        db.session.commit()
+
+
+def medir(client, repeticiones, **params):
+    client.get("/estudiantes/ranking", query_string=params)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resp = client.get("/estudiantes/ranking", query_string=params)
+    return (time.perf_counter() - inicio) / repeticiones * 1000, resp.get_json()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    app = create_app(BenchConfig)
+    preparar(app, n)
+    client = app.test_client()
+
+    grupo, _ = medir(client, repeticiones, carrera="Carrera 3", semestre=5, top=10)
+    carrera, datos = medir(client, repeticiones, carrera="Carrera 3", top=10)
+    pagina2, _ = medir(client, repeticiones, carrera="Carrera 3", top=10, cursor=datos["siguiente_cursor"])
+    todos, _ = medir(client, repeticiones, top=10)
+
+    print(f"{n} estudiantes, promedio de {repeticiones} peticiones:")
+    print(f"  top 10 de una carrera y semestre:     {grupo:8.2f} ms")
+    print(f"  top 10 por semestre de una carrera:   {carrera:8.2f} ms")
+    print(f"  misma consulta, página 2 (cursor):    {pagina2:8.2f} ms")
+    print(f"  top 10 de todas las carreras:         {todos:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
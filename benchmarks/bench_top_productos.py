@@ -0,0 +1,112 @@
+# benchmarks/bench_top_productos.py
+"""
+Benchmark del top de productos: consulta exacta sobre los rollups contra
+el sketch Space-Saving (?modo=aproximado).
+
+Genera un mes de ventas con distribución Zipf sobre N productos, las carga
+en ventas_diarias_productos y en el sketch, y compara:
+  - latencia promedio de cada método para obtener el top 5
+  - recall del top 5 y error relativo de las unidades estimadas
+  - la cota teórica (unidades del mes / capacidad)
+
+Uso:
+    python -m benchmarks.bench_top_productos [productos] [lineas] [capacidad]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+from sqlalchemy import func
+from app import create_app, db
+from app.config import Config
+from app.models.producto import Producto
+from app.models.venta_diaria import VentaDiariaProducto
+from app.services.sketch import SpaceSaving
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_ECHO = False
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+
+def generar(n_productos, n_lineas, semilla=42):
+    """Líneas (dia, producto, unidades) de marzo de 2026 con popularidad Zipf."""
+    aleatorio = random.Random(semilla)
+    pesos = [1 / (i + 1) for i in range(n_productos)]
+    productos = aleatorio.choices(range(1, n_productos + 1), weights=pesos, k=n_lineas)
+    return [(date(2026, 3, aleatorio.randint(1, 31)), p, aleatorio.randint(1, 3)) for p in productos]
+
+
+def preparar(app, n_productos, lineas):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(Producto.__table__.insert(), [
+            {"id": i, "sku": f"P{i}", "nombre": f"Producto {i}", "precio": 1, "stock": 0}
+            for i in range(1, n_productos + 1)
+        ])
+        por_dia = Counter()
+        for dia, producto, unidades in lineas:
+            por_dia[(dia, producto)] += unidades
+        db.session.execute(VentaDiariaProducto.__table__.insert(), [
+            {"fecha": dia, "producto_id": p, "unidades": u, "revenue": u}
+            for (dia, p), u in por_dia.items()
+        ])
+        db.session.commit()
+
+
+def top_exacto():
+    return db.session.query(
+        VentaDiariaProducto.producto_id, func.sum(VentaDiariaProducto.unidades)
+    ).filter(
+        VentaDiariaProducto.fecha >= date(2026, 3, 1),
+        VentaDiariaProducto.fecha < date(2026, 4, 1)
+    ).group_by(VentaDiariaProducto.producto_id).order_by(
+        func.sum(VentaDiariaProducto.unidades).desc()
+    ).limit(5).all()
+
+
+def medir(funcion, repeticiones=50):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000, resultado
+
+
+def main():
+    n_productos = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_lineas = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    capacidad = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    app = create_app(BenchConfig)
+    lineas = generar(n_productos, n_lineas)
+    preparar(app, n_productos, lineas)
+
+    sketch = SpaceSaving(capacidad)
+    inicio = time.perf_counter()
+    for _, producto, unidades in lineas:
+        sketch.agregar(producto, unidades)
+    alimentar = (time.perf_counter() - inicio) / n_lineas * 1e6
+
+    with app.app_context():
+        ms_exacto, exacto = medir(top_exacto)
+    ms_sketch, aproximado = medir(lambda: sketch.top(5))
+
+    reales = dict(exacto)
+    recall = len(set(reales) & {p for p, _, _ in aproximado}) / len(reales)
+    errores = [abs(est - reales[p]) / reales[p] for p, est, _ in aproximado if p in reales]
+
+    print(f"Base de datos: {app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}  "
+          f"productos={n_productos}  lineas={n_lineas}  capacidad={capacidad}")
+    print(f"  exacto      {ms_exacto:8.3f} ms/consulta")
+    print(f"  aproximado  {ms_sketch:8.3f} ms/consulta  ({alimentar:.2f} µs por línea al alimentar)")
+    print(f"  recall top5 {recall:.0%}   error relativo máx {max(errores, default=0):.2%}   "
+          f"cota teórica {sketch.total / capacidad:.0f} unidades")
+
+
+if __name__ == "__main__":
+    main()
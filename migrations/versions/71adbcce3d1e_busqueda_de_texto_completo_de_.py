@@ -0,0 +1,71 @@
+"""Busqueda de texto completo de estudiantes
+
+Revision ID: 71adbcce3d1e
+Revises: 2b9ffad5c233
+Create Date: 2026-10-18 07:26:13.867631
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71adbcce3d1e'
+down_revision = '2b9ffad5c233'
+branch_labels = None
+depends_on = None
+
+
+# SQLite: tabla FTS5 de contenido externo + triggers de sincronización.
+# PostgreSQL: índice GIN de trigramas sobre el texto sin acentos.
+# Mismas sentencias que app/services/busqueda.py usa con db.create_all().
+SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS estudiantes_busqueda USING fts5(
+        nombre, apellido, matricula, email,
+        content='estudiantes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6 7 8 9 10')""",
+    """CREATE TRIGGER IF NOT EXISTS estudiantes_busqueda_ai AFTER INSERT ON estudiantes BEGIN
+        INSERT INTO estudiantes_busqueda(rowid, nombre, apellido, matricula, email)
+        VALUES (new.id, new.nombre, new.apellido, new.matricula, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS estudiantes_busqueda_ad AFTER DELETE ON estudiantes BEGIN
+        INSERT INTO estudiantes_busqueda(estudiantes_busqueda, rowid, nombre, apellido, matricula, email)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.matricula, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS estudiantes_busqueda_au
+    AFTER UPDATE OF nombre, apellido, matricula, email ON estudiantes BEGIN
+        INSERT INTO estudiantes_busqueda(estudiantes_busqueda, rowid, nombre, apellido, matricula, email)
+        VALUES ('delete', old.id, old.nombre, old.apellido, old.matricula, old.email);
+        INSERT INTO estudiantes_busqueda(rowid, nombre, apellido, matricula, email)
+        VALUES (new.id, new.nombre, new.apellido, new.matricula, new.email);
+    END""",
+    # Indexar los estudiantes que ya existen
+    "INSERT INTO estudiantes_busqueda(estudiantes_busqueda) VALUES ('rebuild')",
+]
+
+POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """CREATE OR REPLACE FUNCTION estudiantes_texto_busqueda(text, text, text, text)
+    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, concat_ws(' ', $1, $2, $3, $4))) $$""",
+    """CREATE INDEX IF NOT EXISTS ix_estudiantes_busqueda_trgm ON estudiantes
+    USING gin (estudiantes_texto_busqueda(nombre, apellido, matricula, email) gin_trgm_ops)""",
+]
+
+
+def upgrade():
+    dialecto = op.get_bind().dialect.name
+    for sentencia in {'sqlite': SQLITE, 'postgresql': POSTGRES}.get(dialecto, []):
+        op.execute(sentencia)
+
+
+def downgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS estudiantes_busqueda_{trigger}")
+        op.execute("DROP TABLE IF EXISTS estudiantes_busqueda")
+    elif dialecto == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_estudiantes_busqueda_trgm")
+        op.execute("DROP FUNCTION IF EXISTS estudiantes_texto_busqueda(text, text, text, text)")
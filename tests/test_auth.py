@@ -45,6 +45,21 @@ class TestRegistro:
         assert resp.status_code == 400
         assert "message" in resp.get_json()
 
+    def test_email_duplicado_retorna_400(self, client):
+        """Registrar dos usuarios con el mismo email → 400 indicando el campo."""
+        uid = uuid.uuid4().hex[:8]
+        payload = {
+            "username": f"mail_{uid}",
+            "email": f"mail_{uid}@test.mx",
+            "password": "Pass1234!"
+        }
+        client.post("/auth/register", json=payload)
+
+        payload["username"] = f"mail2_{uid}"
+        resp = client.post("/auth/register", json=payload)
+        assert resp.status_code == 400
+        assert resp.get_json()["campo"] == "email"
+
     def test_faltan_campos_requeridos(self, client):
         """Omitir campos obligatorios → 400."""
         resp = client.post("/auth/register", json={
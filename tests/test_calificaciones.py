@@ -4,16 +4,28 @@ Suite 4: Pruebas de calificaciones y kardex.
 Rutas reales:
   POST /cal/                         → 201, retorna calificacion.to_dict()
   GET  /cal/estudiantes/<id>/kardex  → 200 {estudiante_id, nombre_estudiante,
-                                           kardex[], promedio, materias_aprobadas}
+                                           kardex[], promedio, promedio_ponderado,
+                                           materias_aprobadas}
                                      → 404 si no hay calificaciones
+  POST /cal/kardex/batch             → 200 NDJSON, un kardex por línea
+  POST /cal/batch                    → 201 {insertadas, fallidas, errores[{fila, errores}]}
+  GET  /estudiantes/<id>?resumen=true → incluye el resumen académico materializado
+  GET  /cal/materias/<id>/estadisticas → 200 {materia_id, clave, nombre, periodos[]}
+  GET  /cal/materias/estadisticas    → 200 {materias[]} con las mismas estadísticas
 
 Notas:
   - POST /materias/ requiere campo "docente" (obligatorio)
   - La aprobación usa >= 60
   - El kardex retorna 404 si no hay calificaciones (no 200)
+  - El kardex sale de una sola consulta con los datos de cada materia
 """
+import json
 import pytest
 import uuid
+from sqlalchemy import event
+from app.extensions import db as _db
+from app.models.calificacion import Calificacion
+from app.models.estudiante_resumen import EstudianteResumen
 
 
 def make_estudiante(uid):
@@ -74,6 +86,15 @@ class TestRegistroCalificaciones:
         })
         assert resp.status_code == 400
 
+    def test_materia_inexistente_retorna_404(self):
+        resp = self.client.post("/cal/", json={
+            "estudiante_id": self.id_estudiante,
+            "materia_id": 99999,
+            "calificacion": 80,
+            "periodo": "2024-1"
+        })
+        assert resp.status_code == 404
+
     def test_estudiante_inexistente_retorna_404(self):
         """Calificación para estudiante inexistente → 404."""
         resp = self.client.post("/cal/", json={
@@ -104,6 +125,16 @@ class TestRegistroCalificaciones:
         })
         assert resp.status_code == 201
 
+    @pytest.mark.parametrize("calificacion", [-1, 100.5, "abc", "NaN"])
+    def test_calificacion_fuera_de_rango_retorna_400(self, calificacion):
+        resp = self.client.post("/cal/", json={
+            "estudiante_id": self.id_estudiante,
+            "materia_id": self.id_materia,
+            "calificacion": calificacion,
+            "periodo": "2024-1"
+        })
+        assert resp.status_code == 400
+
 
 class TestKardex:
 
@@ -160,6 +191,58 @@ class TestKardex:
         kardex = client.get(f"/cal/estudiantes/{id_est}/kardex").get_json()
         assert kardex["materias_aprobadas"] == 0
 
+    def test_kardex_incluye_materia_y_promedio_ponderado(self, client):
+        """100 en una materia de 6 créditos y 50 en una de 2 → ponderado 87.5."""
+        uid = uuid.uuid4().hex[:8]
+        id_est = client.post("/estudiantes/", json=make_estudiante(uid)) \
+                       .get_json()["id"]
+        for clave, creditos, cal in [(f"A{uid}", 6, 100), (f"B{uid}", 2, 50)]:
+            mat = client.post("/materias/", json={
+                "clave": clave, "nombre": f"Materia {clave}",
+                "creditos": creditos, "docente": "Dr. Test"
+            }).get_json()
+            client.post("/cal/", json={
+                "estudiante_id": id_est, "materia_id": mat["id"],
+                "calificacion": cal, "periodo": "2024-1"
+            })
+
+        kardex = client.get(f"/cal/estudiantes/{id_est}/kardex").get_json()
+
+        assert kardex["promedio"] == 75.0
+        assert kardex["promedio_ponderado"] == 87.5
+        assert kardex["materias_aprobadas"] == 1
+        assert [(m["clave"], m["creditos"]) for m in kardex["kardex"]] == [(f"A{uid}", 6), (f"B{uid}", 2)]
+        assert kardex["kardex"][0]["materia"] == f"Materia A{uid}"
+
+    def test_kardex_usa_una_sola_consulta(self, app, client):
+        uid = uuid.uuid4().hex[:8]
+        id_est = client.post("/estudiantes/", json=make_estudiante(uid)).get_json()["id"]
+        mat = client.post("/materias/", json={
+            "clave": f"Q{uid}", "nombre": "Una", "creditos": 3, "docente": "Dr. Test"
+        }).get_json()
+        for periodo in ("2023-1", "2023-2", "2024-1", "2024-2"):
+            client.post("/cal/", json={
+                "estudiante_id": id_est, "materia_id": mat["id"],
+                "calificacion": 75, "periodo": periodo
+            })
+
+        consultas = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            consultas.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            resp = client.get(f"/cal/estudiantes/{id_est}/kardex")
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert resp.status_code == 200
+        assert len(resp.get_json()["kardex"]) == 4
+        assert len(consultas) == 1
+
     def test_kardex_sin_calificaciones_retorna_404(self, client):
         """Estudiante sin calificaciones → 404 (la API no retorna 200 vacío)."""
         uid = uuid.uuid4().hex[:8]
@@ -171,4 +254,372 @@ class TestKardex:
     def test_kardex_estudiante_inexistente_retorna_404(self, client):
         """ID de estudiante que no existe → 404."""
         resp = client.get("/cal/estudiantes/99999/kardex")
-        assert resp.status_code == 404
\ No newline at end of file
+        assert resp.status_code == 404
+
+
+class TestKardexLote:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.carrera = f"LOTE{uid}"
+        self.ids = []
+        for i in range(3):
+            datos = make_estudiante(f"{uid}{i}")
+            datos.update(carrera=self.carrera, semestre=1 + i % 2)
+            self.ids.append(client.post("/estudiantes/", json=datos).get_json()["id"])
+        mat = client.post("/materias/", json={
+            "clave": f"L{uid}", "nombre": "Lote", "creditos": 4, "docente": "Dr. Test"
+        }).get_json()
+        for id_est, cal in zip(self.ids[:2], (95, 40)):
+            client.post("/cal/", json={
+                "estudiante_id": id_est, "materia_id": mat["id"],
+                "calificacion": cal, "periodo": "2024-1"
+            })
+
+    def _lote(self, cuerpo):
+        resp = self.client.post("/cal/kardex/batch", json=cuerpo)
+        lineas = [json.loads(l) for l in resp.get_data(as_text=True).splitlines()] \
+            if resp.status_code == 200 else None
+        return resp, lineas
+
+    def test_lote_por_ids_en_ndjson(self):
+        resp, lineas = self._lote({"estudiante_ids": self.ids + [99999]})
+
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        assert [l["estudiante_id"] for l in lineas] == self.ids + [99999]
+        assert lineas[0]["promedio"] == 95.0 and lineas[0]["materias_aprobadas"] == 1
+        assert lineas[1]["materias_aprobadas"] == 0
+        assert lineas[2]["kardex"] == []
+        assert lineas[3]["error"] == "Estudiante no encontrado"
+
+    def test_lote_por_carrera_y_semestre(self):
+        _, lineas = self._lote({"carrera": self.carrera})
+        assert [l["estudiante_id"] for l in lineas] == self.ids
+
+        _, lineas = self._lote({"carrera": self.carrera, "semestre": 2})
+        assert [l["estudiante_id"] for l in lineas] == [self.ids[1]]
+
+    @pytest.mark.parametrize("cuerpo", [
+        lambda self: {"carrera": self.carrera},
+        # Más ids que el límite de parámetros de SQLite y que cualquier bloque
+        lambda self: {"estudiante_ids": self.ids + list(range(10 ** 8, 10 ** 8 + 40000))},
+    ])
+    def test_consultas_no_crecen_con_el_grupo(self, app, cuerpo):
+        consultas = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            consultas.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            resp, lineas = self._lote(cuerpo(self))
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert resp.status_code == 200
+        assert [l["estudiante_id"] for l in lineas][:3] == self.ids
+        assert len(consultas) == 1
+
+    @pytest.mark.parametrize("cuerpo", [
+        {},
+        {"estudiante_ids": []},
+        {"estudiante_ids": ["uno"]},
+        {"semestre": 3},
+        {"estudiante_ids": [True]},
+        {"carrera": "ITIC", "semestre": "quinto"},
+        {"carrera": "ITIC", "semestre": True},
+        {"carrera": ["ITIC"]},
+    ])
+    def test_cuerpo_invalido_retorna_400(self, cuerpo):
+        resp, _ = self._lote(cuerpo)
+        assert resp.status_code == 400
+
+
+class TestCargaCalificaciones:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.estudiantes = [
+            client.post("/estudiantes/", json=make_estudiante(f"{uid}{i}")).get_json()["id"]
+            for i in range(3)
+        ]
+        self.materia = client.post("/materias/", json={
+            "clave": f"C{uid}", "nombre": "Carga", "creditos": 4, "docente": "Dr. Test"
+        }).get_json()["id"]
+
+    def _fila(self, estudiante, calificacion=80, periodo="2024-1"):
+        return {"estudiante_id": estudiante, "materia_id": self.materia,
+                "calificacion": calificacion, "periodo": periodo}
+
+    def test_carga_json_inserta_todas(self):
+        resp = self.client.post("/cal/batch", json=[self._fila(e) for e in self.estudiantes])
+
+        assert resp.status_code == 201
+        assert resp.get_json()["insertadas"] == 3
+        kardex = self.client.get(f"/cal/estudiantes/{self.estudiantes[0]}/kardex").get_json()
+        assert kardex["kardex"][0]["calificacion"] == 80.0
+
+    def test_carga_csv(self):
+        a, b, _ = self.estudiantes
+        csv = ("estudiante_id,materia_id,calificacion,periodo,fecha_evaluacion\n"
+               f"{a},{self.materia},91.5,2024-2,2024-12-01\n"
+               f"{b},{self.materia},55,2024-2,\n")
+        resp = self.client.post("/cal/batch", data=csv, content_type="text/csv")
+
+        assert resp.status_code == 201
+        assert resp.get_json()["insertadas"] == 2
+        kardex = self.client.get(f"/cal/estudiantes/{a}/kardex").get_json()
+        assert kardex["kardex"][0]["fecha_evaluacion"] == "2024-12-01"
+
+    def test_errores_por_fila_en_mejor_esfuerzo(self):
+        a, b, c = self.estudiantes
+        self.client.post("/cal/", json=self._fila(c, periodo="2024-3"))
+        resp = self.client.post("/cal/batch", json={"calificaciones": [
+            self._fila(a, periodo="2024-3"),
+            self._fila(99999, periodo="2024-3"),
+            self._fila(a, periodo="2024-3"),            # repetida en el archivo
+            self._fila(c, periodo="2024-3"),            # ya registrada
+            {"estudiante_id": b, "materia_id": self.materia, "periodo": "2024-3"},
+            self._fila(b, calificacion=120, periodo="2024-3"),
+        ]})
+
+        datos = resp.get_json()
+        assert resp.status_code == 201
+        assert datos["insertadas"] == 1
+        errores = {e["fila"]: e["errores"] for e in datos["errores"]}
+        assert sorted(errores) == [2, 3, 4, 5, 6]
+        assert errores[2] == ["Estudiante no encontrado."]
+        assert errores[3] == ["Duplicada con la fila 1."]
+        assert "Ya existe" in errores[4][0]
+        assert errores[5] == ["El campo calificacion es obligatorio."]
+
+    def test_todo_o_nada_no_inserta_si_hay_errores(self):
+        a, b, _ = self.estudiantes
+        resp = self.client.post("/cal/batch?modo=todo_o_nada", json=[
+            self._fila(a, periodo="2024-4"), self._fila(99999, periodo="2024-4")
+        ])
+
+        assert resp.status_code == 400
+        assert resp.get_json()["insertadas"] == 0
+        assert self.client.get(f"/cal/estudiantes/{a}/kardex").status_code == 404
+
+    def test_validacion_con_consultas_fijas(self, app):
+        consultas = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            consultas.append(statement)
+
+        filas = [self._fila(e, periodo=f"P{i}") for i in range(20) for e in self.estudiantes]
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            resp = self.client.post("/cal/batch", json=filas)
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert resp.get_json()["insertadas"] == 60
+        # Validación: estudiantes IN, materias IN, ya registradas; un INSERT
+        # executemany; resumen académico: créditos, upsert y último periodo
+        assert len(consultas) == 7
+
+    @pytest.mark.parametrize("cuerpo", [[], {"calificaciones": "x"}, {"otra": 1}])
+    def test_cuerpo_invalido_retorna_400(self, cuerpo):
+        assert self.client.post("/cal/batch", json=cuerpo).status_code == 400
+
+
+class TestResumenAcademico:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, app, client):
+        self.app = app
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.id_est = client.post("/estudiantes/", json=make_estudiante(uid)).get_json()["id"]
+        self.materias = [
+            client.post("/materias/", json={
+                "clave": f"R{i}{uid}", "nombre": f"Resumen {i}",
+                "creditos": creditos, "docente": "Dr. Test"
+            }).get_json()["id"]
+            for i, creditos in enumerate((6, 2))
+        ]
+
+    def _resumen(self):
+        return self.client.get(f"/estudiantes/{self.id_est}?resumen=true").get_json()["resumen"]
+
+    def _en_tabla(self):
+        with self.app.app_context():
+            fila = _db.session.get(EstudianteResumen, self.id_est)
+            return fila.to_dict() if fila else EstudianteResumen.vacio()
+
+    def test_alta_individual_y_en_lote_actualizan_resumen(self):
+        a, b = self.materias
+        self.client.post("/cal/", json={
+            "estudiante_id": self.id_est, "materia_id": a, "calificacion": 90, "periodo": "2024-1"
+        })
+        self.client.post("/cal/batch", json=[
+            {"estudiante_id": self.id_est, "materia_id": b, "calificacion": 50, "periodo": "2024-2"}
+        ])
+
+        assert self._resumen() == {
+            "promedio": 70.0, "total_calificaciones": 2, "materias_aprobadas": 1,
+            "creditos_aprobados": 6, "ultimo_periodo": "2024-2"
+        }
+
+    def test_modificar_y_borrar_con_el_orm(self):
+        a, b = self.materias
+        for materia, cal, periodo in ((a, 90, "2024-1"), (b, 70, "2024-2")):
+            self.client.post("/cal/", json={
+                "estudiante_id": self.id_est, "materia_id": materia,
+                "calificacion": cal, "periodo": periodo
+            })
+
+        with self.app.app_context():
+            primera, segunda = Calificacion.query.filter_by(estudiante_id=self.id_est) \
+                                                  .order_by(Calificacion.periodo).all()
+            primera.calificacion = 40      # deja de estar aprobada
+            _db.session.delete(segunda)    # se va el último periodo
+            _db.session.commit()
+
+        assert self._en_tabla() == {
+            "promedio": 40.0, "total_calificaciones": 1, "materias_aprobadas": 0,
+            "creditos_aprobados": 0, "ultimo_periodo": "2024-1"
+        }
+
+    def test_reconstruir_coincide_con_lo_incremental(self):
+        a, b = self.materias
+        self.client.post("/cal/batch", json=[
+            {"estudiante_id": self.id_est, "materia_id": m, "calificacion": c, "periodo": p}
+            for m, c, p in ((a, 65, "2023-1"), (b, 100, "2023-2"), (a, 59.5, "2024-1"))
+        ])
+        incremental = self._en_tabla()
+
+        resultado = self.app.test_cli_runner().invoke(args=["escolar", "reconstruir-resumen"])
+
+        assert resultado.exit_code == 0, resultado.output
+        assert self._en_tabla() == incremental
+        assert incremental["creditos_aprobados"] == 8
+
+    def test_cambiar_creditos_de_la_materia_actualiza_resumen(self):
+        a, b = self.materias
+        self.client.post("/cal/batch", json=[
+            {"estudiante_id": self.id_est, "materia_id": a, "calificacion": 90, "periodo": "2024-1"},
+            {"estudiante_id": self.id_est, "materia_id": b, "calificacion": 50, "periodo": "2024-1"},
+        ])
+
+        assert self.client.put(f"/materias/{a}", json={"creditos": 8}).status_code == 200
+        assert self.client.put(f"/materias/{b}", json={"creditos": 5}).status_code == 200
+
+        assert self._en_tabla()["creditos_aprobados"] == 8
+        resultado = self.app.test_cli_runner().invoke(args=["escolar", "reconstruir-resumen"])
+        assert resultado.exit_code == 0, resultado.output
+        assert self._en_tabla()["creditos_aprobados"] == 8
+
+    def test_embeber_resumen_sin_consultas_extra(self):
+        self.client.post("/cal/", json={
+            "estudiante_id": self.id_est, "materia_id": self.materias[0],
+            "calificacion": 80, "periodo": "2024-1"
+        })
+        consultas = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            consultas.append(statement)
+
+        with self.app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            datos = self.client.get(f"/estudiantes/{self.id_est}?resumen=true").get_json()
+            lista = self.client.get("/estudiantes/?resumen=true&per_page=5").get_json()
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert datos["resumen"]["promedio"] == 80.0
+        assert all("resumen" in e for e in lista["estudiantes"])
+        # 1 para el detalle; conteo + página para la lista
+        assert len(consultas) == 3
+
+    def test_sin_resumen_por_defecto(self):
+        datos = self.client.get(f"/estudiantes/{self.id_est}").get_json()
+        assert "resumen" not in datos
+        assert self._resumen() == EstudianteResumen.vacio()
+
+
+class TestEstadisticasMaterias:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.estudiantes = [
+            client.post("/estudiantes/", json=make_estudiante(f"{uid}{i}")).get_json()["id"]
+            for i in range(5)
+        ]
+        self.materia = client.post("/materias/", json={
+            "clave": f"E{uid}", "nombre": "Estadística", "creditos": 4, "docente": "Dr. Test"
+        }).get_json()["id"]
+        self.calificaciones = {"2024-1": [50, 70, 80, 90, 100], "2024-2": [40, 65]}
+        client.post("/cal/batch", json=[
+            {"estudiante_id": e, "materia_id": self.materia, "calificacion": c, "periodo": p}
+            for p, valores in self.calificaciones.items()
+            for e, c in zip(self.estudiantes, valores)
+        ])
+
+    def test_estadisticas_coinciden_con_numpy(self):
+        np = pytest.importorskip("numpy")
+        resp = self.client.get(f"/cal/materias/{self.materia}/estadisticas")
+
+        assert resp.status_code == 200
+        datos = resp.get_json()
+        assert [p["periodo"] for p in datos["periodos"]] == ["2024-1", "2024-2"]
+        for periodo in datos["periodos"]:
+            valores = np.array(self.calificaciones[periodo["periodo"]], dtype=float)
+            assert periodo["total"] == len(valores)
+            assert periodo["promedio"] == pytest.approx(valores.mean(), abs=0.01)
+            assert periodo["mediana"] == pytest.approx(np.median(valores), abs=0.01)
+            assert periodo["desviacion_estandar"] == pytest.approx(valores.std(), abs=0.01)
+            for p in (10, 25, 75, 90):
+                assert periodo["percentiles"][f"p{p}"] == pytest.approx(np.percentile(valores, p), abs=0.01)
+            assert periodo["tasa_aprobacion"] == pytest.approx((valores >= 60).mean(), abs=0.0001)
+            assert sum(r["total"] for r in periodo["histograma"]) == len(valores)
+
+    def test_histograma_incluye_cien_en_el_ultimo_rango(self):
+        datos = self.client.get(f"/cal/materias/{self.materia}/estadisticas?periodo=2024-1").get_json()
+
+        assert len(datos["periodos"]) == 1
+        histograma = {r["desde"]: r["total"] for r in datos["periodos"][0]["histograma"]}
+        assert histograma[90] == 2 and histograma[50] == 1 and histograma[0] == 0
+
+    def test_calificacion_negativa_guardada_no_rompe_el_histograma(self, app):
+        """Datos previos a la validación (fuera de 0-100) caen en el primer o último rango."""
+        with app.app_context():
+            _db.session.add(Calificacion(estudiante_id=self.estudiantes[0], materia_id=self.materia,
+                                         calificacion=-5, periodo="2023-2"))
+            _db.session.commit()
+        datos = self.client.get(f"/cal/materias/{self.materia}/estadisticas?periodo=2023-2").get_json()
+
+        histograma = {r["desde"]: r["total"] for r in datos["periodos"][0]["histograma"]}
+        assert histograma[0] == 1
+
+    def test_variante_de_todas_las_materias(self):
+        datos = self.client.get("/cal/materias/estadisticas?periodo=2024-2").get_json()
+
+        materia = next(m for m in datos["materias"] if m["materia_id"] == self.materia)
+        assert materia["periodos"][0]["total"] == 2
+        assert materia["periodos"][0]["tasa_aprobacion"] == 0.5
+
+    def test_materia_sin_calificaciones_e_inexistente(self):
+        uid = uuid.uuid4().hex[:8]
+        vacia = self.client.post("/materias/", json={
+            "clave": f"V{uid}", "nombre": "Vacía", "creditos": 2, "docente": "Dr. Test"
+        }).get_json()["id"]
+
+        assert self.client.get(f"/cal/materias/{vacia}/estadisticas").get_json()["periodos"] == []
+        assert self.client.get("/cal/materias/999999/estadisticas").status_code == 404
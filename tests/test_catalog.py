@@ -4,8 +4,13 @@ Suite 6: Pruebas de los CRUDs de Catálogo.
 Cubre: categorias, clientes, materias y productos.
 Objetivo: llevar la cobertura total por encima del 80%.
 """
+import json
+import tracemalloc
 import pytest
 import uuid
+from sqlalchemy import delete, event, insert
+from app.extensions import db as _db
+from app.models.producto import Producto
 
 
 class TestCategorias:
@@ -173,4 +178,259 @@ class TestProductos:
         resp = client.post("/productos/", json={
             "sku": f"DUP_{uid}", "nombre": "Prod B", "precio": 200
         })
-        assert resp.status_code == 409
\ No newline at end of file
+        assert resp.status_code == 409
+
+
+class TestConflictosDeUnicidad:
+    """Los duplicados se detectan por la restricción UNIQUE (sin SELECT previo)."""
+
+    CASOS = [
+        ("/categorias/", "nombre", lambda uid: {"nombre": f"Uni_{uid}"},
+         "Ya existe una categoría con ese nombre"),
+        ("/clientes/", "email", lambda uid: {"nombre": "Uni", "email": f"uni_{uid}@test.mx"},
+         "Ya existe un cliente con ese email"),
+        ("/materias/", "clave", lambda uid: {"clave": f"UNI_{uid}", "nombre": "Uni",
+                                             "creditos": 4, "docente": "Dr. U"},
+         "Ya existe una materia con esa clave"),
+        ("/productos/", "sku", lambda uid: {"sku": f"UNI_{uid}", "nombre": "Uni", "precio": 10},
+         "Ya existe un producto con ese SKU"),
+    ]
+
+    @pytest.mark.parametrize("ruta, campo, datos, mensaje", CASOS)
+    def test_alta_duplicada_nombra_el_campo(self, client, ruta, campo, datos, mensaje):
+        uid = uuid.uuid4().hex[:8]
+        client.post(ruta, json=datos(uid))
+        resp = client.post(ruta, json=datos(uid))
+        assert resp.status_code == 409
+        assert resp.get_json() == {"error": mensaje, "campo": campo}
+
+    @pytest.mark.parametrize("ruta, campo, datos, mensaje", CASOS)
+    def test_actualizar_con_valor_de_otro_retorna_409(self, client, ruta, campo, datos, mensaje):
+        uid, otro = uuid.uuid4().hex[:8], uuid.uuid4().hex[:8]
+        client.post(ruta, json=datos(uid))
+        id_ = client.post(ruta, json=datos(otro)).get_json()["id"]
+
+        resp = client.put(f"{ruta}{id_}", json={campo: datos(uid)[campo]})
+        assert resp.status_code == 409
+        assert resp.get_json()["campo"] == campo
+        assert client.get(f"{ruta}{id_}").get_json()[campo] == datos(otro)[campo]
+
+    def test_actualizar_con_su_propio_valor_no_es_conflicto(self, client):
+        uid = uuid.uuid4().hex[:8]
+        id_cat = client.post("/categorias/", json={"nombre": f"Mismo_{uid}"}).get_json()["id"]
+        resp = client.put(f"/categorias/{id_cat}", json={"nombre": f"Mismo_{uid}"})
+        assert resp.status_code == 200
+
+
+def get_con_sql(app, client, url, **kwargs):
+    """GET que además retorna las sentencias SQL que ejecutó."""
+    sentencias = []
+
+    def capturar(conn, cursor, statement, params, context, executemany):
+        sentencias.append(statement)
+
+    with app.app_context():
+        engine = _db.engine
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        resp = client.get(url, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    return resp, sentencias
+
+
+class TestCamposDispersos:
+    """?fields= limita las columnas del SELECT y las llaves de la respuesta."""
+
+    def test_lista_de_productos_con_campos(self, client, app):
+        uid = uuid.uuid4().hex[:8]
+        client.post("/productos/", json={
+            "sku": f"FLD_{uid}", "nombre": "Mouse", "description": "x" * 500, "precio": 150
+        })
+        resp, sentencias = get_con_sql(app, client, "/productos/?fields=id,nombre,precio")
+
+        assert resp.status_code == 200
+        assert all(set(p) == {"id", "nombre", "precio"} for p in resp.get_json())
+        assert len(sentencias) == 1
+        assert "description" not in sentencias[0]
+        assert "inventario_slots" not in sentencias[0]
+
+    def test_listado_completo_carga_los_slots_en_una_consulta(self, client, app):
+        """Los slots no se cargan por producto: una sola consulta IN (...) para todos."""
+        uid = uuid.uuid4().hex[:8]
+        for i in range(3):
+            client.post("/productos/", json={"sku": f"SEL{i}_{uid}", "nombre": "Hub", "precio": 90})
+        resp, sentencias = get_con_sql(app, client, "/productos/")
+
+        assert resp.status_code == 200
+        assert len(sentencias) == 2
+        assert "inventario_slots" in sentencias[1]
+
+    def test_campo_calculado_carga_lo_que_necesita(self, client):
+        uid = uuid.uuid4().hex[:8]
+        id_prod = client.post("/productos/", json={
+            "sku": f"STK_{uid}", "nombre": "Cable", "precio": 20, "stock": 7
+        }).get_json()["id"]
+        resp = client.get(f"/productos/{id_prod}?fields=sku,stock,slots_inventario")
+        assert resp.get_json() == {"sku": f"STK_{uid}", "stock": 7, "slots_inventario": 0}
+
+    @pytest.mark.parametrize("ruta", ["/productos/", "/clientes/", "/categorias/", "/materias/"])
+    def test_campo_desconocido_retorna_400(self, client, ruta):
+        resp = client.get(f"{ruta}?fields=id,password")
+        assert resp.status_code == 400
+        assert "password" in resp.get_json()["error"]
+
+    def test_fields_vacio_retorna_400(self, client):
+        assert client.get("/clientes/?fields=").status_code == 400
+
+    def test_detalle_de_materia_con_campos(self, client):
+        uid = uuid.uuid4().hex[:8]
+        id_mat = client.post("/materias/", json={
+            "clave": f"FLD_{uid}", "nombre": "Lógica", "creditos": 4, "docente": "Dr. L"
+        }).get_json()["id"]
+        resp = client.get(f"/materias/{id_mat}?fields=nombre,clave,nombre")
+        assert set(resp.get_json()) == {"nombre", "clave"}
+
+
+class TestListadosPaginadosYEnFlujo:
+    """?pagina=/?per_page= y ?stream=1 en los listados de catálogo."""
+
+    def test_paginacion_de_categorias(self, client):
+        uid = uuid.uuid4().hex[:8]
+        for i in range(3):
+            client.post("/categorias/", json={"nombre": f"Pag{i}_{uid}"})
+        datos = client.get("/categorias/?pagina=1&per_page=2").get_json()
+        assert set(datos) == {"categorias", "pagina", "total_paginas", "total_categorias"}
+        assert len(datos["categorias"]) == 2
+        assert datos["total_categorias"] >= 3
+        assert datos["total_paginas"] == -(-datos["total_categorias"] // 2)
+
+    def test_per_page_tiene_maximo(self, client, app):
+        uid = uuid.uuid4().hex[:8]
+        for i in range(3):
+            client.post("/clientes/", json={"nombre": "Max", "email": f"max{i}_{uid}@test.mx"})
+        maximo = app.config["LISTADOS_MAX_PER_PAGE"]
+        app.config["LISTADOS_MAX_PER_PAGE"] = 2
+        try:
+            datos = client.get("/clientes/?per_page=500&fields=id").get_json()
+        finally:
+            app.config["LISTADOS_MAX_PER_PAGE"] = maximo
+        assert len(datos["clientes"]) == 2
+
+    @pytest.mark.parametrize("ruta", ["/productos/", "/clientes/", "/categorias/", "/materias/"])
+    def test_stream_es_el_mismo_arreglo(self, client, ruta):
+        completo = client.get(ruta).get_json()
+        resp = client.get(f"{ruta}?stream=1")
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/json"
+        assert json.loads(resp.get_data(as_text=True)) == completo
+
+    def test_stream_con_campos(self, client):
+        uid = uuid.uuid4().hex[:8]
+        client.post("/materias/", json={
+            "clave": f"STR_{uid}", "nombre": "Redes", "creditos": 4, "docente": "Dr. R"
+        })
+        materias = json.loads(client.get("/materias/?stream=1&fields=clave").get_data(as_text=True))
+        assert {"clave": f"STR_{uid}"} in materias
+        assert all(set(m) == {"clave"} for m in materias)
+
+    def _pico_stream(self, app, client, filas, prefijo):
+        """Memoria pico (tracemalloc) al consumir /productos/?stream=1 con `filas` productos extra."""
+        with app.app_context():
+            _db.session.execute(insert(Producto), [
+                {"sku": f"{prefijo}{i}", "nombre": f"Producto {i}", "description": "d" * 200, "precio": 1}
+                for i in range(filas)
+            ])
+            _db.session.commit()
+        try:
+            tracemalloc.start()
+            resp = client.get("/productos/?stream=1", buffered=False)
+            recibidos = sum(len(pedazo) for pedazo in resp.response)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            resp.close()
+        finally:
+            with app.app_context():
+                _db.session.execute(delete(Producto).where(Producto.sku.like(f"{prefijo}%")))
+                _db.session.commit()
+        assert recibidos > filas * 200
+        return pico
+
+    def test_memoria_del_stream_no_crece_con_la_tabla(self, client, app):
+        lote = app.config["LISTADOS_STREAM_LOTE"]
+        app.config["LISTADOS_STREAM_LOTE"] = 200
+        try:
+            uid = uuid.uuid4().hex[:6]
+            chico = self._pico_stream(app, client, 1000, f"MC{uid}")
+            grande = self._pico_stream(app, client, 5000, f"MG{uid}")
+        finally:
+            app.config["LISTADOS_STREAM_LOTE"] = lote
+        # 5 veces más filas; sin stream la memoria crecería en la misma proporción
+        assert grande < chico * 1.5
+
+
+class TestCacheCatalogos:
+    """Categorías y materias se sirven desde la caché con ETag hasta que se escriben."""
+
+    def _nueva_materia(self, client, uid):
+        return client.post("/materias/", json={
+            "clave": f"CCH_{uid}", "nombre": "Cache", "creditos": 4, "docente": "Dr. C"
+        }).get_json()["id"]
+
+    def test_acierto_no_toca_la_base(self, client, app):
+        client.post("/categorias/", json={"nombre": f"Cch_{uuid.uuid4().hex[:8]}"})
+        primera = client.get("/categorias/")
+        segunda, sentencias = get_con_sql(app, client, "/categorias/")
+
+        assert primera.headers["X-Cache"] == "MISS"
+        assert segunda.headers["X-Cache"] == "HIT"
+        assert sentencias == []
+        assert segunda.get_json() == primera.get_json()
+        assert segunda.headers["ETag"] == primera.headers["ETag"]
+        assert not segunda.headers["ETag"].startswith("W/")
+
+    def test_if_none_match_retorna_304_sin_consultar(self, client, app):
+        id_mat = self._nueva_materia(client, uuid.uuid4().hex[:8])
+        etag = client.get(f"/materias/{id_mat}").headers["ETag"]
+        resp, sentencias = get_con_sql(app, client, f"/materias/{id_mat}",
+                                       headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == etag
+        assert sentencias == []
+
+    def test_escrituras_invalidan(self, client):
+        uid = uuid.uuid4().hex[:8]
+        id_mat = self._nueva_materia(client, uid)
+        antes = client.get("/materias/")
+        client.get("/materias/")
+
+        client.put(f"/materias/{id_mat}", json={"nombre": "Cache 2"})
+        despues = client.get("/materias/", headers={"If-None-Match": antes.headers["ETag"]})
+        assert despues.status_code == 200
+        assert despues.headers["X-Cache"] == "MISS"
+        assert {"id": id_mat, "clave": f"CCH_{uid}", "nombre": "Cache 2",
+                "creditos": 4, "docente": "Dr. C"} in despues.get_json()
+
+        client.delete(f"/materias/{id_mat}")
+        assert client.get(f"/materias/{id_mat}").status_code == 404
+
+    def test_escritura_fallida_no_invalida(self, client):
+        uid = uuid.uuid4().hex[:8]
+        client.post("/categorias/", json={"nombre": f"Fal_{uid}"})
+        etag = client.get("/categorias/").headers["ETag"]
+
+        assert client.post("/categorias/", json={"nombre": f"Fal_{uid}"}).status_code == 409
+        resp = client.get("/categorias/")
+        assert resp.headers["X-Cache"] == "HIT"
+        assert resp.headers["ETag"] == etag
+
+    def test_cada_variante_tiene_su_entrada(self, client):
+        completa = client.get("/categorias/?fields=id,nombre")
+        paginada = client.get("/categorias/?fields=id,nombre&per_page=1")
+        assert completa.headers["ETag"] != paginada.headers["ETag"]
+        assert isinstance(completa.get_json(), list)
+        assert len(paginada.get_json()["categorias"]) <= 1
+
+    def test_stream_y_errores_no_se_guardan(self, client):
+        assert "X-Cache" not in client.get("/categorias/?stream=1").headers
+        assert "ETag" not in client.get("/materias/?fields=nada").headers
@@ -6,9 +6,15 @@ Ruta base: /estudiantes/
 - Matrícula/email duplicados retornan 400
 - GET lista retorna: {estudiantes[], pagina, total_paginas, total_estudiantes}
 - DELETE retorna {message} y marca activo=False
+- GET /estudiantes/?cursor= retorna {estudiantes[], siguiente_cursor} sin COUNT(*)
+- GET /estudiantes/ranking retorna {ranking[], siguiente_cursor}
+- GET /estudiantes/buscar?q= retorna {estudiantes[]} ordenados por relevancia
+- POST /estudiantes/bulk retorna {insertados, actualizados, fallidos, resultados[]}
 """
 import pytest
 import uuid
+from sqlalchemy import event
+from app.extensions import db as _db
 
 
 def make_estudiante(uid):
@@ -48,6 +54,35 @@ class TestCrearEstudiante:
         assert respuesta.status_code == 400
         assert "error" in respuesta.get_json()
 
+    def test_correo_duplicado_nombra_el_campo(self, client):
+        """CASO NEGATIVO: Correo de otro estudiante → 400 con el campo en conflicto."""
+        uid, otro = uuid.uuid4().hex[:8], uuid.uuid4().hex[:8]
+        client.post("/estudiantes/", json=make_estudiante(uid))
+        data = {**make_estudiante(otro), "email": f"carlos{uid}@test.edu.mx"}
+        respuesta = client.post("/estudiantes/", json=data)
+
+        assert respuesta.status_code == 400
+        assert respuesta.get_json() == {"error": "El correo electrónico ya existe.", "campo": "email"}
+
+    def test_alta_es_un_solo_insert(self, client, app):
+        """Sin consultas previas de unicidad: la primera sentencia es el INSERT."""
+        sentencias = []
+
+        def capturar(conn, cursor, statement, params, context, executemany):
+            sentencias.append(statement.lstrip().split()[0].upper())
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            respuesta = client.post("/estudiantes/", json=make_estudiante(uuid.uuid4().hex[:8]))
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        assert respuesta.status_code == 201
+        assert sentencias[0] == "INSERT"
+        assert sentencias.count("INSERT") == 1
+
     def test_campo_email_requerido(self, client):
         """CASO NEGATIVO: Omitir email → 400 mencionando 'email'."""
         uid = uuid.uuid4().hex[:8]
@@ -133,6 +168,44 @@ class TestActualizarEstudiante:
         assert resp.status_code == 200
         assert resp.get_json()["semestre"] == 8
 
+    def test_matricula_de_otro_estudiante_retorna_400(self, client):
+        """PUT con la matrícula de otro estudiante → 400 y el cambio no se guarda."""
+        uid, otro = uuid.uuid4().hex[:8], uuid.uuid4().hex[:8]
+        client.post("/estudiantes/", json=make_estudiante(uid))
+        id_est = client.post("/estudiantes/", json=make_estudiante(otro)).get_json()["id"]
+
+        resp = client.put(f"/estudiantes/{id_est}", json={"matricula": f"MAT{uid}", "semestre": 9})
+        assert resp.status_code == 400
+        assert resp.get_json()["campo"] == "matricula"
+        assert client.get(f"/estudiantes/{id_est}").get_json()["semestre"] == 5
+
+
+class TestCamposEstudiante:
+    """?fields= en el listado (por página y por cursor) y en el detalle."""
+
+    def test_listado_con_campos(self, client):
+        client.post("/estudiantes/", json=make_estudiante(uuid.uuid4().hex[:8]))
+        datos = client.get("/estudiantes/?fields=id,nombre_completo").get_json()
+        assert datos["estudiantes"]
+        assert all(set(e) == {"id", "nombre_completo"} for e in datos["estudiantes"])
+
+    def test_cursor_con_campos(self, client):
+        client.post("/estudiantes/", json=make_estudiante(uuid.uuid4().hex[:8]))
+        datos = client.get("/estudiantes/?cursor=&per_page=2&fields=matricula").get_json()
+        assert all(set(e) == {"matricula"} for e in datos["estudiantes"])
+
+    def test_detalle_con_campos_y_resumen(self, client):
+        uid = uuid.uuid4().hex[:8]
+        id_est = client.post("/estudiantes/", json=make_estudiante(uid)).get_json()["id"]
+        datos = client.get(f"/estudiantes/{id_est}?fields=matricula,email&resumen=1").get_json()
+        assert set(datos) == {"matricula", "email", "resumen"}
+        assert datos["matricula"] == f"MAT{uid}"
+
+    def test_campo_desconocido_retorna_400(self, client):
+        resp = client.get("/estudiantes/?fields=matricula,promedio")
+        assert resp.status_code == 400
+        assert "promedio" in resp.get_json()["error"]
+
 
 class TestEliminarEstudiante:
 
@@ -155,4 +228,297 @@ class TestEliminarEstudiante:
         resp_get = client.get(f"/estudiantes/{id_est}")
         assert resp_get.status_code == 200
         assert resp_get.get_json()["activo"] == False, \
-            "El estudiante debe tener activo=False tras el borrado lógico"
\ No newline at end of file
+            "El estudiante debe tener activo=False tras el borrado lógico"
+
+
+class TestPaginacionPorCursor:
+    """Pruebas del modo cursor de GET /estudiantes/"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.carrera = f"Cursor {uid}"
+        self.ids = []
+        for i in range(5):
+            datos = make_estudiante(f"{uid}{i}")
+            datos["carrera"] = self.carrera
+            self.ids.append(client.post("/estudiantes/", json=datos).get_json()["id"])
+
+    def _pagina(self, **params):
+        params.setdefault("carrera", self.carrera)
+        params.setdefault("cursor", "")
+        return self.client.get("/estudiantes/", query_string=params)
+
+    def _consultas(self, app, **params):
+        consultas = []
+
+        def contar(conn, cursor, statement, *args):
+            consultas.append(statement.lower())
+
+        with app.app_context():
+            motor = _db.engine
+        event.listen(motor, "before_cursor_execute", contar)
+        try:
+            resp = self._pagina(**params)
+        finally:
+            event.remove(motor, "before_cursor_execute", contar)
+        return resp, consultas
+
+    def test_recorre_todos_en_orden_de_id(self):
+        vistos, cursor = [], ""
+        while True:
+            datos = self._pagina(per_page=2, cursor=cursor).get_json()
+            vistos.extend(e["id"] for e in datos["estudiantes"])
+            cursor = datos["siguiente_cursor"]
+            if not cursor:
+                break
+
+        assert vistos == self.ids
+        assert "total_estudiantes" not in datos
+
+    def test_sin_count_por_defecto(self, app):
+        resp, consultas = self._consultas(app, per_page=2)
+
+        assert resp.status_code == 200
+        assert len(consultas) == 1
+        assert "count(" not in consultas[0]
+
+    def test_total_exacto_y_aproximado_en_cache(self, app):
+        datos = self._pagina(total="exacto").get_json()
+        assert datos["total_estudiantes"] == 5 and datos["total_aproximado"] is False
+
+        assert self._pagina(total="aproximado").get_json()["total_estudiantes"] == 5
+        resp, consultas = self._consultas(app, total="aproximado")
+        assert resp.get_json()["total_aproximado"] is True
+        assert not any("count(" in c for c in consultas)
+
+    def test_cursor_de_otra_carrera_retorna_400(self):
+        cursor = self._pagina(per_page=2).get_json()["siguiente_cursor"]
+
+        assert self._pagina(carrera="Otra", cursor=cursor).status_code == 400
+
+    @pytest.mark.parametrize("params", [{"cursor": "no-es-cursor"}, {"total": "siempre"}])
+    def test_parametros_invalidos_retornan_400(self, params):
+        assert self._pagina(**params).status_code == 400
+
+class TestRankingEstudiantes:
+    """Pruebas del endpoint GET /estudiantes/ranking"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        uid = uuid.uuid4().hex[:8]
+        self.carrera = f"Ranking {uid}"
+        materia = client.post("/materias/", json={
+            "clave": f"K{uid}", "nombre": "Ranking", "creditos": 4, "docente": "Dr. Test"
+        }).get_json()["id"]
+        # Semestre 1: 90, 80, 80, 70 (empate en la segunda posición); semestre 2: 95
+        self.ids = {}
+        for i, (semestre, calificacion) in enumerate([(1, 90), (1, 80), (1, 80), (1, 70), (2, 95)]):
+            datos = make_estudiante(f"{uid}{i}")
+            datos.update(carrera=self.carrera, semestre=semestre)
+            id_est = client.post("/estudiantes/", json=datos).get_json()["id"]
+            client.post("/cal/", json={"estudiante_id": id_est, "materia_id": materia,
+                                       "calificacion": calificacion, "periodo": "2024-1"})
+            self.ids[i] = id_est
+
+    def _ranking(self, **params):
+        params.setdefault("carrera", self.carrera)
+        return self.client.get("/estudiantes/ranking", query_string=params)
+
+    def test_rank_por_semestre_con_empates(self):
+        ranking = self._ranking().get_json()["ranking"]
+
+        assert [(r["semestre"], r["posicion"], r["promedio"]) for r in ranking] == [
+            (1, 1, 90.0), (1, 2, 80.0), (1, 2, 80.0), (1, 4, 70.0), (2, 1, 95.0)
+        ]
+
+    def test_dense_rank_y_top(self):
+        ranking = self._ranking(tipo="dense_rank", top=2, semestre=1).get_json()["ranking"]
+
+        assert [r["posicion"] for r in ranking] == [1, 2, 2]
+
+    def test_inactivos_no_aparecen(self):
+        self.client.delete(f"/estudiantes/{self.ids[0]}")
+
+        ranking = self._ranking(semestre=1).get_json()["ranking"]
+        assert ranking[0]["estudiante_id"] == self.ids[1]
+        assert ranking[0]["posicion"] == 1
+
+    def test_paginacion_por_cursor(self):
+        vistos, cursor = [], None
+        while True:
+            datos = self._ranking(limite=2, **({"cursor": cursor} if cursor else {})).get_json()
+            vistos.extend(r["estudiante_id"] for r in datos["ranking"])
+            cursor = datos["siguiente_cursor"]
+            if not cursor:
+                break
+
+        completo = [r["estudiante_id"] for r in self._ranking().get_json()["ranking"]]
+        assert vistos == completo and len(vistos) == 5
+
+    def test_una_sola_consulta(self, app):
+        consultas = []
+
+        def contar(conn, cursor, statement, *args):
+            consultas.append(statement)
+
+        with app.app_context():
+            motor = _db.engine
+        event.listen(motor, "before_cursor_execute", contar)
+        try:
+            resp = self._ranking()
+        finally:
+            event.remove(motor, "before_cursor_execute", contar)
+
+        assert resp.status_code == 200
+        assert len(consultas) == 1
+
+    @pytest.mark.parametrize("params", [{"tipo": "ntile"}, {"top": 0}, {"limite": 501},
+                                        {"semestre": "x"}, {"cursor": "no-es-cursor"}])
+    def test_parametros_invalidos_retornan_400(self, params):
+        assert self._ranking(**params).status_code == 400
+
+
+class TestBuscarEstudiantes:
+    """Pruebas del endpoint GET /estudiantes/buscar"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        self.uid = uuid.uuid4().hex[:8]
+        self.ids = {}
+        for clave, (nombre, apellido) in {
+            "ramirez": ("Zacarías", f"Ramírez{self.uid}"),
+            "ramos": ("Zacarías", f"Ramos{self.uid}"),
+            "lopez": ("Ximena", f"López{self.uid}"),
+        }.items():
+            datos = make_estudiante(f"{clave}{self.uid}")
+            datos.update(nombre=nombre, apellido=apellido)
+            self.ids[clave] = client.post("/estudiantes/", json=datos).get_json()["id"]
+
+    def _ids(self, q, **params):
+        resp = self.client.get("/estudiantes/buscar", query_string={"q": q, **params})
+        assert resp.status_code == 200
+        return [e["id"] for e in resp.get_json()["estudiantes"]]
+
+    def test_sin_acentos_encuentra_con_acentos(self):
+        assert self._ids(f"ramirez{self.uid}") == [self.ids["ramirez"]]
+        assert self._ids(f"LÓPEZ{self.uid}") == [self.ids["lopez"]]
+
+    def test_coincidencia_parcial_y_varias_palabras(self):
+        assert set(self._ids("zacarias ram")) >= {self.ids["ramirez"], self.ids["ramos"]}
+        assert self._ids(f"zaca ramos{self.uid}") == [self.ids["ramos"]]
+
+    def test_por_matricula_y_correo(self):
+        assert self._ids(f"MATlopez{self.uid}") == [self.ids["lopez"]]
+        assert self._ids(f"carlosramos{self.uid}@test") == [self.ids["ramos"]]
+
+    def test_el_indice_sigue_las_actualizaciones(self):
+        self.client.put(f"/estudiantes/{self.ids['lopez']}", json={"apellido": f"Núñez{self.uid}"})
+
+        assert self._ids(f"lopez{self.uid}") == []
+        assert self._ids(f"nunez{self.uid}") == [self.ids["lopez"]]
+
+    def test_resultados_ordenados_por_relevancia(self):
+        resp = self.client.get("/estudiantes/buscar", query_string={"q": "zacarias"}).get_json()
+        puntuaciones = [e["puntuacion"] for e in resp["estudiantes"]]
+
+        assert puntuaciones == sorted(puntuaciones, reverse=True)
+
+    def test_comando_reconstruir_busqueda(self, app):
+        resultado = app.test_cli_runner().invoke(args=["escolar", "reconstruir-busqueda"])
+
+        assert resultado.exit_code == 0
+        assert self._ids(f"ramirez{self.uid}") == [self.ids["ramirez"]]
+
+    @pytest.mark.parametrize("q", ["", "a", "  "])
+    def test_consulta_corta_retorna_400(self, q):
+        assert self.client.get("/estudiantes/buscar", query_string={"q": q}).status_code == 400
+
+
+class TestImportarEstudiantes:
+    """Pruebas del endpoint POST /estudiantes/bulk"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client):
+        self.client = client
+        self.uid = uuid.uuid4().hex[:8]
+
+    def _fila(self, i, **cambios):
+        return {**make_estudiante(f"{self.uid}B{i}"), **cambios}
+
+    def test_insercion_json(self):
+        resp = self.client.post("/estudiantes/bulk", json=[self._fila(i) for i in range(3)])
+        datos = resp.get_json()
+
+        assert resp.status_code == 201
+        assert datos["insertados"] == 3 and datos["fallidos"] == 0
+        assert [r["estado"] for r in datos["resultados"]] == ["insertado"] * 3
+        obtenido = self.client.get(f"/estudiantes/{datos['resultados'][0]['id']}").get_json()
+        assert obtenido["matricula"] == f"MAT{self.uid}B0"
+
+    def test_upsert_csv_actualiza_por_matricula(self):
+        self.client.post("/estudiantes/bulk", json=[self._fila(0)])
+        csv = ("matricula,nombre,apellido,email,carrera,semestre\n"
+               f"MAT{self.uid}B0,Carla,Ramírez,carlos{self.uid}B0@test.edu.mx,ITIC,6\n"
+               f"MAT{self.uid}B1,Luis,Peña,luis{self.uid}@test.edu.mx,ITIC,1\n")
+
+        resp = self.client.post("/estudiantes/bulk?modo=upsert", data=csv.encode(), content_type="text/csv")
+        datos = resp.get_json()
+
+        assert resp.status_code == 201
+        assert [r["estado"] for r in datos["resultados"]] == ["actualizado", "insertado"]
+        actualizado = self.client.get(f"/estudiantes/{datos['resultados'][0]['id']}").get_json()
+        assert (actualizado["nombre"], actualizado["semestre"]) == ("Carla", 6)
+
+    def test_errores_por_fila(self):
+        self.client.post("/estudiantes/bulk", json=[self._fila(0)])
+        filas = [
+            self._fila(0),                                        # matrícula y correo registrados
+            self._fila(1, email=f"carlos{self.uid}B0@test.edu.mx"),  # correo registrado
+            self._fila(2),
+            self._fila(2, email=f"otro{self.uid}@test.edu.mx"),    # repetida en el archivo
+            self._fila(3, semestre="x"),
+            {"matricula": "solo"},
+        ]
+
+        datos = self.client.post("/estudiantes/bulk", json=filas).get_json()
+
+        assert datos["insertados"] == 1 and datos["fallidos"] == 5
+        errores = {r["fila"]: r["errores"] for r in datos["resultados"] if r["estado"] == "error"}
+        assert errores[1] == ["La matrícula ya existe.", "El correo electrónico ya existe."]
+        assert errores[2] == ["El correo electrónico ya existe."]
+        assert errores[4] == ["Matrícula duplicada con la fila 3."]
+        assert errores[5] == ["semestre debe ser un entero."]
+        assert "El campo nombre es obligatorio." in errores[6]
+
+    def test_consultas_por_lote(self, app):
+        consultas = []
+
+        def contar(conn, cursor, statement, *args):
+            consultas.append(statement)
+
+        with app.app_context():
+            motor = _db.engine
+        app.config["ESTUDIANTES_LOTE_TAMANO"] = 10
+        event.listen(motor, "before_cursor_execute", contar)
+        try:
+            resp = self.client.post("/estudiantes/bulk", json=[self._fila(i) for i in range(25)])
+        finally:
+            event.remove(motor, "before_cursor_execute", contar)
+            app.config["ESTUDIANTES_LOTE_TAMANO"] = 1000
+
+        assert resp.get_json()["insertados"] == 25
+        # 3 lotes x (SELECT matrículas + SELECT correos + INSERT ... RETURNING)
+        assert len(consultas) == 9
+
+    @pytest.mark.parametrize("ruta, cuerpo", [
+        ("/estudiantes/bulk", {"estudiantes": "x"}),
+        ("/estudiantes/bulk", []),
+        ("/estudiantes/bulk?modo=reemplazar", []),
+        ("/estudiantes/bulk", [{"matricula": "incompleta"}]),
+    ])
+    def test_cuerpo_invalido_retorna_400(self, ruta, cuerpo):
+        assert self.client.post(ruta, json=cuerpo).status_code == 400
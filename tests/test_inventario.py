@@ -0,0 +1,149 @@
+# tests/test_inventario.py
+"""
+Suite 8: Pruebas del inventario fragmentado en slots y las reservas.
+Rutas reales:
+  PUT    /api/inventario/productos/<id>/slots  → reparte el stock en N slots
+  POST   /api/inventario/reservas              → 201 {id, estado, expira, ...}
+  DELETE /api/inventario/reservas/<id>         → libera la reserva
+  POST   /api/inventario/reservas/expiradas    → {liberadas}
+
+Notas:
+  - GET /productos/<id> reporta en "stock" el total conciliado (fila + slots)
+  - Una línea de orden con "reserva_id" usa las unidades ya apartadas
+"""
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from app.extensions import db as _db
+from app.models.inventario import ReservaInventario
+
+
+class TestInventarioSlots:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Slots", "email": f"slots_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_producto = client.post("/productos/", json={
+            "sku": f"HOT_{uid}", "nombre": "Producto Hot", "precio": 10.0, "stock": 10
+        }).get_json()["id"]
+        resp = client.put(f"/api/inventario/productos/{self.id_producto}/slots",
+                          json={"slots": 3}, headers=auth_headers)
+        assert resp.status_code == 200, resp.get_json()
+        self.slots = resp.get_json()["slots"]
+
+    def _stock(self):
+        return self.client.get(f"/productos/{self.id_producto}").get_json()["stock"]
+
+    def _reservar(self, cantidad, ttl=900):
+        return self.client.post("/api/inventario/reservas", json={
+            "producto_id": self.id_producto, "cantidad": cantidad, "ttl_segundos": ttl
+        }, headers=self.headers)
+
+    def _ordenar(self, linea):
+        return self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente, "productos": [linea]
+        }, headers=self.headers)
+
+    def test_fragmentar_conserva_el_total(self):
+        """10 unidades en 3 slots → 4/3/3 y el total sigue siendo 10."""
+        assert [s["stock"] for s in self.slots] == [4, 3, 3]
+        producto = self.client.get(f"/productos/{self.id_producto}").get_json()
+        assert producto["stock"] == 10
+        assert producto["slots_inventario"] == 3
+
+    def test_orden_descuenta_de_varios_slots(self):
+        """Una orden mayor que cualquier slot se reparte entre varios."""
+        resp = self._ordenar({"producto_id": self.id_producto, "cantidad": 10})
+        assert resp.status_code == 201, resp.get_json()
+        assert self._stock() == 0
+
+        resp = self._ordenar({"producto_id": self.id_producto, "cantidad": 1})
+        assert resp.status_code == 400
+
+    def test_orden_con_reserva_no_descuenta_dos_veces(self):
+        reserva = self._reservar(4).get_json()
+        assert self._stock() == 6
+
+        resp = self._ordenar({"producto_id": self.id_producto, "cantidad": 4,
+                              "reserva_id": reserva["id"]})
+        assert resp.status_code == 201, resp.get_json()
+        assert self._stock() == 6
+
+        # La reserva ya se usó: no puede liberarse ni reutilizarse
+        assert self.client.delete(f"/api/inventario/reservas/{reserva['id']}",
+                                  headers=self.headers).status_code == 409
+
+    def test_liberar_reserva_regresa_unidades(self):
+        reserva = self._reservar(5).get_json()
+        assert self._stock() == 5
+        resp = self.client.delete(f"/api/inventario/reservas/{reserva['id']}", headers=self.headers)
+        assert resp.status_code == 200
+        assert self._stock() == 10
+
+    def test_reservas_expiradas_regresan_unidades(self, app):
+        """Un carrito abandonado (TTL vencido) devuelve sus unidades."""
+        reserva = self._reservar(3, ttl=1).get_json()
+        with app.app_context():
+            ReservaInventario.query.filter_by(id=reserva["id"]).update(
+                {"expira": datetime.utcnow() - timedelta(seconds=1)})
+            _db.session.commit()
+        assert self._stock() == 7
+
+        resp = self._ordenar({"producto_id": self.id_producto, "cantidad": 3,
+                              "reserva_id": reserva["id"]})
+        assert resp.status_code == 400
+
+        resp = self.client.post("/api/inventario/reservas/expiradas", headers=self.headers)
+        assert resp.get_json()["liberadas"] >= 1
+        assert self._stock() == 10
+
+    def test_reserva_mayor_al_stock_retorna_409(self):
+        assert self._reservar(11).status_code == 409
+        assert self._stock() == 10
+
+    def test_consolidar_regresa_el_stock_a_la_fila(self):
+        self._ordenar({"producto_id": self.id_producto, "cantidad": 2})
+        resp = self.client.put(f"/api/inventario/productos/{self.id_producto}/slots",
+                               json={"slots": 1}, headers=self.headers)
+        assert resp.get_json()["slots"] == []
+        assert self._stock() == 8
+
+    def test_actualizar_stock_se_reparte_en_los_slots(self):
+        """PUT /productos/<id> con stock fija el total y lo reparte en los mismos slots."""
+        resp = self.client.put(f"/productos/{self.id_producto}", json={"stock": 20})
+        assert resp.status_code == 200
+        assert resp.get_json()["stock"] == 20
+        assert resp.get_json()["slots_inventario"] == 3
+
+        assert self._ordenar({"producto_id": self.id_producto, "cantidad": 20}).status_code == 201
+        assert self._stock() == 0
+
+    @pytest.mark.parametrize("stock", [-1, 2.5, "3", True])
+    def test_stock_invalido_retorna_400(self, stock):
+        resp = self.client.put(f"/productos/{self.id_producto}", json={"stock": stock})
+        assert resp.status_code == 400
+        assert self._stock() == 10
+
+    @pytest.mark.parametrize("cuerpo", [
+        {"cantidad": 0.5}, {"cantidad": "2"}, {"cantidad": True}, {"cantidad": 0},
+        {"cantidad": 1, "ttl_segundos": "900"}, {"cantidad": 1, "ttl_segundos": -5},
+        {"cantidad": 1, "producto_id": "1"},
+    ])
+    def test_reserva_invalida_retorna_400(self, cuerpo):
+        resp = self.client.post("/api/inventario/reservas", json={
+            "producto_id": self.id_producto, **cuerpo
+        }, headers=self.headers)
+        assert resp.status_code == 400
+        assert self._stock() == 10
+
+    @pytest.mark.parametrize("slots", [65, 10 ** 9, True, "4"])
+    def test_slots_fuera_de_rango_retorna_400(self, slots):
+        resp = self.client.put(f"/api/inventario/productos/{self.id_producto}/slots",
+                               json={"slots": slots}, headers=self.headers)
+        assert resp.status_code == 400
+        assert self._stock() == 10
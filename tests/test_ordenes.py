@@ -0,0 +1,555 @@
+# tests/test_ordenes.py
+"""
+Suite 7: Pruebas del procesamiento de órdenes.
+Ruta real: POST /api/ordenes/ (requiere JWT)
+
+Notas:
+  - Los productos se cargan con una sola consulta IN (...)
+  - El stock se descuenta con UPDATE ... WHERE stock >= :qty
+  - Líneas repetidas del mismo producto se validan sumando cantidades
+"""
+import threading
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.extensions import db as _db
+from app.models.idempotencia import ClaveIdempotencia
+from app.models.producto import Producto
+
+
+class TestProcesarOrden:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        """Crea un cliente y productos únicos antes de cada prueba."""
+        self.client = client
+        self.headers = auth_headers
+        self.uid = uuid.uuid4().hex[:8]
+
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Orden", "email": f"orden_{self.uid}@test.mx"
+        }).get_json()["id"]
+
+        self.ids_productos = []
+        for i in range(5):
+            resp = client.post("/productos/", json={
+                "sku": f"ORD{i}_{self.uid}", "nombre": f"Producto {i}",
+                "precio": 10.0, "stock": 5
+            })
+            self.ids_productos.append(resp.get_json()["id"])
+
+    def _ordenar(self, productos):
+        return self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": productos
+        }, headers=self.headers)
+
+    def _contar_selects(self, app, productos):
+        sentencias = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                sentencias.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            resp = self._ordenar(productos)
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert resp.status_code == 201, resp.get_json()
+        return len(sentencias)
+
+    def test_selects_no_crecen_con_la_orden(self, app):
+        """Una orden de 1 línea y una de 4 hacen las mismas consultas (productos, slots, etc.)."""
+        from app.services.sketch import obtener_sketch
+        with app.app_context():
+            obtener_sketch()  # se carga una vez por proceso; no cuenta para la orden
+        una = self._contar_selects(app, [
+            {"producto_id": self.ids_productos[0], "cantidad": 1}
+        ])
+        cuatro = self._contar_selects(app, [
+            {"producto_id": pid, "cantidad": 1} for pid in self.ids_productos[1:]
+        ])
+        assert una == cuatro
+
+    def test_lineas_repetidas_suman_cantidades(self):
+        """Dos líneas del mismo producto que juntas exceden el stock → 400."""
+        pid = self.ids_productos[0]
+        resp = self._ordenar([
+            {"producto_id": pid, "cantidad": 3},
+            {"producto_id": pid, "cantidad": 3}
+        ])
+        assert resp.status_code == 400
+
+        stock = self.client.get(f"/productos/{pid}").get_json()["stock"]
+        assert stock == 5
+
+    def test_stock_llega_exactamente_a_cero(self):
+        """Comprar todo el stock disponible deja el producto en 0."""
+        pid = self.ids_productos[1]
+        resp = self._ordenar([{"producto_id": pid, "cantidad": 5}])
+        assert resp.status_code == 201
+
+        stock = self.client.get(f"/productos/{pid}").get_json()["stock"]
+        assert stock == 0
+
+    def test_cantidad_negativa_no_suma_stock(self):
+        """cantidad -5 → 400; el stock y los totales no cambian."""
+        pid = self.ids_productos[3]
+        resp = self._ordenar([{"producto_id": pid, "cantidad": -5}])
+        assert resp.status_code == 400
+        assert "cantidad" in resp.get_json()["detalles"][0]
+        assert self.client.get(f"/productos/{pid}").get_json()["stock"] == 5
+
+    @pytest.mark.parametrize("cuerpo", [
+        {"productos": [{"producto_id": 1, "cantidad": 1}]},
+        {"cliente_id": 1},
+        {"cliente_id": 1, "productos": []},
+        {"cliente_id": 1, "productos": [{"cantidad": 1}]},
+    ])
+    def test_orden_mal_formada_retorna_400(self, cuerpo):
+        """Faltan cliente_id, productos o producto_id → 400 antes de tocar la base."""
+        resp = self.client.post("/api/ordenes/", json=cuerpo, headers=self.headers)
+        assert resp.status_code == 400
+        assert resp.get_json()["detalles"]
+
+    def test_dos_compras_de_la_ultima_unidad(self, monkeypatch):
+        """
+        Dos checkouts de la última unidad: ambos ven stock 1 al validar, la
+        primera confirma y el UPDATE condicional de la segunda no encuentra
+        stock → 409, sin orden extra y con el stock en 0.
+        """
+        import app.routes.ordenes as rutas
+
+        pid = self.ids_productos[4]
+        self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente, "productos": [{"producto_id": pid, "cantidad": 4}]
+        }, headers=self.headers)
+        cargar_original = rutas.cargar_productos
+        competidora = []
+
+        def cargar_y_competir(ids):
+            productos = cargar_original(ids)
+            if not competidora:
+                # Otra petición (otro hilo, otra sesión) compra la última unidad
+                # después de que esta la vio disponible
+                monkeypatch.setattr(rutas, "cargar_productos", cargar_original)
+                hilo = threading.Thread(target=lambda: competidora.append(
+                    self._ordenar([{"producto_id": pid, "cantidad": 1}])
+                ))
+                hilo.start()
+                hilo.join()
+            return productos
+
+        monkeypatch.setattr(rutas, "cargar_productos", cargar_y_competir)
+        resp = self._ordenar([{"producto_id": pid, "cantidad": 1}])
+
+        assert competidora[0].status_code == 201
+        assert resp.status_code == 409
+        assert self.client.get(f"/productos/{pid}").get_json()["stock"] == 0
+
+    def test_update_condicional_no_deja_stock_negativo(self, app):
+        """Si el stock cambió después de validar, el UPDATE no descuenta nada."""
+        from app.services.ordenes import descontar_stock, StockInsuficienteError
+
+        pid = self.ids_productos[2]
+        with app.app_context():
+            with pytest.raises(StockInsuficienteError):
+                descontar_stock({pid: 6})
+            _db.session.rollback()
+            assert _db.session.get(Producto, pid).stock == 5
+
+
+class TestLoteOrdenes:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        """Crea un cliente y dos productos con poco stock."""
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Lote", "email": f"lote_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_a = client.post("/productos/", json={
+            "sku": f"LTA_{uid}", "nombre": "Lote A", "precio": 10.0, "stock": 3
+        }).get_json()["id"]
+        self.id_b = client.post("/productos/", json={
+            "sku": f"LTB_{uid}", "nombre": "Lote B", "precio": 5.0, "stock": 10
+        }).get_json()["id"]
+
+    def _lote(self, modo, ordenes):
+        return self.client.post("/api/ordenes/batch", json={
+            "modo": modo, "ordenes": ordenes
+        }, headers=self.headers)
+
+    def _orden(self, pid, cantidad):
+        return {"cliente_id": self.id_cliente,
+                "productos": [{"producto_id": pid, "cantidad": cantidad}]}
+
+    def _stock(self, pid):
+        return self.client.get(f"/productos/{pid}").get_json()["stock"]
+
+    def test_lote_completo_exitoso(self):
+        """Todas las órdenes válidas → 201 con un orden_id por orden."""
+        resp = self._lote("todo_o_nada", [
+            self._orden(self.id_a, 1), self._orden(self.id_b, 4), self._orden(self.id_b, 2)
+        ])
+        assert resp.status_code == 201, resp.get_json()
+        datos = resp.get_json()
+        assert datos["procesadas"] == 3
+        assert len({r["orden_id"] for r in datos["resultados"]}) == 3
+        assert "ordenes_por_segundo" in datos
+        assert self._stock(self.id_b) == 4
+
+    def test_todo_o_nada_revierte_si_una_falla(self):
+        """El stock se comparte en el lote: la segunda orden excede lo restante."""
+        resp = self._lote("todo_o_nada", [
+            self._orden(self.id_a, 2), self._orden(self.id_a, 2)
+        ])
+        assert resp.status_code == 400
+        resultados = resp.get_json()["resultados"]
+        assert resultados[0]["ok"] is True
+        assert resultados[1]["ok"] is False
+        assert self._stock(self.id_a) == 3
+
+    def test_mejor_esfuerzo_guarda_las_validas(self):
+        """En mejor_esfuerzo solo se descartan las órdenes inválidas."""
+        resp = self._lote("mejor_esfuerzo", [
+            self._orden(self.id_a, 2), self._orden(self.id_a, 2), self._orden(99999, 1)
+        ])
+        assert resp.status_code == 201
+        datos = resp.get_json()
+        assert datos["procesadas"] == 1
+        assert datos["fallidas"] == 2
+        assert [r["ok"] for r in datos["resultados"]] == [True, False, False]
+        assert self._stock(self.id_a) == 1
+
+    def test_modo_invalido_retorna_400(self):
+        resp = self._lote("rapido", [self._orden(self.id_a, 1)])
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("cantidad", [-5, 0, 1.5, "2", True])
+    def test_cantidad_no_positiva_o_no_entera_se_rechaza(self, cantidad):
+        """Una cantidad negativa sumaría stock con el UPDATE condicional: la línea se rechaza."""
+        resp = self._lote("mejor_esfuerzo", [self._orden(self.id_b, 1), self._orden(self.id_b, cantidad)])
+        assert resp.status_code == 201
+        resultados = resp.get_json()["resultados"]
+        assert resultados[1]["ok"] is False
+        assert "cantidad" in resultados[1]["errores"][0]
+        assert self._stock(self.id_b) == 9
+
+    def test_orden_mal_formada_no_rompe_el_lote(self):
+        resp = self._lote("mejor_esfuerzo", [
+            self._orden(self.id_b, 1), {"cliente_id": self.id_cliente}, {"productos": [{"cantidad": 1}]}, "x"
+        ])
+        assert resp.status_code == 201
+        assert [r["ok"] for r in resp.get_json()["resultados"]] == [True, False, False, False]
+
+
+class TestIdempotencia:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.uid = uid
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Idem", "email": f"idem_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_producto = client.post("/productos/", json={
+            "sku": f"IDM_{uid}", "nombre": "Idem", "precio": 10.0, "stock": 10
+        }).get_json()["id"]
+
+    def _ordenar(self, clave, cantidad=2, headers=None):
+        headers = dict(headers or self.headers, **{"Idempotency-Key": clave})
+        return self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": cantidad}]
+        }, headers=headers)
+
+    def _stock(self):
+        return self.client.get(f"/productos/{self.id_producto}").get_json()["stock"]
+
+    def test_reintento_repite_respuesta_sin_duplicar(self):
+        """La misma clave dos veces → misma orden y el stock baja una sola vez."""
+        clave = f"orden-{self.uid}"
+        primera = self._ordenar(clave)
+        segunda = self._ordenar(clave)
+
+        assert primera.status_code == segunda.status_code == 201
+        assert segunda.headers.get("Idempotent-Replayed") == "true"
+        assert primera.get_json()["orden_id"] == segunda.get_json()["orden_id"]
+        assert self._stock() == 8
+
+    def test_repite_desde_la_tabla_sin_cache(self, app):
+        """Si la caché en memoria se pierde, la respuesta sale de la base de datos."""
+        clave = f"tabla-{self.uid}"
+        primera = self._ordenar(clave)
+        app.extensions["idempotencia"].clear()
+        segunda = self._ordenar(clave)
+
+        assert primera.get_json()["orden_id"] == segunda.get_json()["orden_id"]
+        assert self._stock() == 8
+
+    def test_misma_clave_con_otro_cuerpo_retorna_422(self):
+        clave = f"cuerpo-{self.uid}"
+        self._ordenar(clave, cantidad=1)
+        resp = self._ordenar(clave, cantidad=3)
+        assert resp.status_code == 422
+        assert self._stock() == 9
+
+    def test_claves_distintas_crean_ordenes_distintas(self):
+        a = self._ordenar(f"a-{self.uid}").get_json()["orden_id"]
+        b = self._ordenar(f"b-{self.uid}").get_json()["orden_id"]
+        assert a != b
+        assert self._stock() == 6
+
+    def _envejecer(self, app, clave, estado, segundos):
+        """Simula una clave reservada hace `segundos` y olvida la caché en memoria."""
+        with app.app_context():
+            ClaveIdempotencia.query.filter_by(clave=clave).update({
+                "estado": estado, "fecha": datetime.utcnow() - timedelta(seconds=segundos)
+            })
+            _db.session.commit()
+        app.extensions["idempotencia"].clear()
+
+    def test_misma_clave_de_otro_usuario_no_repite(self):
+        """La clave es de cada usuario: otro usuario no recibe la orden ajena."""
+        clave = f"compartida-{self.uid}"
+        primera = self._ordenar(clave)
+        self.client.post("/auth/register", json={
+            "username": f"otro_{self.uid}", "email": f"otro_{self.uid}@test.mx", "password": "Password123!"
+        })
+        token = self.client.post("/auth/login", json={
+            "username": f"otro_{self.uid}", "password": "Password123!"
+        }).get_json()["access_token"]
+        segunda = self._ordenar(clave, headers={"Authorization": f"Bearer {token}"})
+
+        assert segunda.status_code == 201
+        assert "Idempotent-Replayed" not in segunda.headers
+        assert primera.get_json()["orden_id"] != segunda.get_json()["orden_id"]
+        assert self._stock() == 6
+
+    def test_reserva_abandonada_se_reclama(self, app):
+        """Una reserva 'en_proceso' reciente da 409; pasado el timeout se vuelve a ejecutar."""
+        clave = f"abandonada-{self.uid}"
+        self._ordenar(clave)
+        self._envejecer(app, clave, "en_proceso", 5)
+        assert self._ordenar(clave).status_code == 409
+
+        self._envejecer(app, clave, "en_proceso", app.config["IDEMPOTENCIA_TIMEOUT_EN_PROCESO"] + 1)
+        resp = self._ordenar(clave)
+        assert resp.status_code == 201
+        assert "Idempotent-Replayed" not in resp.headers
+        assert self._ordenar(clave).headers.get("Idempotent-Replayed") == "true"
+        assert self._stock() == 6
+
+    def test_purgar_claves_vencidas(self, app):
+        clave = f"vieja-{self.uid}"
+        self._ordenar(clave)
+        self._envejecer(app, clave, "completada", app.config["IDEMPOTENCIA_TTL"] + 1)
+
+        resultado = app.test_cli_runner().invoke(args=["ordenes", "purgar-claves"])
+        assert resultado.exit_code == 0
+        with app.app_context():
+            assert ClaveIdempotencia.query.filter_by(clave=clave).count() == 0
+        assert "Idempotent-Replayed" not in self._ordenar(clave).headers
+        assert self._stock() == 6
+
+    def test_peticiones_concurrentes_con_la_misma_clave_se_esperan(self):
+        """El candado por clave deja pasar una petición a la vez."""
+        import threading
+        import time
+        from app.services.idempotencia import _candado_por_clave, _candados
+
+        activos = []
+        maximo = []
+
+        def trabajo():
+            with _candado_por_clave(("1", "/api/ordenes/", "misma")):
+                activos.append(1)
+                maximo.append(len(activos))
+                time.sleep(0.01)
+                activos.pop()
+
+        hilos = [threading.Thread(target=trabajo) for _ in range(5)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        assert max(maximo) == 1
+        assert ("1", "/api/ordenes/", "misma") not in _candados
+
+
+class TestOrdenesAsincronas:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Async", "email": f"async_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_producto = client.post("/productos/", json={
+            "sku": f"ASY_{uid}", "nombre": "Async", "precio": 10.0, "stock": 5
+        }).get_json()["id"]
+
+    def _encolar(self, cantidad):
+        return self.client.post("/api/ordenes/?asincrono=true", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": cantidad}]
+        }, headers=self.headers)
+
+    def _estado(self, resp):
+        return self.client.get(resp.headers["Location"], headers=self.headers).get_json()
+
+    def _stock(self):
+        return self.client.get(f"/productos/{self.id_producto}").get_json()["stock"]
+
+    def test_encolar_responde_202_y_el_worker_la_procesa(self, app):
+        from app.services.cola_ordenes import procesar_pendientes
+
+        resp = self._encolar(2)
+        assert resp.status_code == 202
+        assert self._estado(resp)["estado"] == "encolada"
+        assert self._stock() == 5
+
+        with app.app_context():
+            assert procesar_pendientes() >= 1
+
+        estado = self._estado(resp)
+        assert estado["estado"] == "completada"
+        assert estado["orden_id"] is not None
+        assert self._stock() == 3
+
+    def test_orden_sin_stock_queda_fallida(self, app):
+        from app.services.cola_ordenes import procesar_pendientes
+
+        resp = self._encolar(50)
+        with app.app_context():
+            procesar_pendientes()
+
+        estado = self._estado(resp)
+        assert estado["estado"] == "fallida"
+        assert estado["errores"]
+        assert self._stock() == 5
+
+    def test_payload_invalido_no_se_encola(self):
+        resp = self.client.post("/api/ordenes/?asincrono=true", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": 0}]
+        }, headers=self.headers)
+        assert resp.status_code == 400
+
+    def test_pool_de_workers_en_proceso(self, app):
+        """El pool de hilos vacía la cola y se detiene limpiamente."""
+        import time
+        from app.services.cola_ordenes import TrabajadorOrdenes
+
+        resp = self._encolar(1)
+        trabajador = TrabajadorOrdenes(app, hilos=1, intervalo=0.01)
+        trabajador.iniciar()
+        time.sleep(0.5)
+        trabajador.detener(timeout=5)
+
+        assert self._estado(resp)["estado"] == "completada"
+        assert self._stock() == 4
+
+        resumen = self.client.get("/api/ordenes/pendientes", headers=self.headers).get_json()
+        assert resumen["completada"] >= 1
+
+
+class TestLecturaOrdenes:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        """Crea un cliente con 5 órdenes de 2 líneas cada una."""
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Lectura", "email": f"lectura_{uid}@test.mx"
+        }).get_json()["id"]
+        ids = [client.post("/productos/", json={
+            "sku": f"LEC{i}_{uid}", "nombre": f"Lectura {i}", "precio": 10.0, "stock": 100
+        }).get_json()["id"] for i in range(2)]
+
+        resp = client.post("/api/ordenes/batch", json={"ordenes": [
+            {"cliente_id": self.id_cliente,
+             "productos": [{"producto_id": ids[0], "cantidad": 1}, {"producto_id": ids[1], "cantidad": 2}]}
+            for _ in range(5)
+        ]}, headers=auth_headers)
+        self.ids_ordenes = [r["orden_id"] for r in resp.get_json()["resultados"]]
+
+    def _listar(self, **params):
+        return self.client.get("/api/ordenes/", query_string=dict(cliente_id=self.id_cliente, **params),
+                               headers=self.headers)
+
+    def test_paginacion_keyset_recorre_todas_sin_repetir(self):
+        vistos = []
+        cursor = None
+        paginas = 0
+        while True:
+            params = {"limite": 2}
+            if cursor:
+                params["cursor"] = cursor
+            datos = self._listar(**params).get_json()
+            vistos += [o["id"] for o in datos["ordenes"]]
+            paginas += 1
+            cursor = datos["siguiente_cursor"]
+            if not cursor:
+                break
+
+        assert paginas == 3
+        assert sorted(vistos) == sorted(self.ids_ordenes)
+
+    def test_detalles_incluyen_producto_y_cliente(self):
+        orden = self.client.get(f"/api/ordenes/{self.ids_ordenes[0]}", headers=self.headers).get_json()
+        assert orden["cliente"]["id"] == self.id_cliente
+        assert len(orden["detalles"]) == 2
+        assert orden["detalles"][0]["producto"].startswith("Lectura")
+
+    def test_numero_de_consultas_no_depende_del_tamano_de_pagina(self, app):
+        sentencias = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            sentencias.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            self._listar(limite=1)
+            con_una = len(sentencias)
+            sentencias.clear()
+            self._listar(limite=5)
+            con_cinco = len(sentencias)
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert con_una == con_cinco
+
+    def test_filtro_por_estado_y_fecha(self):
+        assert len(self._listar(estado="pendiente", limite=10).get_json()["ordenes"]) == 5
+        assert self._listar(estado="enviada").get_json()["ordenes"] == []
+        assert self._listar(hasta="2000-01-01").get_json()["ordenes"] == []
+        assert self._listar(desde="fecha-mala").status_code == 400
+
+    @pytest.mark.parametrize("limite", [0, -3])
+    def test_limite_fuera_de_rango_se_ajusta(self, limite):
+        """limite <= 0 se trata como 1 en vez de fallar."""
+        resp = self.client.get(f"/api/ordenes/?limite={limite}", headers=self.headers)
+        assert resp.status_code == 200
+        assert len(resp.get_json()["ordenes"]) == 1
+
+    def test_orden_inexistente_retorna_404(self):
+        assert self.client.get("/api/ordenes/999999", headers=self.headers).status_code == 404
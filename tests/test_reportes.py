@@ -0,0 +1,623 @@
+# tests/test_reportes.py
+"""
+Suite 9: Pruebas del reporte de ventas y sus rollups diarios.
+Ruta real: GET /api/reportes/ventas?mes=&anio= (requiere JWT)
+           GET /api/reportes/ventas/serie?desde=&hasta=&granularidad=&top=
+
+Notas:
+  - El reporte lee ventas_diarias y ventas_diarias_productos
+  - Los rollups se actualizan en la misma transacción que crea la orden
+  - `flask reportes reconstruir` y `flask reportes verificar` los mantienen
+  - Los planes se revisan con EXPLAIN QUERY PLAN de SQLite
+  - Las respuestas se guardan en caché y se invalidan al crear/modificar órdenes del mes
+  - ?modo=aproximado usa el sketch Space-Saving con checkpoints en sketch_checkpoints
+  - Peticiones idénticas concurrentes comparten una sola ejecución (coalescer)
+"""
+import pytest
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from sqlalchemy import event, select
+from app.extensions import db as _db
+from app.models.detalle_orden import DetalleOrden
+from app.models.orden import Orden
+from app.models.producto import Producto
+from app.services import rollups
+from app.services.cache import LRUCache
+from app.services.cache_reportes import TODOS, CacheReportes, obtener_cache
+from app.services.coalescencia import coalescer
+from app.services.series import GRANULARIDADES, contar_periodos, periodos
+from app.services.sketch import SketchVentas, SpaceSaving, checkpoint_al_salir, obtener_sketch
+
+
+class TestRollupsVentas:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, client, auth_headers):
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.nombre_producto = f"Reporte {uid}"
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Reporte", "email": f"reporte_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_producto = client.post("/productos/", json={
+            "sku": f"REP_{uid}", "nombre": self.nombre_producto, "precio": 1000.0, "stock": 10000
+        }).get_json()["id"]
+
+    def _reporte(self, **params):
+        return self.client.get("/api/reportes/ventas", query_string=params, headers=self.headers)
+
+    def _ordenar(self, cantidad):
+        return self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": cantidad}]
+        }, headers=self.headers)
+
+    def test_orden_se_refleja_en_el_reporte(self):
+        antes = self._reporte().get_json()["resumen"]
+        assert self._ordenar(3).status_code == 201
+        despues = self._reporte().get_json()
+
+        assert despues["resumen"]["total_ordenes"] == antes["total_ordenes"] + 1
+        assert despues["resumen"]["ingresos"] == pytest.approx(antes["ingresos"] + 3000.0)
+
+    def test_lotes_tambien_actualizan_rollups(self, app):
+        self.client.post("/api/ordenes/batch", json={"ordenes": [
+            {"cliente_id": self.id_cliente,
+             "productos": [{"producto_id": self.id_producto, "cantidad": 1}]}
+            for _ in range(3)
+        ]}, headers=self.headers)
+        with app.app_context():
+            assert rollups.verificar() == []
+
+    def test_reconstruir_conserva_los_totales(self, app):
+        self._ordenar(2)
+        antes = self._reporte().get_json()
+        with app.app_context():
+            rollups.reconstruir()
+            _db.session.commit()
+            assert rollups.verificar() == []
+        assert self._reporte().get_json() == antes
+
+    def test_comandos_de_consola(self, app):
+        self._ordenar(1)
+        runner = app.test_cli_runner()
+        assert runner.invoke(args=["reportes", "reconstruir"]).exit_code == 0
+        resultado = runner.invoke(args=["reportes", "verificar"])
+        assert resultado.exit_code == 0, resultado.output
+
+    def test_mes_invalido_retorna_400(self):
+        assert self._reporte(mes=13).status_code == 400
+
+    @pytest.mark.parametrize("anio", [0, -1, 10000])
+    def test_anio_invalido_retorna_400(self, anio):
+        assert self._reporte(mes=1, anio=anio).status_code == 400
+
+    def test_ultimo_mes_representable(self):
+        datos = self._reporte(mes=12, anio=9999).get_json()
+        assert datos["resumen"]["total_ordenes"] == 0
+
+    def test_mes_sin_ventas_retorna_ceros(self):
+        datos = self._reporte(mes=1, anio=1999).get_json()
+        assert datos["resumen"]["total_ordenes"] == 0
+        assert datos["top_productos"] == []
+
+
+class TestCacheReportes:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, app, client, auth_headers):
+        self.app = app
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.id_cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Cache", "email": f"cache_{uid}@test.mx"
+        }).get_json()["id"]
+        self.id_producto = client.post("/productos/", json={
+            "sku": f"CACHE_{uid}", "nombre": f"Cache {uid}", "precio": 10.0, "stock": 1000
+        }).get_json()["id"]
+
+    def _reporte(self, **params):
+        return self.client.get("/api/reportes/ventas", query_string=params, headers=self.headers)
+
+    def _estadisticas(self):
+        return self.client.get("/api/reportes/cache", headers=self.headers).get_json()
+
+    def test_segunda_consulta_sale_de_cache(self):
+        antes = self._estadisticas()
+        primera = self._reporte(mes=2, anio=2001)
+        segunda = self._reporte(mes="02", anio=2001)
+
+        assert primera.headers["X-Cache"] == "MISS"
+        assert segunda.headers["X-Cache"] == "HIT"
+        assert segunda.get_json() == primera.get_json()
+
+        despues = self._estadisticas()
+        assert despues["aciertos"] == antes["aciertos"] + 1
+        assert despues["fallos"] == antes["fallos"] + 1
+
+    def test_orden_invalida_el_mes(self):
+        self._reporte()
+        assert self._reporte().headers["X-Cache"] == "HIT"
+
+        self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": 1}]
+        }, headers=self.headers)
+
+        assert self._reporte().headers["X-Cache"] == "MISS"
+
+    def test_lote_invalida_el_mes(self):
+        self._reporte()
+        self.client.post("/api/ordenes/batch", json={"ordenes": [
+            {"cliente_id": self.id_cliente,
+             "productos": [{"producto_id": self.id_producto, "cantidad": 1}]}
+        ]}, headers=self.headers)
+        assert self._reporte().headers["X-Cache"] == "MISS"
+
+    def test_cambiar_fecha_de_orden_invalida_ambos_meses(self):
+        self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": 1}]
+        }, headers=self.headers)
+        hoy = datetime.utcnow()
+        self._reporte(mes=hoy.month, anio=hoy.year)
+        self._reporte(mes=5, anio=2002)
+
+        with self.app.app_context():
+            orden = Orden.query.filter_by(cliente_id=self.id_cliente).first()
+            orden.fecha = datetime(2002, 5, 10)
+            _db.session.commit()
+
+        assert self._reporte(mes=hoy.month, anio=hoy.year).headers["X-Cache"] == "MISS"
+        assert self._reporte(mes=5, anio=2002).headers["X-Cache"] == "MISS"
+
+    def test_rollback_no_invalida(self):
+        self.client.post("/api/ordenes/", json={
+            "cliente_id": self.id_cliente,
+            "productos": [{"producto_id": self.id_producto, "cantidad": 1}]
+        }, headers=self.headers)
+        self._reporte(mes=6, anio=2003)
+        with self.app.app_context():
+            orden = Orden.query.filter_by(cliente_id=self.id_cliente).first()
+            orden.fecha = datetime(2003, 6, 1)
+            _db.session.flush()
+            _db.session.rollback()
+        assert self._reporte(mes=6, anio=2003).headers["X-Cache"] == "HIT"
+
+    def test_mes_cerrado_expira_con_lru_por_proceso(self, app):
+        hoy = datetime.utcnow()
+        compartida = CacheReportes(LRUCache(), ttl=30)
+        assert compartida.ttl_para(2001, 1) is None
+        assert compartida.ttl_para(hoy.year, hoy.month) == 30
+        with app.app_context():
+            assert obtener_cache().ttl_para(2001, 1) == app.config["REPORTES_CACHE_TTL_CERRADO"]
+
+    def test_comando_reconstruir_invalida_la_cache(self, app):
+        self._reporte(mes=7, anio=2004)
+        assert self._reporte(mes=7, anio=2004).headers["X-Cache"] == "HIT"
+        assert app.test_cli_runner().invoke(args=["reportes", "reconstruir"]).exit_code == 0
+        assert self._reporte(mes=7, anio=2004).headers["X-Cache"] == "MISS"
+
+    def test_entrada_con_ttl_expira(self, monkeypatch):
+        import app.services.cache as modulo
+        lru = LRUCache()
+        lru.set("k", "v", ttl=10)
+        reloj = modulo.time.monotonic() + 11
+        monkeypatch.setattr(modulo.time, "monotonic", lambda: reloj)
+        assert lru.get("k") is None
+
+
+class TestSerieVentas:
+    """Los datos se cargan directo en los rollups con fechas de 1990 (año exclusivo de esta suite)."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, app, client, auth_headers):
+        self.client = client
+        self.headers = auth_headers
+        uid = uuid.uuid4().hex[:8]
+        self.productos = [
+            client.post("/productos/", json={
+                "sku": f"SERIE_{i}_{uid}", "nombre": f"Serie {i} {uid}", "precio": 10.0, "stock": 10
+            }).get_json()["id"]
+            for i in range(2)
+        ]
+        a, b = self.productos
+        with app.app_context():
+            rollups.reconstruir(date(1990, 1, 1), date(1991, 1, 1))
+            rollups.registrar_ventas([
+                (date(1990, 1, 1), 30, [(a, 2, 10), (b, 1, 10)]),   # lunes
+                (date(1990, 1, 7), 10, [(b, 1, 10)]),               # domingo, misma semana
+                (date(1990, 1, 8), 50, [(b, 5, 10)]),               # lunes siguiente
+                (date(1990, 3, 15), 20, [(a, 2, 10)]),
+            ])
+            _db.session.commit()
+
+    def _serie(self, **params):
+        return self.client.get("/api/reportes/ventas/serie", query_string=params, headers=self.headers)
+
+    def test_serie_diaria_rellena_huecos(self):
+        datos = self._serie(desde="1990-01-01", hasta="1990-01-10").get_json()
+        serie = datos["serie"]
+
+        assert [p["periodo"] for p in serie][:2] == ["1990-01-01", "1990-01-02"]
+        assert len(serie) == 9
+        assert serie[0]["total_ordenes"] == 1 and serie[0]["ingresos"] == 30.0
+        assert serie[1]["total_ordenes"] == 0 and serie[1]["ingresos"] == 0.0
+
+    def test_semanas_empiezan_en_lunes(self):
+        serie = self._serie(desde="1990-01-03", hasta="1990-01-15", granularidad="semana").get_json()["serie"]
+
+        assert [p["periodo"] for p in serie] == ["1990-01-01", "1990-01-08"]
+        # El rango empieza el miércoles: la venta del lunes 1 queda fuera
+        assert serie[0]["total_ordenes"] == 1 and serie[0]["ingresos"] == 10.0
+        assert serie[1]["total_ordenes"] == 1 and serie[1]["ingresos"] == 50.0
+
+    def test_serie_mensual_de_un_anio(self):
+        serie = self._serie(desde="1990-01-01", hasta="1991-01-01", granularidad="mes").get_json()["serie"]
+
+        assert len(serie) == 12
+        assert serie[0] == {"periodo": "1990-01-01", "total_ordenes": 3, "ingresos": 90.0}
+        assert serie[1]["total_ordenes"] == 0
+        assert serie[2]["ingresos"] == 20.0
+
+    def test_top_productos_por_periodo(self):
+        serie = self._serie(desde="1990-01-01", hasta="1990-04-01",
+                            granularidad="mes", top=1).get_json()["serie"]
+
+        assert [p["unidades"] for p in serie[0]["top_productos"]] == [7]
+        assert serie[0]["top_productos"][0]["producto"].startswith("Serie 1")
+        assert serie[1]["top_productos"] == []
+        assert serie[2]["top_productos"][0]["producto"].startswith("Serie 0")
+
+    def test_una_consulta_sin_top(self, app):
+        selects = []
+
+        def contar(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            respuesta = self._serie(desde="1985-01-01", hasta="2000-01-01", granularidad="semana")
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+
+        assert respuesta.status_code == 200
+        assert len([s for s in selects if "ventas_diarias" in s]) == 1
+
+    @pytest.mark.parametrize("params", [
+        {"desde": "1990-01-01"},
+        {"desde": "1990-01-01", "hasta": "enero"},
+        {"desde": "1990-02-01", "hasta": "1990-01-01"},
+        {"desde": "1990-01-01", "hasta": "1990-02-01", "granularidad": "hora"},
+        {"desde": "1990-01-01", "hasta": "1990-02-01", "top": -1},
+        {"desde": "1990-01-01", "hasta": "1993-01-01"},
+        {"desde": "0001-01-01", "hasta": "9999-12-31", "granularidad": "mes"},
+    ])
+    def test_parametros_invalidos_retornan_400(self, params):
+        assert self._serie(**params).status_code == 400
+
+    @pytest.mark.parametrize("granularidad", GRANULARIDADES)
+    @pytest.mark.parametrize("desde,hasta", [
+        ("1990-01-03", "1990-01-04"), ("1990-01-01", "1990-03-01"),
+        ("1990-01-31", "1992-02-02"), ("9999-11-15", "9999-12-31"),
+    ])
+    def test_contar_periodos_coincide_con_la_serie(self, desde, hasta, granularidad):
+        desde, hasta = date.fromisoformat(desde), date.fromisoformat(hasta)
+        assert contar_periodos(desde, hasta, granularidad) == len(list(periodos(desde, hasta, granularidad)))
+
+    def test_limite_de_periodos(self, app):
+        maximo = app.config["REPORTES_SERIE_MAX_PERIODOS"]
+        hasta = date(1990, 1, 1).toordinal() + maximo
+        assert self._serie(desde="1990-01-01", hasta=date.fromordinal(hasta).isoformat()).status_code == 200
+        assert self._serie(desde="1990-01-01", hasta=date.fromordinal(hasta + 1).isoformat()).status_code == 400
+
+
+def _flujo_zipf(n_productos=500, n_lineas=20000, semilla=7):
+    import random
+    aleatorio = random.Random(semilla)
+    pesos = [1 / (i + 1) for i in range(n_productos)]
+    return aleatorio.choices(range(n_productos), weights=pesos, k=n_lineas)
+
+
+class TestSketchProductos:
+
+    def test_cotas_de_space_saving(self):
+        from collections import Counter
+        flujo = _flujo_zipf()
+        reales = Counter(flujo)
+        sketch = SpaceSaving(capacidad=50)
+        for item in flujo:
+            sketch.agregar(item)
+
+        cota = sketch.total / sketch.capacidad
+        for item, estimado, error in sketch.top(50):
+            assert reales[item] <= estimado
+            assert estimado - error <= reales[item]
+            assert error <= cota
+        # Todo producto con más de total/capacidad ventas está en el sketch
+        pesados = {i for i, n in reales.items() if n > cota}
+        assert pesados <= {item for item, _, _ in sketch.top(50)}
+
+    def test_combinar_conserva_las_cotas(self):
+        from collections import Counter
+        flujo = _flujo_zipf()
+        a, b = SpaceSaving(50), SpaceSaving(50)
+        for i, item in enumerate(flujo):
+            (a if i % 2 else b).agregar(item)
+        combinado = SpaceSaving.desde_dict(a.a_dict()).combinar(b)
+
+        reales = Counter(flujo)
+        assert combinado.total == len(flujo)
+        for item, estimado, error in combinado.top(10):
+            assert estimado - error <= reales[item] <= estimado
+        assert [i for i, _, _ in combinado.top(3)] == [i for i, _ in reales.most_common(3)]
+
+    def test_checkpoint_de_dos_procesos_se_suma(self, app):
+        with app.app_context():
+            uno, dos = SketchVentas(capacidad=20), SketchVentas(capacidad=20)
+            uno.registrar([(date(1991, 4, 2), 1, 5)])
+            dos.registrar([(date(1991, 4, 9), 1, 3), (date(1991, 4, 9), 2, 1)])
+            uno.checkpoint()
+            dos.checkpoint()
+
+            nuevo = SketchVentas(capacidad=20)
+            nuevo.cargar()
+            top, total = nuevo.top(1991, 4, 5)
+            # Limpiar el periodo de prueba para corridas siguientes
+            from app.models.sketch import CheckpointSketch
+            _db.session.delete(_db.session.get(CheckpointSketch, "1991-04"))
+            _db.session.commit()
+
+        assert total == 9
+        assert top[0] == (1, 8, 0)
+
+    def test_checkpoint_por_tiempo(self):
+        lineas = [(date(1991, 5, 1), 1, 1)]
+        assert SketchVentas(checkpoint_cada=100, checkpoint_segundos=0).registrar(lineas)
+        assert not SketchVentas(checkpoint_cada=100, checkpoint_segundos=3600).registrar(lineas)
+
+    def test_fallo_del_checkpoint_no_rompe_la_orden(self, app, client, auth_headers, monkeypatch):
+        """La orden ya confirmada responde 201 y el delta queda para el siguiente checkpoint."""
+        uid = uuid.uuid4().hex[:8]
+        cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Sketch", "email": f"sketch_falla_{uid}@test.mx"
+        }).get_json()["id"]
+        producto = client.post("/productos/", json={
+            "sku": f"SKETCH_F_{uid}", "nombre": f"Sketch falla {uid}", "precio": 1.0, "stock": 10
+        }).get_json()["id"]
+        with app.app_context():
+            sketch = obtener_sketch()
+            engine = _db.engine
+
+        def base_caida():
+            raise RuntimeError("base caída")
+
+        monkeypatch.setattr(sketch, "checkpoint_segundos", 0)
+        monkeypatch.setattr(engine, "begin", base_caida)
+        headers = dict(auth_headers, **{"Idempotency-Key": f"sketch-{uid}"})
+        orden = {"cliente_id": cliente, "productos": [{"producto_id": producto, "cantidad": 1}]}
+        resp = client.post("/api/ordenes/", json=orden, headers=headers)
+        monkeypatch.undo()
+
+        assert resp.status_code == 201, resp.get_json()
+        assert client.post("/api/ordenes/", json=orden, headers=headers).headers.get("Idempotent-Replayed") == "true"
+        assert client.get(f"/productos/{producto}").get_json()["stock"] == 9
+        hoy = datetime.utcnow()
+        pendientes = dict(sketch._deltas[f"{hoy.year}-{hoy.month:02d}"].contadores)
+        assert pendientes[producto][0] >= 1
+
+    def test_checkpoint_al_salir_guarda_lo_pendiente(self, app):
+        from app.models.sketch import CheckpointSketch
+
+        with app.app_context():
+            obtener_sketch().registrar([(date(1992, 6, 3), 7, 4)])
+        checkpoint_al_salir(app)
+        with app.app_context():
+            fila = _db.session.get(CheckpointSketch, "1992-06")
+            assert fila is not None and fila.total == 4
+            _db.session.delete(fila)
+            _db.session.commit()
+
+    def test_reporte_aproximado(self, app, client, auth_headers):
+        uid = uuid.uuid4().hex[:8]
+        cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Sketch", "email": f"sketch_{uid}@test.mx"
+        }).get_json()["id"]
+        nombre = f"Sketch {uid}"
+        producto = client.post("/productos/", json={
+            "sku": f"SKETCH_{uid}", "nombre": nombre, "precio": 1.0, "stock": 100000
+        }).get_json()["id"]
+        client.post("/api/ordenes/", json={
+            "cliente_id": cliente, "productos": [{"producto_id": producto, "cantidad": 5000}]
+        }, headers=auth_headers)
+
+        datos = client.get("/api/reportes/ventas?modo=aproximado", headers=auth_headers).get_json()
+
+        assert datos["modo"] == "aproximado"
+        primero = datos["top_productos"][0]
+        assert primero["producto"] == nombre
+        assert primero["unidades"] - primero["error_maximo"] <= 5000 <= primero["unidades"]
+
+    def test_modo_invalido_retorna_400(self, client, auth_headers):
+        assert client.get("/api/reportes/ventas?modo=magico", headers=auth_headers).status_code == 400
+
+    def test_comando_reconstruir_sketch(self, app, client, auth_headers):
+        uid = uuid.uuid4().hex[:8]
+        cliente = client.post("/clientes/", json={
+            "nombre": "Cliente Sketch", "email": f"sketch_cmd_{uid}@test.mx"
+        }).get_json()["id"]
+        producto = client.post("/productos/", json={
+            "sku": f"SKETCH_CMD_{uid}", "nombre": f"Sketch cmd {uid}", "precio": 1.0, "stock": 10
+        }).get_json()["id"]
+        client.post("/api/ordenes/", json={
+            "cliente_id": cliente, "productos": [{"producto_id": producto, "cantidad": 1}]
+        }, headers=auth_headers)
+
+        resultado = app.test_cli_runner().invoke(args=["reportes", "reconstruir-sketch"])
+        assert resultado.exit_code == 0, resultado.output
+        with app.app_context():
+            hoy = datetime.utcnow()
+            _, total = obtener_sketch().top(hoy.year, hoy.month, 5)
+            assert total > 0
+
+
+class TestCoalescencia:
+    """Se llama a vistas de prueba decoradas dentro de contextos de petición en varios hilos."""
+
+    URL = "/api/reportes/ventas?mes=1&anio=1999"
+
+    def _concurrentes(self, app, vista, hilos=8):
+        inicio = threading.Barrier(hilos)
+        resultados = [None] * hilos
+
+        def ejecutar(i):
+            with app.test_request_context(self.URL):
+                inicio.wait()
+                try:
+                    respuesta = vista()
+                    resultados[i] = (respuesta.status_code, respuesta.get_data())
+                except Exception as e:
+                    resultados[i] = e
+
+        trabajadores = [threading.Thread(target=ejecutar, args=(i,)) for i in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        return resultados
+
+    def test_peticiones_identicas_comparten_una_ejecucion(self, app):
+        llamadas = []
+
+        @coalescer
+        def lenta():
+            llamadas.append(1)
+            time.sleep(0.2)
+            return {"llamada": len(llamadas)}, 200
+
+        resultados = self._concurrentes(app, lenta)
+
+        assert len(llamadas) == 1
+        assert all(r == (200, resultados[0][1]) for r in resultados)
+
+    def test_error_se_propaga_a_quienes_esperan(self, app):
+        llamadas = []
+
+        @coalescer
+        def falla():
+            llamadas.append(1)
+            time.sleep(0.2)
+            raise ValueError("consulta rota")
+
+        resultados = self._concurrentes(app, falla)
+
+        assert len(llamadas) == 1
+        assert all(isinstance(r, ValueError) for r in resultados)
+
+    def test_timeout_retorna_503(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "REPORTES_COALESCER_TIMEOUT", 0.05)
+
+        @coalescer
+        def muy_lenta():
+            time.sleep(0.3)
+            return {"ok": True}, 200
+
+        codigos = sorted(codigo for codigo, _ in self._concurrentes(app, muy_lenta, hilos=4))
+
+        assert codigos == [200, 503, 503, 503]
+
+    def test_bloqueo_de_archivo_serializa_lideres(self, app, monkeypatch, tmp_path):
+        """Dos apps simulan dos procesos: sin coalescencia local, el flock los serializa."""
+        from app.services import coalescencia
+        monkeypatch.setitem(app.config, "REPORTES_COALESCER_BLOQUEO", "archivo")
+        monkeypatch.setitem(app.config, "REPORTES_COALESCER_DIR", str(tmp_path))
+        activas, maximo = [0], [0]
+        candado = threading.Lock()
+
+        @coalescer
+        def cuenta():
+            with candado:
+                activas[0] += 1
+                maximo[0] = max(maximo[0], activas[0])
+            time.sleep(0.05)
+            with candado:
+                activas[0] -= 1
+            return {"ok": True}, 200
+
+        # Cada hilo usa su propio registro de vuelos, como si fuera otro proceso
+        monkeypatch.setattr(coalescencia, "_estado",
+                            lambda: {"vuelos": {}, "candado": threading.Lock()})
+        resultados = self._concurrentes(app, cuenta, hilos=4)
+
+        assert [r[0] for r in resultados] == [200] * 4
+        assert maximo[0] == 1
+
+    def test_reporte_real_sigue_respondiendo(self, client, auth_headers):
+        respuesta = client.get(self.URL, headers=auth_headers)
+        assert respuesta.status_code == 200
+        assert respuesta.get_json()["resumen"]["total_ordenes"] == 0
+
+
+def _plan(sql, params=()):
+    """Detalle de EXPLAIN QUERY PLAN en SQLite como una sola cadena."""
+    conexion = _db.session.connection()
+    filas = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+    return " | ".join(fila[3] for fila in filas)
+
+
+def _compilar(consulta):
+    return str(consulta.compile(_db.engine, compile_kwargs={"literal_binds": True}))
+
+
+class TestIndicesReportes:
+
+    def test_reporte_usa_indices_de_los_rollups(self, app, client, auth_headers):
+        """Cada SELECT del reporte busca por rango en un índice, sin SCAN de tablas."""
+        capturadas = []
+
+        def capturar(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                capturadas.append((statement, params))
+
+        with app.app_context():
+            engine = _db.engine
+            obtener_cache().invalidar([TODOS])
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            client.get("/api/reportes/ventas?mes=3&anio=2026", headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        with app.app_context():
+            planes = [_plan(sql, params) for sql, params in capturadas]
+
+        assert len(planes) == 2
+        assert "SEARCH ventas_diarias USING INDEX" in planes[0]
+        assert "SEARCH ventas_diarias_productos USING INDEX" in planes[1]
+        assert not any("SCAN ventas_diarias" in p for p in planes)
+
+    def test_rango_sobre_ordenes_usa_indice_de_fecha(self, app):
+        """El rango semiabierto [desde, hasta) usa ix_ordenes_fecha y el índice de orden_id."""
+        with app.app_context():
+            resumen, productos = rollups._agregados_crudos(date(2026, 3, 1), date(2026, 4, 1))
+            plan_resumen = _plan(_compilar(resumen))
+            plan_productos = _plan(_compilar(productos))
+
+        assert "ix_ordenes_fecha" in plan_resumen
+        assert "ix_ordenes_fecha" in plan_productos
+        assert "ix_detalle_ordenes_orden_id" in plan_productos
+
+    def test_llaves_foraneas_indexadas(self, app):
+        with app.app_context():
+            por_producto = _plan(_compilar(select(DetalleOrden.id).where(DetalleOrden.producto_id == 1)))
+            por_categoria = _plan(_compilar(select(Producto.id).where(Producto.categoria_id == 1)))
+
+        assert "ix_detalle_ordenes_producto_id" in por_producto
+        assert "ix_productos_categoria_id" in por_categoria